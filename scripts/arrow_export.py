@@ -0,0 +1,364 @@
+# scripts/arrow_export.py
+import argparse
+import hashlib
+import json
+import re
+import time
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# Import des utilitaires
+from utils import iter_records, load_json, snapshot_path, write_atomic, DATA_DIR
+from feeds import pool_of
+
+TABLES = ["teams", "matches", "matchdays", "standings"]
+MAX_SETS = 5
+BACKUP_RE = re.compile(r"^(teams|matches|matchdays|standings)\.json_(\d{8}_\d{6})\.json$")
+BACKUP_RUN_GAP = 5  # secondes max entre deux backups d'un même run
+
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+NAME = pa.dictionary(pa.int32(), pa.string())  # Noms répétés : encodage dictionnaire
+PARTITION_FIELDS = [
+    pa.field("snapshot_id", pa.string()),
+    pa.field("season", pa.string()),
+    pa.field("pool", pa.string()),
+]
+SCHEMAS = {
+    "teams": pa.schema(PARTITION_FIELDS + [
+        pa.field("id", pa.string()),
+        pa.field("name", NAME),
+        pa.field("created_at", TIMESTAMP),
+        pa.field("updated_at", TIMESTAMP),
+    ]),
+    "matches": pa.schema(PARTITION_FIELDS + [
+        pa.field("match_id", pa.string()),
+        pa.field("date", pa.date32()),
+        pa.field("time", pa.string()),
+        pa.field("home_team", NAME),
+        pa.field("away_team", NAME),
+        pa.field("home_team_id", pa.string()),
+        pa.field("away_team_id", pa.string()),
+        pa.field("venue", NAME),
+        pa.field("home_sets", pa.int8()),
+        pa.field("away_sets", pa.int8()),
+        pa.field("winner", pa.string()),
+        pa.field("status", NAME),
+        pa.field("n_sets", pa.int8()),
+    ] + [
+        pa.field(f"set{i}_{side}", pa.int16())
+        for i in range(1, MAX_SETS + 1) for side in ("home", "away")
+    ] + [
+        pa.field("score_detail", pa.string()),
+        pa.field("detail_url", pa.string()),
+        pa.field("created_at", TIMESTAMP),
+        pa.field("updated_at", TIMESTAMP),
+    ]),
+    "matchdays": pa.schema(PARTITION_FIELDS + [
+        pa.field("id", pa.string()),
+        pa.field("name", pa.string()),
+        pa.field("date", pa.date32()),
+        pa.field("match_ids", pa.list_(pa.string())),
+        pa.field("created_at", TIMESTAMP),
+        pa.field("updated_at", TIMESTAMP),
+    ]),
+    "standings": pa.schema(PARTITION_FIELDS + [
+        pa.field("id", pa.string()),
+        pa.field("team_name", NAME),
+        pa.field("rank", pa.int16()),
+        pa.field("points", pa.int16()),
+        pa.field("played", pa.int16()),
+        pa.field("wins", pa.int16()),
+        pa.field("losses", pa.int16()),
+        pa.field("sets_won", pa.int16()),
+        pa.field("sets_lost", pa.int16()),
+        pa.field("points_for", pa.int32()),
+        pa.field("points_against", pa.int32()),
+        pa.field("ratio", pa.float64()),
+        pa.field("created_at", TIMESTAMP),
+        pa.field("updated_at", TIMESTAMP),
+    ]),
+}
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_timestamp(value):
+    """Horodatage ISO du scraper ("...Z") -> datetime, None si illisible"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip('Z').split('+')[0])
+    except ValueError:
+        return None
+
+
+def season_of(day):
+    """Saison sportive d'une date : à partir d'août, saison année/année+1"""
+    start = day.year if day.month >= 8 else day.year - 1
+    return f"{start}-{start + 1}"
+
+
+def flatten_match(match):
+    row = dict(match)
+    sets = match.get("sets") or []
+    row["n_sets"] = len(sets)
+    for i in range(MAX_SETS):
+        score = sets[i] if i < len(sets) else None
+        if isinstance(score, dict):
+            score = (score["home"], score["away"])
+        row[f"set{i + 1}_home"] = score[0] if score else None
+        row[f"set{i + 1}_away"] = score[1] if score else None
+    return row
+
+
+def to_table(name, rows):
+    """Lignes (dicts) -> table Arrow typée selon SCHEMAS[name]"""
+    schema = SCHEMAS[name]
+    columns = {field.name: [] for field in schema}
+    for row in rows:
+        for field in schema:
+            value = row.get(field.name)
+            if pa.types.is_timestamp(field.type):
+                value = parse_timestamp(value)
+            elif pa.types.is_date32(field.type):
+                value = parse_date(value)
+            columns[field.name].append(value)
+    return pa.table({
+        field.name: pa.array(columns[field.name], type=field.type) for field in schema
+    }, schema=schema)
+
+
+class ArrowExporter:
+    """Export incrémental des snapshots (et de leurs backups) en Arrow IPC et Parquet
+
+        data/arrow/<table>/season=2025-2026/pool=BFQ/<snapshot_id>.arrow
+        data/arrow/<table>/season=2025-2026/pool=BFQ/<snapshot_id>.parquet
+
+    Chaque snapshot exporté est noté dans `data/arrow/manifest.json` avec le
+    hash de chacune de ses tables : un snapshot (courant ou backup) dont toutes
+    les tables ont déjà été exportées n'est pas réécrit. Les fichiers .arrow ne
+    sont pas compressés pour pouvoir être lus par mapping mémoire sans copie
+    (`read_table`).
+    """
+
+    def __init__(self, data_dir=DATA_DIR, out_dir=None, season=None, logger=print):
+        self.data_dir = Path(data_dir)
+        self.out_dir = Path(out_dir) if out_dir else self.data_dir / "arrow"
+        self.manifest_path = self.out_dir / "manifest.json"
+        self.season = season.replace("/", "-") if season else None
+        self.log = logger
+        self.manifest = load_json(str(self.manifest_path)) or {"snapshots": {}}
+
+    def snapshots(self):
+        """Snapshots disponibles : {id: (fichiers, courant ?)}, backups groupés par run"""
+        groups = {}
+        backup_dir = self.data_dir / "backups"
+        if backup_dir.exists():
+            found = [BACKUP_RE.match(path.name) for path in sorted(backup_dir.iterdir())]
+            backups = sorted((m.group(2), m.group(1), backup_dir / m.group(0)) for m in found if m)
+            run_id, run_files, last = None, None, None
+            for stamp, name, path in backups:
+                moment = datetime.strptime(stamp, "%Y%m%d_%H%M%S")
+                # Les backups d'un run peuvent être à cheval sur plusieurs secondes :
+                # un nouvel horodatage proche du précédent reste dans le même run,
+                # sauf si la table y a déjà son backup
+                if run_files is None or name in run_files or (moment - last).total_seconds() > BACKUP_RUN_GAP:
+                    run_id, run_files = stamp, {}
+                    groups[run_id] = (run_files, False)
+                run_files[name] = path
+                last = moment
+
+        current = {}
+        for name in TABLES:
+            path = snapshot_path(self.data_dir, f"{name}.json")
+            if path.exists():
+                current[name] = path
+        if current:
+            mtime = max(path.stat().st_mtime for path in current.values())
+            groups[time.strftime("%Y%m%d_%H%M%S", time.localtime(mtime))] = (current, True)
+        return groups
+
+    @staticmethod
+    def table_hashes(files):
+        """Hash du contenu de chaque table, indépendant du nom de fichier (backup ou courant)"""
+        hashes = {}
+        for name, path in files.items():
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            hashes[name] = digest.hexdigest()
+        return hashes
+
+    def partitions(self, tables, season=None):
+        """Affecte saison et poule à chaque ligne ; renvoie {table: {(saison, poule): lignes}}
+
+        Sans saison explicite, c'est la saison la plus fréquente parmi les
+        dates de matchs du snapshot.
+        """
+        matches = tables.get("matches", [])
+        seasons = Counter(season_of(d) for d in (parse_date(m.get("date")) for m in matches) if d)
+        season = season or (seasons.most_common(1)[0][0] if seasons else "unknown")
+
+        team_pools = {}
+        for match in matches:
+            pool = pool_of(match.get("match_id"))
+            team_pools.setdefault(match.get("home_team"), pool)
+            team_pools.setdefault(match.get("away_team"), pool)
+
+        def pool_for(name, row):
+            if name == "matches":
+                return pool_of(row.get("match_id"))
+            if name == "matchdays":
+                return row.get("pool") or pool_of((row.get("match_ids") or [None])[0])
+            return team_pools.get(row.get("team_name") or row.get("name"))
+
+        result = {}
+        for name, rows in tables.items():
+            parts = result.setdefault(name, {})
+            for row in rows:
+                if name == "matches":
+                    row = flatten_match(row)
+                parts.setdefault((season, pool_for(name, row) or "unknown"), []).append(row)
+        return result
+
+    def export_snapshot(self, snapshot_id, files, season=None):
+        tables = {name: list(iter_records(path)) for name, path in files.items()}
+        written = 0
+        for name, parts in self.partitions(tables, season).items():
+            for (season, pool), rows in parts.items():
+                for row in rows:
+                    row.update({"snapshot_id": snapshot_id, "season": season, "pool": pool})
+                table = to_table(name, rows)
+                directory = self.out_dir / name / f"season={season}" / f"pool={pool}"
+                directory.mkdir(parents=True, exist_ok=True)
+                self.write(table, directory / f"{snapshot_id}")
+                written += table.num_rows
+        return written
+
+    @staticmethod
+    def write(table, base):
+        """Écrit une partition (.parquet compressé, .arrow brut), via fichiers temporaires"""
+        parquet_tmp = base.with_name(f".{base.name}.parquet.tmp")
+        pq.write_table(table, parquet_tmp, compression="zstd")
+        parquet_tmp.replace(base.with_suffix(".parquet"))
+
+        arrow_tmp = base.with_name(f".{base.name}.arrow.tmp")
+        with pa.OSFile(str(arrow_tmp), 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        arrow_tmp.replace(base.with_suffix(".arrow"))
+
+    def export(self):
+        """Exporte les snapshots pas encore exportés ; renvoie leurs identifiants"""
+        # Les tables d'un backup et du snapshot courant ne coïncident pas forcément
+        # (anciens backups sans matchdays) : on compare table par table
+        exported_tables = {
+            (name, digest)
+            for entry in self.manifest["snapshots"].values()
+            for name, digest in entry.get("hashes", {}).items()
+        }
+        exported = []
+        for snapshot_id, (files, current) in sorted(self.snapshots().items()):
+            hashes = self.table_hashes(files)
+            if snapshot_id in self.manifest["snapshots"] or set(hashes.items()) <= exported_tables:
+                continue
+            # La saison passée en paramètre ne vaut que pour le snapshot courant
+            rows = self.export_snapshot(snapshot_id, files, self.season if current else None)
+            self.manifest["snapshots"][snapshot_id] = {
+                "hashes": hashes,
+                "tables": sorted(files),
+                "rows": rows
+            }
+            exported_tables.update(hashes.items())
+            exported.append(snapshot_id)
+            # Manifeste réécrit après chaque snapshot : une interruption ne refait que le dernier
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.manifest_path, json.dumps(self.manifest, indent=2, sort_keys=True))
+        self.log(f"Export Arrow/Parquet: {len(exported)} snapshot(s) exporté(s)")
+        return exported
+
+
+def partition_files(root, table, suffix, seasons=None, pools=None):
+    """Fichiers d'une table, filtrés par saison et poule d'après les dossiers"""
+    files = []
+    for season_dir in sorted((Path(root) / table).glob("season=*")):
+        if seasons and season_dir.name.split("=", 1)[1] not in {s.replace("/", "-") for s in seasons}:
+            continue
+        for pool_dir in sorted(season_dir.glob("pool=*")):
+            if pools and pool_dir.name.split("=", 1)[1] not in pools:
+                continue
+            files.extend(sorted(pool_dir.glob(f"*{suffix}")))
+    return files
+
+
+def read_table(root, table, columns=None, seasons=None, pools=None, snapshot_id=None, fmt="arrow"):
+    """Lit une table exportée avec élagage de colonnes et de partitions
+
+    En Arrow IPC, chaque fichier est mappé en mémoire : les colonnes
+    sélectionnées pointent directement dans le fichier (pas de copie ni de
+    décodage). En Parquet, seules les colonnes demandées sont décodées.
+    """
+    suffix = ".arrow" if fmt == "arrow" else ".parquet"
+    parts = []
+    for path in partition_files(root, table, suffix, seasons, pools):
+        if snapshot_id and path.stem != snapshot_id:
+            continue
+        if fmt == "arrow":
+            part = ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+            if columns:
+                part = part.select(columns)
+        else:
+            part = pq.read_table(path, columns=columns)
+        parts.append(part)
+    if not parts:
+        schema = SCHEMAS[table]
+        if columns:
+            schema = pa.schema([schema.field(c) for c in columns])
+        return schema.empty_table()
+    return pa.concat_tables(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Arrow IPC / Parquet des snapshots")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--out-dir", default=None, help="Dossier d'export (défaut: <data-dir>/arrow)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Exporter les nouveaux snapshots (courant et backups)")
+    export.add_argument("--season", default=None,
+                        help="Saison du snapshot (défaut: déduite des dates de matchs)")
+
+    read = sub.add_parser("read", help="Lire une table exportée")
+    read.add_argument("table", choices=TABLES)
+    read.add_argument("--columns", default=None, help="Colonnes séparées par des virgules")
+    read.add_argument("--season", action="append", dest="seasons")
+    read.add_argument("--pool", action="append", dest="pools")
+    read.add_argument("--format", choices=["arrow", "parquet"], default="arrow")
+
+    args = parser.parse_args()
+    root = Path(args.out_dir) if args.out_dir else Path(args.data_dir) / "arrow"
+
+    if args.command == "export":
+        ArrowExporter(args.data_dir, root, season=args.season).export()
+    else:
+        start = time.perf_counter()
+        columns = args.columns.split(",") if args.columns else None
+        table = read_table(root, args.table, columns, args.seasons, args.pools, fmt=args.format)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(table.slice(0, 20))
+        print(f"{table.num_rows} lignes, {table.num_columns} colonnes lues en {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
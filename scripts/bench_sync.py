@@ -0,0 +1,361 @@
+# scripts/bench_sync.py
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Import des utilitaires
+from utils import load_json, save_json, DATA_DIR
+from final_sync import RestBackend, sync_snapshot, adapt_matchday, adapt_match, adapt_standing
+from sync_checkpoint import SyncCheckpoint
+
+# Jeton au format JWT accepté par supabase-py (le faux serveur ne le vérifie pas)
+FAKE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+class FakePostgrestHandler(BaseHTTPRequestHandler):
+    """Sous-ensemble de PostgREST utilisé par final_sync (upsert, insert, delete)"""
+
+    def table_name(self):
+        path = urlparse(self.path).path
+        return path.rsplit('/', 1)[-1]
+
+    def query(self):
+        return {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+    def reply(self, status, payload=None):
+        body = json.dumps(payload if payload is not None else []).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def injected_failure(self, size):
+        """Latence, limite de taille et erreurs aléatoires configurées sur le serveur"""
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.bytes_received += size
+        if server.latency:
+            time.sleep(server.latency)
+        if server.max_payload and size > server.max_payload:
+            self.reply(413, {"message": "Payload too large"})
+            return True
+        if server.error_rate and server.rng.random() < server.error_rate:
+            with server.lock:
+                server.errors += 1
+            self.reply(503, {"message": "Service unavailable (injected)"})
+            return True
+        return False
+
+    def unknown_columns(self, columns):
+        """Colonnes absentes du schéma déclaré de la table (aucun contrôle sans schéma)"""
+        known = self.server.columns.get(self.table_name())
+        return sorted(set(columns) - known) if known else []
+
+    def do_POST(self):
+        started = time.monotonic()
+        size = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(size)
+        if not self.injected_failure(size):
+            rows = json.loads(body or b"[]")
+            rows = rows if isinstance(rows, list) else [rows]
+            unknown = self.unknown_columns(c for row in rows for c in row)
+            if unknown:
+                self.reply(400, {"code": "PGRST204", "details": None, "hint": None,
+                                 "message": f"Could not find the '{unknown[0]}' column"})
+                self.server.record_latency(time.monotonic() - started)
+                return
+            key = self.query().get("on_conflict", "id")
+            merge = "merge-duplicates" in (self.headers.get("Prefer") or "")
+            store = self.server.tables.setdefault(self.table_name(), {})
+            with self.server.lock:
+                for row in rows:
+                    row_key = row.get(key) if row.get(key) is not None else len(store)
+                    if merge and row_key in store:
+                        store[row_key].update(row)
+                    else:
+                        store[row_key] = dict(row)
+            self.reply(201, rows)
+        self.server.record_latency(time.monotonic() - started)
+
+    def do_GET(self):
+        started = time.monotonic()
+        if not self.injected_failure(0):
+            query = self.query()
+            columns = [c for c in query.get("select", "*").split(",") if c != "*"]
+            unknown = self.unknown_columns(columns)
+            if unknown:
+                self.reply(400, {"code": "42703", "details": None, "hint": None,
+                                 "message": f"column {self.table_name()}.{unknown[0]} does not exist"})
+                self.server.record_latency(time.monotonic() - started)
+                return
+            store = self.server.tables.setdefault(self.table_name(), {})
+            with self.server.lock:
+                rows = list(store.values())
+            if "order" in query:
+                column, _, direction = query["order"].partition(".")
+                rows.sort(key=lambda row: str(row.get(column)), reverse=direction.startswith("desc"))
+            # Comme PostgREST : au plus max_rows lignes par réponse, même sans limit
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", self.server.max_rows or len(rows)))
+            if self.server.max_rows:
+                limit = min(limit, self.server.max_rows)
+            rows = [
+                {c: row.get(c) for c in columns} if columns else dict(row)
+                for row in rows[offset:offset + limit]
+            ]
+            self.reply(200, rows)
+        self.server.record_latency(time.monotonic() - started)
+
+    def do_DELETE(self):
+        started = time.monotonic()
+        if not self.injected_failure(0):
+            store = self.server.tables.setdefault(self.table_name(), {})
+            with self.server.lock:
+                for column, condition in self.query().items():
+                    if condition.startswith("in.("):
+                        values = {v.strip('"') for v in condition[len("in.("):-1].split(",")}
+                        for key in [k for k, row in store.items() if str(row.get(column)) in values]:
+                            del store[key]
+                    elif condition.startswith("neq."):
+                        value = condition[len("neq."):]
+                        for key in [k for k, row in store.items() if str(row.get(column)) != value]:
+                            del store[key]
+            self.reply(200, [])
+        self.server.record_latency(time.monotonic() - started)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakePostgrest(ThreadingHTTPServer):
+    """Serveur PostgREST local avec latence, taux d'erreur et taille maximale configurables
+
+    `max_rows` plafonne le nombre de lignes par réponse de lecture, comme le
+    paramètre du même nom de PostgREST (1000 par défaut sur Supabase).
+    `columns` ({table: colonnes}) fait rejeter les colonnes inconnues comme
+    le ferait un schéma réel ; sans entrée, une table accepte tout.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, max_payload=None, seed=0, max_rows=1000,
+                 columns=None):
+        super().__init__(("127.0.0.1", port), FakePostgrestHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_payload = max_payload
+        self.max_rows = max_rows
+        self.columns = {table: set(names) for table, names in (columns or {}).items()}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tables = {}
+        self.reset_metrics()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset_metrics(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.latencies = []
+
+    def record_latency(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+def base_snapshot(data_dir):
+    """Snapshot de référence : data/ s'il existe, sinon une poule minimale"""
+    matchdays = load_json(str(Path(data_dir) / "matchdays.json"))
+    matches = load_json(str(Path(data_dir) / "matches.json"))
+    standings = load_json(str(Path(data_dir) / "standings.json"))
+    if matchdays and matches and standings:
+        return matchdays, matches, standings
+
+    teams = [f"EQUIPE {i}" for i in range(1, 7)]
+    matches, matchdays = [], []
+    for day in range(10):
+        ids = []
+        for slot in range(3):
+            match_id = f"BFQ{day * 3 + slot + 1:03d}"
+            ids.append(match_id)
+            matches.append({
+                "match_id": match_id, "date": f"2025-10-{day + 1:02d}", "time": "20:00",
+                "home_team": teams[slot], "away_team": teams[5 - slot], "venue": "COMPLEXE",
+                "home_sets": 3, "away_sets": 1, "score_detail": "25:20, 20:25, 25:18, 25:22",
+                "sets": [{"home": 25, "away": 20}, {"home": 20, "away": 25},
+                         {"home": 25, "away": 18}, {"home": 25, "away": 22}],
+                "winner": "home", "status": "completed", "created_at": "2025-10-01T00:00:00Z"
+            })
+        matchdays.append({"name": f"Journée {day + 1:02d}", "date": f"2025-10-{day + 1:02d}", "match_ids": ids})
+    standings = [{
+        "id": f"00000000-0000-0000-0000-{i:012d}", "team_name": name, "rank": i, "points": 10,
+        "played": 10, "wins": 5, "losses": 5, "sets_won": 15, "sets_lost": 15,
+        "points_for": 700, "points_against": 700, "ratio": 1.0
+    } for i, name in enumerate(teams, 1)]
+    return matchdays, matches, standings
+
+
+def scale_snapshot(base, factor, target_dir):
+    """Écrit un snapshot `factor` fois plus gros (clés suffixées par copie)"""
+    matchdays, matches, standings = base
+    scaled_matchdays, scaled_matches, scaled_standings = [], [], []
+    for copy in range(factor):
+        suffix = f"-{copy}" if copy else ""
+        for m in matchdays:
+            scaled_matchdays.append(dict(m, name=f"{m['name']}{suffix}",
+                                         match_ids=[f"{i}{suffix}" for i in m["match_ids"]]))
+        for m in matches:
+            scaled_matches.append(dict(m, match_id=f"{m['match_id']}{suffix}"))
+        for s in standings:
+            standing_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{s['id']}/{copy}")) if copy else s["id"]
+            scaled_standings.append(dict(s, id=standing_id))
+    save_json(scaled_matchdays, str(Path(target_dir) / "matchdays.json"))
+    save_json(scaled_matches, str(Path(target_dir) / "matches.json"))
+    save_json(scaled_standings, str(Path(target_dir) / "standings.json"))
+    return len(scaled_matchdays) + len(scaled_matches) + len(scaled_standings)
+
+
+def sync_legacy(backend, data_dir):
+    """Stratégie historique : un upsert complet par table, delete + insert des classements"""
+    data_dir = Path(data_dir)
+    backend.upsert('matchdays', [adapt_matchday(m) for m in load_json(str(data_dir / "matchdays.json"))])
+    backend.upsert('matches', [adapt_match(m) for m in load_json(str(data_dir / "matches.json"))],
+                   on_conflict='match_id')
+    backend.replace('standings', [adapt_standing(s) for s in load_json(str(data_dir / "standings.json"))])
+
+
+class TimedBackend:
+    """Enveloppe un backend pour mesurer la latence vue par le client"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.latencies = []
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+        if name not in ("upsert", "replace", "delete_missing"):
+            return method
+
+        def timed(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.latencies.append(time.monotonic() - start)
+        return timed
+
+
+def run_mode(server, mode, snapshot_dir, retries):
+    """Exécute une synchro complète ; les modes par lots reprennent via le journal"""
+    server.reset_metrics()
+    server.tables.clear()
+    backend = TimedBackend(RestBackend(server.url, FAKE_KEY))
+    checkpoint_path = Path(snapshot_dir) / ".bench_checkpoint.json"
+    if checkpoint_path.exists():
+        checkpoint_path.unlink()
+
+    attempts, ok = 0, False
+    started = time.monotonic()
+    while attempts <= retries and not ok:
+        attempts += 1
+        try:
+            if mode == "legacy":
+                sync_legacy(backend, snapshot_dir)
+            else:
+                chunk_size = int(mode.split("-", 1)[1])
+                checkpoint = SyncCheckpoint(checkpoint_path, logger=lambda message: None)
+                sync_snapshot(backend, snapshot_dir, chunk_size, checkpoint)
+            ok = True
+        except Exception:
+            if mode == "legacy":
+                # Pas de reprise possible : on recommence tout
+                server.tables.clear()
+    elapsed = time.monotonic() - started
+
+    rows = sum(len(rows) for rows in server.tables.values())
+    return {
+        "mode": mode,
+        "ok": ok,
+        "attempts": attempts,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1) if ok and elapsed else 0.0,
+        "requests": server.requests,
+        "errors": server.errors,
+        "bytes_sent": server.bytes_received,
+        "p50_ms": round(percentile(backend.latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(backend.latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(backend.latencies, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de final_sync contre un faux PostgREST local")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Snapshot de référence")
+    parser.add_argument("--scales", default="10,100,1000", help="Facteurs de volume")
+    parser.add_argument("--modes", default="legacy,batched-100,batched-500,batched-2000")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latence par requête (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-payload", type=int, default=None, help="Taille max d'une requête (octets)")
+    parser.add_argument("--max-rows", type=int, default=1000, help="Lignes max par lecture (max_rows PostgREST)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    base = base_snapshot(args.data_dir)
+    server = FakePostgrest(latency=args.latency, error_rate=args.error_rate, max_payload=args.max_payload,
+                           max_rows=args.max_rows)
+    results = []
+    try:
+        for factor in [int(f) for f in args.scales.split(",")]:
+            snapshot_dir = tempfile.mkdtemp(prefix=f"bench_x{factor}_")
+            try:
+                total = scale_snapshot(base, factor, snapshot_dir)
+                print(f"\n=== x{factor} ({total} lignes) ===")
+                for mode in args.modes.split(","):
+                    result = dict(run_mode(server, mode, snapshot_dir, args.retries), scale=factor, rows=total)
+                    results.append(result)
+                    print(
+                        f"{mode:<14} {'OK ' if result['ok'] else 'KO '} "
+                        f"{result['rows_per_s']:>10} lignes/s  {result['requests']:>5} req  "
+                        f"{result['bytes_sent'] / 1e6:>8.2f} Mo  "
+                        f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  "
+                        f"({result['attempts']} tentative(s))"
+                    )
+            finally:
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+    finally:
+        server.close()
+
+    if args.output:
+        save_json(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# scripts/detail_crawler.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urljoin
+
+# Import des utilitaires
+from utils import get_timestamp, load_json, write_atomic, DATA_DIR
+from records import as_dict
+from http_cache import CachedSession
+
+DEFAULT_BASE_URL = "https://www.ffvbbeach.org/ffvbapp/resu/vbspo_calendrier.php"
+
+
+def match_fingerprint(match):
+    """Empreinte des champs d'un match qui doivent invalider sa feuille de match"""
+    match = as_dict(match)
+    key = "|".join(str(match.get(field)) for field in (
+        "status", "home_sets", "away_sets", "score_detail", "detail_url"
+    ))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class PolitenessBudget:
+    """Limite le rythme et le nombre de requêtes envoyées au site FFVB
+
+    `min_interval` impose un délai minimal entre deux requêtes (tous threads
+    confondus) et `max_requests` plafonne le nombre de pages d'un run.
+    """
+
+    def __init__(self, min_interval=1.0, max_requests=None):
+        self.min_interval = min_interval
+        self.max_requests = max_requests
+        self.requests_made = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Réserve un créneau de requête ; renvoie False si le budget est épuisé"""
+        with self._lock:
+            if self.max_requests is not None and self.requests_made >= self.max_requests:
+                return False
+            self.requests_made += 1
+            now = time.monotonic()
+            wait = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if wait:
+            time.sleep(wait)
+        return True
+
+
+class DetailCache:
+    """Cache disque adressé par contenu des feuilles de match
+
+    Les pages sont stockées sous `objects/<aa>/<sha256>.html` ; l'index
+    `index.json` associe, par saison, chaque match_id à l'URL récupérée, au
+    hash du contenu et à l'empreinte du match au moment du téléchargement.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.index = load_json(str(self.index_path)) or {}
+        self._lock = threading.Lock()
+
+    def object_path(self, content_hash):
+        return self.objects_dir / content_hash[:2] / f"{content_hash}.html"
+
+    def get_entry(self, season, match_id):
+        return self.index.get(season, {}).get(match_id)
+
+    def is_fresh(self, season, match_id, fingerprint):
+        """Vrai si la feuille de ce match est déjà en cache pour cette empreinte"""
+        entry = self.get_entry(season, match_id)
+        return (
+            entry is not None
+            and entry.get("fingerprint") == fingerprint
+            and self.object_path(entry["hash"]).exists()
+        )
+
+    def store(self, season, match_id, url, fingerprint, content):
+        """Stocke une page (une seule copie par contenu) et met à jour l'index"""
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self.object_path(content_hash)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            write_atomic(path, content)
+
+        with self._lock:
+            self.index.setdefault(season, {})[match_id] = {
+                "url": url,
+                "hash": content_hash,
+                "fingerprint": fingerprint,
+                "fetched_at": get_timestamp()
+            }
+        return content_hash
+
+    def load(self, season, match_id):
+        """Renvoie le contenu brut de la feuille d'un match, ou None"""
+        entry = self.get_entry(season, match_id)
+        if not entry:
+            return None
+        path = self.object_path(entry["hash"])
+        return path.read_bytes() if path.exists() else None
+
+    def save_index(self):
+        with self._lock:
+            payload = json.dumps(self.index, ensure_ascii=False, indent=2)
+        write_atomic(self.index_path, payload)
+
+
+class DetailCrawler:
+    """Récupère les feuilles de match des matchs terminés
+
+    Les liens sont découverts sur les lignes analysées par `parse_match_row`
+    (champ `detail_url`) et placés dans une frontière dédoublonnée par URL.
+    Seuls les matchs terminés dont la feuille manque ou dont l'empreinte a
+    changé sont téléchargés, en parallèle et dans la limite du budget de
+    politesse.
+    """
+
+    def __init__(self, session, data_dir=DATA_DIR, season="2025/2026",
+                 base_url=DEFAULT_BASE_URL, max_workers=4, min_interval=1.0,
+                 max_requests=None, logger=print):
+        self.session = session
+        self.season = season
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.budget = PolitenessBudget(min_interval, max_requests)
+        self.cache = DetailCache(Path(data_dir) / "details")
+        self.frontier = OrderedDict()  # url -> (match_id, empreinte)
+        self.log = logger
+
+    def discover(self, matches):
+        """Ajoute à la frontière les feuilles de match à (re)télécharger"""
+        added = 0
+        for match in matches:
+            match = as_dict(match)
+            if match.get("status") != "completed" or not match.get("detail_url"):
+                continue
+
+            fingerprint = match_fingerprint(match)
+            if self.cache.is_fresh(self.season, match["match_id"], fingerprint):
+                continue
+
+            url = urljoin(self.base_url, match["detail_url"])
+            if url not in self.frontier:
+                self.frontier[url] = (match["match_id"], fingerprint)
+                added += 1
+        return added
+
+    def fetch(self, url, match_id, fingerprint):
+        """Télécharge une feuille de match et la stocke dans le cache"""
+        if not self.budget.acquire():
+            return None
+        # Feuille absente ou match modifié : le cache HTTP ne doit pas resservir l'ancienne page
+        refresh = {"refresh": True} if isinstance(self.session, CachedSession) else {}
+        response = self.session.get(url, timeout=30, **refresh)
+        response.raise_for_status()
+        return self.cache.store(self.season, match_id, url, fingerprint, response.content)
+
+    def crawl(self):
+        """Vide la frontière et renvoie le nombre de feuilles téléchargées"""
+        pending = list(self.frontier.items())
+        self.frontier.clear()
+        if not pending:
+            return 0
+
+        fetched = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.fetch, url, match_id, fingerprint): (url, match_id)
+                for url, (match_id, fingerprint) in pending
+            }
+            for future in as_completed(futures):
+                url, match_id = futures[future]
+                try:
+                    if future.result():
+                        fetched += 1
+                except Exception as e:
+                    self.log(f"Erreur feuille de match {match_id} ({url}): {e}")
+
+        self.cache.save_index()
+        return fetched
+
+    def run(self, matches):
+        """Découverte puis téléchargement des feuilles de match"""
+        discovered = self.discover(matches)
+        fetched = self.crawl()
+        self.log(f"Feuilles de match: {discovered} à récupérer, {fetched} téléchargées")
+        return fetched
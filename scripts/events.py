@@ -0,0 +1,306 @@
+# scripts/events.py
+import argparse
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Import des utilitaires
+from utils import get_timestamp, DATA_DIR
+from records import as_dict
+
+# Événements émis en fin de scraping, à partir de la différence entre le
+# snapshot précédent (fichiers de data/) et celui qui vient d'être extrait :
+#   - match_completed : un match passe à l'état "completed"
+#   - score_updated   : le score d'un match change (hors passage à terminé)
+#   - rank_changed    : le rang d'une équipe change au classement
+# Chaque événement est un dict compact {"id", "type", "key", "emitted_at", "data"}.
+
+
+def make_event(event_type, key, data, emitted_at):
+    """Construit un événement avec un identifiant stable (dédoublonnage côté client)
+
+    L'horodatage du run entre dans l'identifiant : republier un même run
+    redonne les mêmes identifiants, mais une même transition observée lors
+    d'un run ultérieur (ex: rang 3 -> 2 à points égaux) est un nouvel événement.
+    """
+    digest = hashlib.sha1(
+        json.dumps([event_type, key, data, emitted_at], sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:16]
+    return {
+        "id": digest,
+        "type": event_type,
+        "key": key,
+        "emitted_at": emitted_at,
+        "data": data
+    }
+
+
+def match_score(match):
+    return {
+        "home_sets": match.get("home_sets"),
+        "away_sets": match.get("away_sets"),
+        "score_detail": match.get("score_detail"),
+        "winner": match.get("winner")
+    }
+
+
+def diff_matches(old_matches, new_matches, emitted_at):
+    """Événements de match entre deux snapshots"""
+    previous = {m["match_id"]: m for m in map(as_dict, old_matches or [])}
+    events = []
+    for match in map(as_dict, new_matches):
+        old = previous.get(match["match_id"])
+        if old is None:
+            continue
+
+        score = match_score(match)
+        data = {
+            "match_id": match["match_id"],
+            "home_team": match["home_team"],
+            "away_team": match["away_team"],
+            **score
+        }
+        if match.get("status") == "completed" and old.get("status") != "completed":
+            events.append(make_event("match_completed", match["match_id"], data, emitted_at))
+        elif score != match_score(old):
+            data["previous"] = match_score(old)
+            events.append(make_event("score_updated", match["match_id"], data, emitted_at))
+    return events
+
+
+def diff_standings(old_standings, new_standings, emitted_at):
+    """Événements de classement entre deux snapshots"""
+    previous = {s["id"]: s for s in map(as_dict, old_standings or [])}
+    events = []
+    for standing in map(as_dict, new_standings):
+        old = previous.get(standing["id"])
+        if old is None or old.get("rank") == standing.get("rank"):
+            continue
+        events.append(make_event("rank_changed", standing["id"], {
+            "team_id": standing["id"],
+            "team_name": standing["team_name"],
+            "old_rank": old.get("rank"),
+            "new_rank": standing.get("rank"),
+            "points": standing.get("points")
+        }, emitted_at))
+    return events
+
+
+def diff_snapshots(old_matches, new_matches, old_standings, new_standings, emitted_at=None):
+    """Tous les événements entre deux snapshots"""
+    emitted_at = emitted_at or get_timestamp()
+    return (
+        diff_matches(old_matches, new_matches, emitted_at)
+        + diff_standings(old_standings, new_standings, emitted_at)
+    )
+
+
+class JsonLinesSink:
+    """Ajoute les événements à un fichier JSON-lines"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def send(self, events):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+
+class WebhookSink:
+    """POST des événements par lots vers un webhook, avec reprises
+
+    Chaque lot est envoyé sous la forme {"events": [...]}. Les erreurs réseau
+    et les réponses 5xx/429 sont retentées avec un délai exponentiel ; un lot
+    qui échoue après `max_retries` tentatives lève l'erreur.
+    """
+
+    def __init__(self, url, batch_size=100, max_retries=3, backoff=0.5, timeout=10, session=None):
+        self.url = url
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def post_batch(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(self.url, json={"events": batch}, timeout=self.timeout)
+                if response.status_code < 500 and response.status_code != 429:
+                    response.raise_for_status()
+                    return
+                error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt))
+        raise error
+
+    def send(self, events):
+        for start in range(0, len(events), self.batch_size):
+            self.post_batch(events[start:start + self.batch_size])
+
+    def close(self):
+        self.session.close()
+
+
+class SSEHandler(BaseHTTPRequestHandler):
+    """Flux Server-Sent Events sur GET /events (reprise via Last-Event-ID)"""
+
+    def do_GET(self):
+        if self.path.split('?')[0] != "/events":
+            self.send_error(404)
+            return
+
+        sink = self.server.sink
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+        client = sink.subscribe(self.headers.get("Last-Event-ID"))
+        try:
+            while not sink.closed:
+                try:
+                    event = client.get(timeout=15)
+                except queue.Empty:
+                    # Commentaire SSE pour garder la connexion ouverte
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                payload = json.dumps(event, ensure_ascii=False)
+                self.wfile.write(
+                    f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n".encode('utf-8')
+                )
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            sink.unsubscribe(client)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SSESink:
+    """Endpoint Server-Sent Events local alimenté par les événements publiés
+
+    Les derniers événements sont conservés (`history`) pour qu'un client qui
+    se reconnecte avec Last-Event-ID reçoive ceux qu'il a manqués.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, history=500):
+        self.history = deque(maxlen=history)
+        self.clients = set()
+        self.closed = False
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), SSEHandler)
+        self.server.daemon_threads = True
+        self.server.sink = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def subscribe(self, last_event_id=None):
+        client = queue.Queue()
+        with self._lock:
+            if last_event_id:
+                history = list(self.history)
+                ids = [event["id"] for event in history]
+                if last_event_id in ids:
+                    # Reprise après la dernière occurrence de l'identifiant
+                    position = len(ids) - ids[::-1].index(last_event_id)
+                    for event in history[position:]:
+                        client.put(event)
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self.clients.discard(client)
+
+    def send(self, events):
+        with self._lock:
+            for event in events:
+                self.history.append(event)
+                for client in self.clients:
+                    client.put(event)
+
+    def close(self):
+        self.closed = True
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class EventPublisher:
+    """Diffuse les événements vers plusieurs sinks ; l'échec d'un sink n'interrompt pas les autres"""
+
+    def __init__(self, sinks=None, logger=print):
+        self.sinks = list(sinks or [])
+        self.log = logger
+
+    def publish(self, events):
+        if not events or not self.sinks:
+            return 0
+        for sink in self.sinks:
+            try:
+                sink.send(events)
+            except Exception as e:
+                self.log(f"Erreur publication événements ({sink.__class__.__name__}): {e}")
+        return len(events)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def tail_events(path, poll_interval=1.0):
+    """Suit un fichier JSON-lines d'événements et produit les nouveaux"""
+    path = Path(path)
+    position = path.stat().st_size if path.exists() else 0
+    while True:
+        if path.exists():
+            if path.stat().st_size < position:
+                position = 0  # fichier tronqué ou remplacé
+            with open(path, 'r', encoding='utf-8') as f:
+                f.seek(position)
+                lines = f.readlines()
+                position = f.tell()
+            events = [json.loads(line) for line in lines if line.strip()]
+            if events:
+                yield events
+        time.sleep(poll_interval)
+
+
+def main():
+    """Sert en SSE les événements ajoutés au fichier JSON-lines par le scraper"""
+    parser = argparse.ArgumentParser(description="Endpoint SSE des événements de scraping")
+    parser.add_argument("--file", default=str(DATA_DIR / "events.jsonl"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    sink = SSESink(args.host, args.port)
+    print(f"Flux SSE disponible sur http://{args.host}:{args.port}/events")
+    try:
+        for events in tail_events(args.file):
+            sink.send(events)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
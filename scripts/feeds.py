@@ -0,0 +1,353 @@
+# scripts/feeds.py
+import argparse
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Import des utilitaires
+from utils import get_timestamp, iter_records, load_json, snapshot_path, write_atomic, DATA_DIR
+from records import as_dict
+from team_index import normalize_team_name
+from query import match_sort_key
+
+# Champs d'un match qui apparaissent dans les flux : seuls leurs changements
+# provoquent la réécriture d'un flux (pas created_at / updated_at)
+FEED_FIELDS = (
+    "match_id", "date", "time", "home_team", "away_team", "venue",
+    "home_sets", "away_sets", "status", "home_team_id", "away_team_id"
+)
+MATCH_DURATION = timedelta(hours=2)
+TIMEZONE = "Europe/Paris"
+# Version du format des flux : la changer force la réécriture de tous les flux
+FEED_VERSION = 3
+
+# Définition du fuseau référencé par les DTSTART;TZID= (RFC 5545, 3.6.5) :
+# heure d'été du dernier dimanche de mars au dernier dimanche d'octobre
+VTIMEZONE = [
+    "BEGIN:VTIMEZONE",
+    f"TZID:{TIMEZONE}",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+]
+
+
+def slugify(name):
+    """Nom de fichier d'un flux d'équipe : "Hellemmes-Lille 1" -> "hellemmes-lille-1" """
+    return re.sub(r"[^a-z0-9]+", "-", normalize_team_name(name).lower()).strip("-")
+
+
+def pool_of(match_id):
+    """Code de poule d'un match (préfixe alphabétique de son identifiant)"""
+    found = re.match(r"[A-Z]+", match_id or "")
+    return found.group(0) if found else None
+
+
+def feed_fields(match):
+    return {field: match.get(field) for field in FEED_FIELDS}
+
+
+def feed_fingerprint(match):
+    """Empreinte du contenu d'un match tel qu'il apparaît dans les flux"""
+    payload = json.dumps(feed_fields(match), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def team_feed_key(match, side):
+    """Flux d'une équipe : son UUID (stable si le nom change), sinon le slug de son nom"""
+    team_id = match.get(f"{side}_team_id")
+    if team_id:
+        return f"teams/{team_id}"
+    slug = slugify(match.get(f"{side}_team"))
+    return f"teams/{slug}" if slug else None
+
+
+def feed_keys(match):
+    """Flux dont dépend un match : ses deux équipes et sa poule"""
+    keys = []
+    for side in ("home", "away"):
+        key = team_feed_key(match, side)
+        if key:
+            keys.append(key)
+    pool = pool_of(match.get("match_id"))
+    if pool:
+        keys.append(f"pools/{pool.lower()}")
+    return keys
+
+
+def ical_escape(text):
+    return (str(text or "").replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def ical_fold(line):
+    """Replie une ligne iCalendar à 75 octets (RFC 5545, 3.1)"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Ne pas couper au milieu d'un caractère UTF-8
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode('utf-8'))
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+
+def ical_stamp(timestamp):
+    """Horodatage ISO du scraper -> format UTC iCalendar"""
+    value = datetime.fromisoformat(timestamp.rstrip('Z').split('+')[0])
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_event(match, dtstamp):
+    summary = f"{match['home_team']} - {match['away_team']}"
+    if match.get("status") == "completed" and match.get("home_sets") is not None:
+        summary += f" ({match['home_sets']}-{match['away_sets']})"
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{match['match_id']}@volley-cysoing",
+        f"DTSTAMP:{dtstamp}",
+    ]
+    start = None
+    clock = re.match(r"(\d{1,2})\s*[:hH]\s*(\d{2})", match.get("time") or "")
+    if clock:
+        start = datetime.strptime(match["date"], "%Y-%m-%d").replace(
+            hour=int(clock.group(1)), minute=int(clock.group(2))
+        )
+    if start is not None:
+        lines.append(f"DTSTART;TZID={TIMEZONE}:{start.strftime('%Y%m%dT%H%M%S')}")
+        lines.append(f"DTEND;TZID={TIMEZONE}:{(start + MATCH_DURATION).strftime('%Y%m%dT%H%M%S')}")
+    else:
+        # Horaire inconnu : événement sur la journée entière
+        day = datetime.strptime(match["date"], "%Y-%m-%d")
+        lines.append(f"DTSTART;VALUE=DATE:{day.strftime('%Y%m%d')}")
+        lines.append(f"DTEND;VALUE=DATE:{(day + timedelta(days=1)).strftime('%Y%m%d')}")
+    lines.append(f"SUMMARY:{ical_escape(summary)}")
+    if match.get("venue"):
+        lines.append(f"LOCATION:{ical_escape(match['venue'])}")
+    lines.append(f"DESCRIPTION:{ical_escape('Match ' + match['match_id'])}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def render_ical(title, matches, updated_at):
+    """Calendrier iCalendar d'un flux (matchs sans date exclus)"""
+    dtstamp = ical_stamp(updated_at)
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//volley-cysoing//feeds//FR",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{ical_escape(title)}",
+        f"X-WR-TIMEZONE:{TIMEZONE}",
+        *VTIMEZONE,
+    ]
+    for match in matches:
+        if match.get("date"):
+            lines.extend(render_event(match, dtstamp))
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(ical_fold(line) for line in lines) + "\r\n"
+
+
+def render_json(key, title, matches, updated_at):
+    return json.dumps({
+        "feed": key,
+        "title": title,
+        "updated_at": updated_at,
+        "matches": [feed_fields(m) for m in matches]
+    }, ensure_ascii=False, indent=2) + "\n"
+
+
+def etag_for(data):
+    return '"' + hashlib.sha256(data.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+class FeedGenerator:
+    """Flux calendrier par équipe et par poule (iCalendar + JSON), incrémentaux
+
+    Le manifeste (`feeds/manifest.json`) garde l'empreinte de chaque match et,
+    pour chaque flux, la liste des matchs qu'il contient : c'est la carte de
+    dépendances match -> flux. À chaque run, seuls les flux contenant un match
+    ajouté, modifié, déplacé ou supprimé sont réécrits (atomiquement) ; les
+    autres gardent leurs octets et donc leur ETag. Un manifeste d'une autre
+    version (`FEED_VERSION`) fait tout réécrire.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, out_dir=None, logger=print):
+        self.data_dir = Path(data_dir)
+        self.out_dir = Path(out_dir) if out_dir else self.data_dir / "feeds"
+        self.manifest_path = self.out_dir / "manifest.json"
+        self.log = logger
+        self.manifest = load_json(str(self.manifest_path)) or {"matches": {}, "feeds": {}}
+
+    def load_matches(self):
+        return list(iter_records(snapshot_path(self.data_dir, "matches.json")))
+
+    def build_feeds(self, matches):
+        """Regroupe les matchs par flux : clé -> (titre, matchs triés)"""
+        feeds = {}
+        for match in matches:
+            titles = {team_feed_key(match, side): match.get(f"{side}_team") for side in ("home", "away")}
+            for key in feed_keys(match):
+                if key not in feeds:
+                    title = titles.get(key) or f"Poule {pool_of(match['match_id'])}"
+                    feeds[key] = (title, [])
+                feeds[key][1].append(match)
+        for _, feed_matches in feeds.values():
+            feed_matches.sort(key=match_sort_key)
+        return feeds
+
+    def dirty_feeds(self, matches, feeds):
+        """Flux à réécrire d'après les empreintes du run précédent"""
+        if self.manifest.get("version") != FEED_VERSION:
+            return set(feeds)
+        old_prints = self.manifest["matches"]
+        old_feeds = self.manifest["feeds"]
+
+        # Carte inverse du run précédent : un match retiré ou déplacé salit aussi ses anciens flux
+        previous_keys = {}
+        for key, entry in old_feeds.items():
+            for match_id in entry["matches"]:
+                previous_keys.setdefault(match_id, set()).add(key)
+
+        dirty = set()
+        seen = set()
+        for match in matches:
+            match_id = match["match_id"]
+            seen.add(match_id)
+            if old_prints.get(match_id) != feed_fingerprint(match):
+                dirty.update(feed_keys(match))
+                dirty.update(previous_keys.get(match_id, ()))
+        for match_id in set(old_prints) - seen:
+            dirty.update(previous_keys.get(match_id, ()))
+
+        # Flux nouveaux ou dont les fichiers ont disparu
+        for key in feeds:
+            if key not in old_feeds or not (self.out_dir / f"{key}.ics").exists():
+                dirty.add(key)
+        return dirty & set(feeds)
+
+    def write_feed(self, key, title, matches, updated_at):
+        ical = render_ical(title, matches, updated_at)
+        data = render_json(key, title, matches, updated_at)
+        base = self.out_dir / key
+        base.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(base.with_suffix(".ics"), ical)
+        write_atomic(base.with_suffix(".json"), data)
+        return {
+            "title": title,
+            "updated_at": updated_at,
+            "matches": [m["match_id"] for m in matches],
+            "etags": {"ics": etag_for(ical), "json": etag_for(data)}
+        }
+
+    def run(self, matches=None):
+        """Met à jour les flux ; renvoie les clés des flux réécrits"""
+        matches = [as_dict(m) for m in (matches if matches is not None else self.load_matches())]
+        feeds = self.build_feeds(matches)
+        dirty = self.dirty_feeds(matches, feeds)
+        updated_at = get_timestamp()
+
+        entries = dict(self.manifest["feeds"])
+        for key in sorted(dirty):
+            title, feed_matches = feeds[key]
+            entries[key] = self.write_feed(key, title, feed_matches, updated_at)
+
+        # Flux qui n'ont plus aucun match (équipe renommée, poule retirée)
+        for key in set(entries) - set(feeds):
+            for suffix in (".ics", ".json"):
+                path = self.out_dir / f"{key}{suffix}"
+                if path.exists():
+                    path.unlink()
+            del entries[key]
+
+        self.manifest = {
+            "version": FEED_VERSION,
+            "matches": {m["match_id"]: feed_fingerprint(m) for m in matches},
+            "feeds": entries
+        }
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.manifest_path, json.dumps(self.manifest, ensure_ascii=False, indent=2, sort_keys=True))
+        self.log(f"Flux calendrier: {len(dirty)} réécrits sur {len(feeds)}")
+        return sorted(dirty)
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Sert les flux avec leur ETag (304 si If-None-Match correspond)"""
+
+    CONTENT_TYPES = {".ics": "text/calendar; charset=utf-8", ".json": "application/json; charset=utf-8"}
+
+    def do_GET(self):
+        out_dir = self.server.out_dir
+        path = self.path.split('?')[0].lstrip("/")
+        key, suffix = path.rsplit(".", 1) if "." in path else (path, "")
+        suffix = "." + suffix
+        manifest = load_json(str(out_dir / "manifest.json")) or {"feeds": {}}
+        entry = manifest["feeds"].get(key)
+        if entry is None or suffix not in self.CONTENT_TYPES:
+            self.send_error(404)
+            return
+
+        etag = entry["etags"][suffix[1:]]
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        body = (out_dir / f"{key}{suffix}").read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", self.CONTENT_TYPES[suffix])
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "public, max-age=300")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flux calendrier (iCal/JSON) par équipe et par poule")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--out-dir", default=None, help="Dossier des flux (défaut: <data-dir>/feeds)")
+    parser.add_argument("--serve", action="store_true", help="Servir ensuite les flux en HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    generator = FeedGenerator(args.data_dir, args.out_dir)
+    generator.run()
+
+    if args.serve:
+        server = ThreadingHTTPServer((args.host, args.port), FeedHandler)
+        server.out_dir = generator.out_dir
+        print(f"Flux servis sur http://{args.host}:{args.port}/teams/<uuid ou equipe>.ics")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
 # scripts/final_sync.py
-import json
 import os
+import argparse
+from itertools import islice
 from pathlib import Path
 
+from records import as_dict
+from utils import generate_matchday_uuid, iter_records, snapshot_path, DATA_DIR
+from feeds import pool_of
+from sync_checkpoint import SyncCheckpoint, snapshot_hash
+
+# Colonnes apportées par une migration (sql/match_team_ids.sql) : envoyées
+# seulement si la table cible les possède, pour que la synchro fonctionne
+# avant comme après la migration
+OPTIONAL_COLUMNS = {"matches": ("home_team_id", "away_team_id")}
+MIGRATION_HINT = "appliquez scripts/sql/match_team_ids.sql pour les synchroniser"
+
 def load_env():
     """Charge les variables d'environnement depuis le fichier .env du backoffice"""
-    env_path = Path("../backoffice/.env")
+    env_path = Path(__file__).resolve().parent.parent / "backoffice" / ".env"
     if env_path.exists():
         with open(env_path, 'r') as f:
             for line in f:
@@ -16,117 +28,317 @@ def load_env():
     else:
         print("Fichier .env non trouve")
 
-def main():
-    print("=== SYMCHRONISATION FINALE SUPABASE ===")
-    
-    # Charger les variables d'environnement
-    load_env()
-    
-    from supabase import create_client
-    
+def adapt_matchday(matchday):
+    """Adapte une journée (dict ou Matchday) à la structure de la table matchdays
+
+    L'identifiant est dérivé de la poule et du numéro de journée : toutes les
+    poules ont une "Journée 01", la fusion ne peut pas se faire sur le nom.
+    """
+    matchday = as_dict(matchday)
+    day_number = matchday["name"].split(" ")[1]  # Extraire "01" de "Journée 01"
+    # Snapshots antérieurs sans champ "pool" : préfixe des identifiants de match
+    pool = matchday.get("pool") or pool_of(next(iter(matchday["match_ids"]), None))
+    return {
+        "id": generate_matchday_uuid(pool, day_number),
+        "name": matchday["name"],  # Garder le nom complet
+        "day_number": day_number,
+        "date_text": matchday["date"],  # Ajouter date_text pour le trigger
+        "match_date": matchday["date"],
+        "match_ids": matchday["match_ids"]
+    }
+
+def adapt_match(match):
+    """Adapte un match (dict ou Match) à la structure de la table matches"""
+    match = as_dict(match)
+    return {
+        "match_id": match["match_id"],
+        
+        "date": match["date"],
+        "time": match.get("time", "00:00"),
+        "home_team": match["home_team"],
+        "away_team": match["away_team"],
+        "home_team_id": match.get("home_team_id"),
+        "away_team_id": match.get("away_team_id"),
+        "venue": match.get("venue", ""),
+        "score_detail": match["score_detail"],
+        "home_sets": match["home_sets"],
+        "away_sets": match["away_sets"],
+        "winner": match["winner"],
+        "sets": match["sets"],
+        "status": match.get("status", "upcoming"),
+        "created_at": match["created_at"]
+    }
+
+def adapt_standing(standing):
+    """Adapte un classement (dict ou Standing) à la structure de la table standings"""
+    standing = as_dict(standing)
+    return {
+        "id": standing["id"],  # Ajouter l'UUID déterministe
+        "team_name": standing["team_name"],
+        "rank": standing["rank"],
+        "points": standing["points"],
+        "played": standing["played"],
+        "wins": standing["wins"],
+        "losses": standing["losses"],
+        "sets_won": standing["sets_won"],
+        "sets_lost": standing["sets_lost"],
+        "points_for": standing["points_for"],
+        "points_against": standing["points_against"],
+        "ratio": standing["ratio"]
+    }
+
+class RestBackend:
+    """Backend par défaut : client supabase-py (PostgREST, JSON sur HTTPS)"""
+
+    name = "rest"
+
+    def __init__(self, supabase_url, supabase_key):
+        from supabase import create_client
+        self.client = create_client(supabase_url, supabase_key)
+        self._missing_columns = {}
+
+    def missing_columns(self, table):
+        """Colonnes optionnelles absentes de la table distante (détectées une fois)"""
+        if table not in self._missing_columns:
+            from postgrest.exceptions import APIError
+            missing = []
+            for column in OPTIONAL_COLUMNS.get(table, ()):
+                try:
+                    self.client.table(table).select(column).limit(1).execute()
+                except APIError as e:
+                    # 42703 : colonne inconnue de PostgreSQL ; autres erreurs relevées
+                    if e.code not in ("42703", "PGRST204"):
+                        raise
+                    missing.append(column)
+            if missing:
+                print(f"{table}: colonnes {', '.join(missing)} absentes, non envoyées ({MIGRATION_HINT})")
+            self._missing_columns[table] = missing
+        return self._missing_columns[table]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def upsert(self, table, rows, on_conflict=None):
+        """Upsert des lignes, renvoie le nombre de lignes écrites"""
+        rows = list(rows)
+        if not rows:
+            return 0
+        missing = self.missing_columns(table)
+        if missing:
+            rows = [{k: v for k, v in row.items() if k not in missing} for row in rows]
+        query = self.client.table(table)
+        if on_conflict:
+            result = query.upsert(rows, on_conflict=on_conflict).execute()
+        else:
+            result = query.upsert(rows).execute()
+        return len(result.data)
+
+    def delete_missing(self, table, key, keep, batch_size=100, page_size=1000):
+        """Supprime les lignes dont la clé n'est pas dans `keep`
+
+        Les clés existantes sont lues page par page (PostgREST plafonne chaque
+        réponse à `max_rows` lignes, 1000 par défaut sur Supabase) jusqu'à une
+        page vide, puis les lignes obsolètes sont supprimées par lots : un
+        filtre `not.in` sur toutes les clés à garder produirait des URL trop
+        longues sur les gros volumes. Refusé si `keep` est vide : un snapshot
+        vide viderait toute la table.
+        """
+        keep = set(map(str, keep))
+        if not keep:
+            raise ValueError(f"{table}: aucune clé à conserver, suppression miroir refusée")
+        stale = []
+        start = 0
+        while True:
+            page = (self.client.table(table).select(key).order(key)
+                    .range(start, start + page_size - 1).execute().data)
+            if not page:
+                break
+            stale.extend(row[key] for row in page if str(row[key]) not in keep)
+            start += len(page)
+        for start in range(0, len(stale), batch_size):
+            self.client.table(table).delete().in_(key, stale[start:start + batch_size]).execute()
+        return len(stale)
+
+    def replace(self, table, rows):
+        """Remplace tout le contenu de la table par les lignes données"""
+        # Supprimer d'abord les anciennes lignes pour éviter les doublons
+        self.client.table(table).delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
+        result = self.client.table(table).insert(list(rows)).execute()
+        return len(result.data)
+
+def create_backend(backend, dsn=None):
+    """Instancie le backend de synchronisation demandé"""
+    if backend == "postgres":
+        from pg_sync import PostgresBackend
+        dsn = dsn or os.getenv('SUPABASE_DB_URL')
+        if not dsn:
+            raise ValueError("DSN PostgreSQL manquant (--dsn ou SUPABASE_DB_URL)")
+        return PostgresBackend(dsn)
+
     # Configuration Supabase
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    return RestBackend(supabase_url, supabase_key)
+
+# Tables synchronisées : (table, fichier, adaptateur, clé de conflit, clé de filigrane, miroir)
+# Une table "miroir" voit ses lignes absentes du snapshot supprimées après l'upsert.
+SYNC_TABLES = [
+    ("matchdays", "matchdays.json", adapt_matchday, "id", "id", False),
+    ("matches", "matches.json", adapt_match, "match_id", "match_id", False),
+    ("standings", "standings.json", adapt_standing, "id", "id", True),
+]
+
+def chunked(rows, size):
+    """Découpe un itérable en listes de `size` lignes (un seul lot si size est None)"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size)) if size else list(rows)
+        if not chunk:
+            return
+        yield chunk
+        if not size:
+            return
+
+def sync_table(backend, table, rows, on_conflict=None, watermark_key=None,
+               mirror=False, chunk_size=None, checkpoint=None):
+    """Synchronise une table par lots en acquittant chaque lot dans le journal
+
+    `rows` peut être un générateur : les lignes sont consommées lot par lot,
+    la mémoire est bornée par `chunk_size` (seules les clés sont conservées
+    pour les tables miroir). Sans `chunk_size` ni journal, le flux entier est
+    confié au backend en un seul appel.
+    """
+    if checkpoint and checkpoint.is_done(table):
+        print(f"{table}: déjà synchronisée pour ce snapshot")
+        return 0
     
-    # Créer le client Supabase
-    supabase = create_client(supabase_url, supabase_key)
-    
-    # Charger les données
-    data_dir = Path("../data")
-    
-    # Charger et adapter les matchdays
-    with open(data_dir / "matchdays.json", 'r', encoding='utf-8') as f:
-        matchdays = json.load(f)
+    keys = []
+    def tracked(rows):
+        for row in rows:
+            if mirror:
+                keys.append(row[on_conflict])
+            yield row
+    rows = tracked(rows)
     
-    # Adapter les matchdays pour la structure existante
-    adapted_matchdays = []
-    for matchday in matchdays:
-        adapted_matchday = {
-            "name": matchday["name"],  # Garder le nom complet
-            "day_number": matchday["name"].split(" ")[1],  # Extraire "01" de "Journée 01"
-            "date_text": matchday["date"],  # Ajouter date_text pour le trigger
-            "match_date": matchday["date"],
-            "match_ids": matchday["match_ids"]
-        }
-        adapted_matchdays.append(adapted_matchday)
+    offset = checkpoint.offset(table) if checkpoint else 0
+    if offset:
+        # Les lignes déjà acquittées sont lues (pour leurs clés) mais pas renvoyées
+        for _ in islice(rows, offset):
+            pass
+        print(f"{table}: reprise à la ligne {offset}")
     
-    print(f"Matchdays adaptes: {len(adapted_matchdays)}")
+    if not chunk_size and not checkpoint:
+        # Un seul appel : le backend consomme le flux (COPY vers le staging
+        # puis une seule fusion ensembliste) sans découper la table
+        written = backend.upsert(table, rows, on_conflict=on_conflict)
+        if mirror:
+            backend.delete_missing(table, on_conflict, keys)
+        return written
     
-    # Synchroniser les matchdays
-    result = supabase.table('matchdays').upsert(adapted_matchdays).execute()
-    print(f"Matchdays synchronises: {len(result.data)}")
+    written = 0
+    for chunk in chunked(rows, chunk_size):
+        written += backend.upsert(table, chunk, on_conflict=on_conflict)
+        offset += len(chunk)
+        if checkpoint:
+            watermark = chunk[-1].get(watermark_key) if watermark_key else None
+            checkpoint.ack(table, offset, watermark=watermark)
     
-    # Charger et adapter les matches
-    with open(data_dir / "matches.json", 'r', encoding='utf-8') as f:
-        matches = json.load(f)
+    if mirror:
+        # Supprimer les lignes qui ne sont plus dans le snapshot, une fois
+        # les nouvelles écrites : la table n'est jamais vide entre les deux
+        backend.delete_missing(table, on_conflict, keys)
     
-    # Adapter les matches pour la structure existante
-    adapted_matches = []
-    for match in matches:
-        adapted_match = {
-            "match_id": match["match_id"],
-            
-            "date": match["date"],
-            "time": match.get("time", "00:00"),
-            "home_team": match["home_team"],
-            "away_team": match["away_team"],
-            "venue": match.get("venue", ""),
-            "score_detail": match["score_detail"],
-            "home_sets": match["home_sets"],
-            "away_sets": match["away_sets"],
-            "winner": match["winner"],
-            "sets": match["sets"],
-            "status": match.get("status", "upcoming"),
-            "created_at": match["created_at"]
-        }
-        adapted_matches.append(adapted_match)
+    if checkpoint:
+        checkpoint.complete_table(table)
+    return written
+
+def sync_snapshot(backend, data_dir, chunk_size=None, checkpoint=None, tables=None):
+    """Synchronise matchdays, matches et standings depuis les fichiers du snapshot
+
+    Les fichiers sont lus en flux et adaptés à la volée : la mémoire reste
+    bornée par la taille d'un lot, pas par celle du snapshot.
+    """
+    data_dir = Path(data_dir)
+    summary = {}
     
-    print(f"Matches adaptes: {len(adapted_matches)}")
+    # Un backend transactionnel applique tout ou rien : pas de reprise
+    # partielle, et chaque table est chargée puis fusionnée en une fois
+    if getattr(backend, "transactional", False):
+        checkpoint = None
+        chunk_size = None
+    if checkpoint:
+        checkpoint.begin(snapshot_hash(data_dir))
     
-    # Synchroniser les matches
-    result = supabase.table('matches').upsert(adapted_matches, on_conflict='match_id').execute()
-    print(f"Matches synchronises: {len(result.data)}")
+    for table, filename, adapt, on_conflict, watermark_key, mirror in SYNC_TABLES:
+        if tables and table not in tables:
+            continue
+        
+        # Lire et adapter les données pour la structure existante, en flux
+        path = snapshot_path(data_dir, filename)
+        adapted = (adapt(record) for record in iter_records(path))
+        
+        count = sync_table(
+            backend, table, adapted,
+            on_conflict=on_conflict,
+            watermark_key=watermark_key,
+            mirror=mirror,
+            chunk_size=chunk_size,
+            checkpoint=checkpoint
+        )
+        print(f"{table} synchronises: {count}")
+        summary[table] = checkpoint.offset(table) if checkpoint else count
     
-    # Synchroniser les standings (classements)
-    with open(data_dir / "standings.json", 'r', encoding='utf-8') as f:
-        standings = json.load(f)
+    if checkpoint:
+        checkpoint.finish()
+    return summary
+
+def parse_args(argv=None):
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Synchronisation des données vers Supabase")
+    parser.add_argument("--backend", choices=["rest", "postgres"], default="rest",
+                        help="rest: API supabase (défaut) ; postgres: COPY direct via DSN")
+    parser.add_argument("--dsn", default=None,
+                        help="DSN PostgreSQL pour --backend postgres (défaut: SUPABASE_DB_URL)")
+    parser.add_argument("--data-dir", default=str(DATA_DIR),
+                        help="Dossier du snapshot (défaut: data/ à la racine du projet)")
+    parser.add_argument("--chunk-size", type=int, default=500,
+                        help="Nombre de lignes par requête d'écriture (backend rest)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignorer le journal de reprise et tout renvoyer")
+    parser.add_argument("--tables", default=None,
+                        help="Tables à synchroniser, séparées par des virgules (défaut: toutes)")
+    return parser.parse_args(argv)
+
+def main():
+    print("=== SYMCHRONISATION FINALE SUPABASE ===")
+    args = parse_args()
     
-    # Adapter les standings pour la structure existante
-    adapted_standings = []
-    for standing in standings:
-        adapted_standing = {
-            "id": standing["id"],  # Ajouter l'UUID déterministe
-            "team_name": standing["team_name"],
-            "rank": standing["rank"],
-            "points": standing["points"],
-            "played": standing["played"],
-            "wins": standing["wins"],
-            "losses": standing["losses"],
-            "sets_won": standing["sets_won"],
-            "sets_lost": standing["sets_lost"],
-            "points_for": standing["points_for"],
-            "points_against": standing["points_against"],
-            "ratio": standing["ratio"]
-        }
-        adapted_standings.append(adapted_standing)
+    # Charger les variables d'environnement
+    load_env()
     
-    print(f"Standings adaptes: {len(adapted_standings)}")
+    # Créer le backend (client Supabase par défaut)
+    backend = create_backend(args.backend, args.dsn)
     
-    # Supprimer d'abord les anciens standings pour éviter les doublons
-    print("Suppression des anciens classements...")
-    supabase.table('standings').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
+    # Journal de reprise (ignoré par le backend postgres, transactionnel)
+    checkpoint = None
+    if not args.no_resume:
+        checkpoint = SyncCheckpoint(Path(args.data_dir) / ".sync_checkpoint.json")
     
-    # Insérer les nouveaux standings
-    result = supabase.table('standings').insert(adapted_standings).execute()
-    print(f"Standings synchronises: {len(result.data)}")
+    # Charger et synchroniser les données
+    with backend:
+        tables = args.tables.split(",") if args.tables else None
+        summary = sync_snapshot(backend, args.data_dir, args.chunk_size, checkpoint, tables=tables)
     
     print("Synchronisation terminee avec succes!")
     
     # Afficher un résumé
     print("\nRESUME:")
-    print(f"- Journées: {len(adapted_matchdays)}")
-    print(f"- Matchs: {len(adapted_matches)}")
-    print(f"- Classements: {len(adapted_standings)}")
+    print(f"- Journées: {summary.get('matchdays', 0)}")
+    print(f"- Matchs: {summary.get('matches', 0)}")
+    print(f"- Classements: {summary.get('standings', 0)}")
     print("\nStructure des journées:")
     print(f"- day_number: ex: '01'")
     print(f"- date_text: ex: 'Journée 01'")
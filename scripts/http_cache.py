@@ -0,0 +1,220 @@
+# scripts/http_cache.py
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Import des utilitaires
+from utils import load_json, write_atomic
+
+# Durées de vie par défaut (secondes) selon l'URL : le calendrier change à
+# chaque journée, les feuilles de match d'un match terminé ne changent plus.
+DEFAULT_TTL_RULES = [
+    (r"vbspo_calendrier\.php", 10 * 60),
+    (r"(fdm|feuille|fmp)", 30 * 24 * 3600),
+]
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# Nombre de réponses stockées entre deux écritures de index.json
+DEFAULT_SAVE_EVERY = 50
+
+# En-têtes qui ne décrivent plus le corps une fois celui-ci décompressé
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Levée en mode hors-ligne quand une URL n'est pas dans le cache"""
+
+
+class ResponseCache:
+    """Cache disque de réponses HTTP compressées avec éviction LRU
+
+    Chaque corps est stocké gzip sous `<sha256(url)>.gz` ; `index.json`
+    conserve le statut, les en-têtes, la date de stockage, la taille sur
+    disque et la date du dernier accès, utilisée pour l'éviction quand la
+    taille totale dépasse `max_bytes`.
+
+    L'index n'est réécrit que toutes les `save_every` réponses stockées et
+    à la fermeture de la session (`save_index`) : un arrêt brutal perd au
+    plus ces dernières entrées, dont les corps seront simplement re-téléchargés.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, save_every=DEFAULT_SAVE_EVERY):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.index = load_json(str(self.index_path)) or {}
+        self.max_bytes = max_bytes
+        self.save_every = save_every
+        self.pending = 0  # Réponses stockées depuis la dernière écriture de l'index
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def body_path(self, key):
+        return self.cache_dir / f"{key}.gz"
+
+    def get(self, url, ttl=None):
+        """Renvoie (entrée, corps) si l'URL est en cache et encore valide, sinon None
+
+        `ttl=None` ignore l'expiration (mode hors-ligne).
+        """
+        key = self.key(url)
+        with self._lock:
+            entry = self.index.get(key)
+        if entry is None:
+            return None
+        if ttl is not None and time.time() - entry["stored_at"] > ttl:
+            return None
+
+        path = self.body_path(key)
+        try:
+            body = gzip.decompress(path.read_bytes())
+        except (OSError, EOFError):
+            with self._lock:
+                self.index.pop(key, None)
+            return None
+
+        with self._lock:
+            entry["last_access"] = time.time()
+        return entry, body
+
+    def put(self, url, response):
+        """Stocke une réponse (corps compressé), applique l'éviction et écrit
+        l'index toutes les `save_every` réponses"""
+        self.store(url, response.content, status=response.status_code, reason=response.reason,
+                   headers=response.headers, encoding=response.encoding)
+        self.evict()
+        with self._lock:
+            self.pending += 1
+            due = self.pending >= self.save_every
+        if due:
+            self.save_index()
+
+    def store(self, url, body, status=200, reason="OK", headers=None, encoding=None):
+        """Stocke un corps sans éviction ni écriture de l'index (remplissage en masse)"""
+        key = self.key(url)
+        compressed = gzip.compress(body)
+        write_atomic(self.body_path(key), compressed)
+
+        now = time.time()
+        headers = {
+            name: value for name, value in (headers or {}).items()
+            if name.lower() not in DROPPED_HEADERS
+        }
+        with self._lock:
+            self.index[key] = {
+                "url": url,
+                "status": status,
+                "reason": reason,
+                "encoding": encoding,
+                "headers": headers,
+                "stored_at": now,
+                "last_access": now,
+                "size": len(compressed)
+            }
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        with self._lock:
+            total = sum(entry["size"] for entry in self.index.values())
+            if total <= self.max_bytes:
+                return
+            by_age = sorted(self.index.items(), key=lambda item: item[1]["last_access"])
+            for key, entry in by_age:
+                if total <= self.max_bytes:
+                    break
+                self.index.pop(key)
+                total -= entry["size"]
+                path = self.body_path(key)
+                if path.exists():
+                    path.unlink()
+
+    def save_index(self):
+        with self._lock:
+            payload = json.dumps(self.index, indent=2)
+            self.pending = 0
+        write_atomic(self.index_path, payload)
+
+
+class CachedSession(requests.Session):
+    """Session requests avec cache disque transparent pour les GET
+
+    En mode normal, une réponse en cache est servie tant que sa durée de vie
+    (règles `ttl_rules` sur l'URL, sinon `default_ttl`) n'est pas dépassée ;
+    les réponses 200 sont mises en cache ; `get(url, refresh=True)` force
+    une vraie requête. En mode `offline`, seules les réponses en cache sont
+    servies, quel que soit leur âge, et une absence lève `OfflineCacheMiss`.
+    `close()` écrit l'index du cache.
+    """
+
+    def __init__(self, cache_dir, ttl_rules=None, default_ttl=DEFAULT_TTL,
+                 max_bytes=DEFAULT_MAX_BYTES, offline=False, save_every=DEFAULT_SAVE_EVERY):
+        super().__init__()
+        self.cache = ResponseCache(cache_dir, max_bytes=max_bytes, save_every=save_every)
+        self.ttl_rules = [
+            (re.compile(pattern), ttl)
+            for pattern, ttl in (DEFAULT_TTL_RULES if ttl_rules is None else ttl_rules)
+        ]
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def build_response(self, url, entry, body):
+        """Reconstruit un objet Response à partir d'une entrée du cache"""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason")
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.headers["X-Cache"] = "HIT"
+        response.encoding = entry.get("encoding")
+        response.url = url
+        response._content = body
+        return response
+
+    def request(self, method, url, *args, refresh=False, **kwargs):
+        """Requête avec cache ; `refresh=True` ignore l'entrée en cache (hors mode
+        hors-ligne) et la remplace par la réponse fraîche"""
+        if method.upper() != "GET":
+            if self.offline:
+                raise OfflineCacheMiss(f"Mode hors-ligne: {method} {url} impossible")
+            return super().request(method, url, *args, **kwargs)
+
+        # Clé de cache : URL complète, paramètres inclus
+        params = kwargs.get("params")
+        full_url = requests.Request(method, url, params=params).prepare().url
+
+        cached = None
+        if self.offline or not refresh:
+            cached = self.cache.get(full_url, ttl=None if self.offline else self.ttl_for(full_url))
+        if cached is not None:
+            self.hits += 1
+            return self.build_response(full_url, *cached)
+
+        if self.offline:
+            raise OfflineCacheMiss(f"Mode hors-ligne: {full_url} absent du cache")
+
+        self.misses += 1
+        response = super().request(method, url, *args, **kwargs)
+        if response.status_code == 200:
+            self.cache.put(full_url, response)
+        return response
+
+    def close(self):
+        self.cache.save_index()
+        super().close()
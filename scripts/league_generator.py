@@ -0,0 +1,466 @@
+# scripts/league_generator.py
+import argparse
+import json
+import math
+import random
+import sys
+from datetime import date, timedelta
+from html import escape
+from pathlib import Path
+
+import requests
+
+# Import des utilitaires
+from utils import generate_team_uuid, iter_records, snapshot_path, write_atomic, DATA_DIR
+from parsing import extract_date_from_day_name
+from http_cache import ResponseCache
+from rules import match_points, ranking_key
+from scraper import calendar_url
+
+# Villes utilisées pour nommer les équipes synthétiques (latin-1 uniquement)
+TOWNS = [
+    "CYSOING", "LILLE", "VILLENEUVE D'ASCQ", "ROUBAIX", "TOURCOING", "LENS", "DOUAI",
+    "CAMBRAI", "VALENCIENNES", "ARRAS", "BÉTHUNE", "HÉNIN-BEAUMONT", "SECLIN",
+    "WASQUEHAL", "CROIX", "LAMBERSART", "ARMENTIÈRES", "HAZEBROUCK", "DUNKERQUE",
+    "CALAIS", "BOULOGNE", "SAINT-OMER", "MAUBEUGE", "DENAIN", "ANZIN", "ORCHIES",
+    "TEMPLEUVE", "HALLUIN", "COMINES", "LOOS", "FACHES-THUMESNIL", "WATTRELOS",
+    "HEM", "LYS-LEZ-LANNOY", "RONCQ", "BONDUES", "MOUVAUX", "GRANDE-SYNTHE",
+]
+KICKOFF_TIMES = ["18:00", "19:00", "20:00", "20:30"]
+PAGE_ENCODING = "iso-8859-1"
+MATCH_COLUMNS = ["N°", "Date", "Heure", "Domicile", "", "Extérieur", "Sets", "", "Score", "Salle", "FdM"]
+STANDING_COLUMNS = [
+    "", "Equipe", "Points", "Joués", "Gagnés", "Perdus",
+    "3-0", "3-1", "3-2", "2-3", "1-3", "0-3", "Forf.",
+    "Sets P.", "Sets C.", "Coeff. S.", "Pts P.", "Pts C.", "Coeff. P."
+]
+EXPECTED_FILES = ["matches.jsonl", "matchdays.jsonl", "standings.jsonl"]
+
+
+def pool_code(index):
+    """Code de poule synthétique : "P" + 3 lettres (PAAA, PAAB, ...)"""
+    letters = ""
+    for _ in range(3):
+        index, rest = divmod(index, 26)
+        letters = chr(ord('A') + rest) + letters
+    return "P" + letters
+
+
+def team_name(index):
+    town = TOWNS[index % len(TOWNS)]
+    return f"{town} {index // len(TOWNS) + 1}"
+
+
+def season_start(year):
+    """Premier samedi d'octobre de l'année de début de saison"""
+    first = date(year, 10, 1)
+    return first + timedelta(days=(5 - first.weekday()) % 7)
+
+
+def round_robin(teams):
+    """Calendrier aller-retour (méthode du cercle) : liste de journées [(dom, ext), ...]"""
+    teams = list(teams)
+    if len(teams) % 2:
+        teams.append(None)  # Exempt
+    n = len(teams)
+    first_leg = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if (i == 0 and r % 2) or (i > 0 and i % 2 == 0):
+                home, away = away, home
+            if home is not None and away is not None:
+                pairs.append((home, away))
+        first_leg.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    second_leg = [[(away, home) for home, away in pairs] for pairs in first_leg]
+    return first_leg + second_leg
+
+
+def play_set(rng, home_wins, target):
+    """Score d'un set gagné par l'équipe à domicile si `home_wins`"""
+    if rng.random() < 0.15:
+        loser = target - 1 + rng.randint(0, 4)  # Prolongation
+        winner = loser + 2
+    else:
+        winner = target
+        loser = rng.randint(target // 2, target - 2)
+    return (winner, loser) if home_wins else (loser, winner)
+
+
+def play_match(rng, home_strength, away_strength):
+    """Sets d'un match en 3 sets gagnants, selon la force des deux équipes"""
+    p_home = 1.0 / (1.0 + math.exp(-(home_strength - away_strength + 0.2)))
+    sets = []
+    won = [0, 0]
+    while max(won) < 3:
+        home_wins = rng.random() < p_home
+        sets.append(play_set(rng, home_wins, 15 if len(sets) == 4 else 25))
+        won[0 if home_wins else 1] += 1
+    return won[0], won[1], sets
+
+
+def cells(values, **attrs):
+    attributes = "".join(f' {name}="{value}"' for name, value in attrs.items())
+    row = "".join(f"<td>{value}</td>" for value in values)
+    return f"<tr{attributes}>{row}</tr>\n"
+
+
+class PoolBuilder:
+    """Une poule synthétique d'une saison : page calendrier HTML et JSON attendu
+
+    La page reprend la structure que `parsing.py` attend : tableau des
+    matchs en 4e position (index 3), tableaux `cellspacing='1'
+    cellpadding='2'`, lignes `#EEEEF8`, en-têtes de journée sur fond
+    `../images/bkrg.gif` et tableau de classement dont l'en-tête contient
+    "Points". Le JSON attendu est ce que le scraper doit en extraire, hors
+    champs générés au run (UUID aléatoires, horodatages).
+    """
+
+    def __init__(self, season_year, poule, teams, strengths, completion, seed):
+        self.season = f"{season_year}/{season_year + 1}"
+        self.poule = poule
+        self.teams = teams
+        self.strengths = strengths
+        self.rng = random.Random(f"{seed}:{self.season}:{poule}")
+        self.matchdays, self.matches = self.schedule(season_start(season_year), completion)
+        self.standings = self.compute_standings()
+
+    def schedule(self, start, completion):
+        rounds = round_robin(self.teams)
+        total = sum(len(pairs) for pairs in rounds)
+        completed_count = int(round(total * completion))
+
+        matchdays, matches = [], []
+        number = 0
+        for day_index, pairs in enumerate(rounds):
+            day = start + timedelta(days=7 * day_index)
+            name = f"Journée {day_index + 1:02d}"
+            matchday = {"name": name, "date": extract_date_from_day_name(name), "match_ids": [],
+                        "pool": self.poule}
+            for home, away in pairs:
+                number += 1
+                match = {
+                    "match_id": f"{self.poule}{number:03d}",
+                    "date": day.isoformat(),
+                    "time": self.rng.choice(KICKOFF_TIMES),
+                    "home_team": home,
+                    "away_team": away,
+                    "venue": f"SALLE {home.rsplit(' ', 1)[0]}",
+                    "home_sets": None,
+                    "away_sets": None,
+                    "score_detail": "",
+                    "sets": [],
+                    "winner": None,
+                    "status": "upcoming",
+                    "detail_url": None
+                }
+                if number <= completed_count:
+                    home_sets, away_sets, sets = play_match(
+                        self.rng, self.strengths[home], self.strengths[away]
+                    )
+                    match.update({
+                        "home_sets": home_sets,
+                        "away_sets": away_sets,
+                        "score_detail": ", ".join(f"{h}:{a}" for h, a in sets),
+                        "sets": [{"home": h, "away": a} for h, a in sets],
+                        "winner": "home" if home_sets > away_sets else "away",
+                        "status": "completed",
+                        "detail_url": f"vbspo_fdm.php?saison={self.season}&codmatch={self.poule}{number:03d}"
+                    })
+                matchday["match_ids"].append(match["match_id"])
+                matches.append(match)
+            matchdays.append(matchday)
+        return matchdays, matches
+
+    def compute_standings(self):
+        stats = {
+            team: {"points": 0, "played": 0, "wins": 0, "losses": 0, "breakdown": [0] * 7,
+                   "sets_won": 0, "sets_lost": 0, "points_for": 0, "points_against": 0}
+            for team in self.teams
+        }
+        outcomes = {(3, 0): 0, (3, 1): 1, (3, 2): 2, (2, 3): 3, (1, 3): 4, (0, 3): 5}
+        for match in self.matches:
+            if match["status"] != "completed":
+                continue
+            home_points = sum(s["home"] for s in match["sets"])
+            away_points = sum(s["away"] for s in match["sets"])
+            for side, sets_for, sets_against, scored, conceded in (
+                ("home_team", match["home_sets"], match["away_sets"], home_points, away_points),
+                ("away_team", match["away_sets"], match["home_sets"], away_points, home_points),
+            ):
+                entry = stats[match[side]]
+                entry["played"] += 1
+                entry["wins" if sets_for == 3 else "losses"] += 1
+                entry["points"] += match_points(sets_for, sets_against)
+                entry["breakdown"][outcomes[(sets_for, sets_against)]] += 1
+                entry["sets_won"] += sets_for
+                entry["sets_lost"] += sets_against
+                entry["points_for"] += scored
+                entry["points_against"] += conceded
+
+        def order(team):
+            entry = stats[team]
+            return ranking_key(entry["points"], entry["wins"], entry["sets_won"], entry["sets_lost"],
+                               entry["points_for"], entry["points_against"]) + (team,)
+
+        standings = []
+        for rank, team in enumerate(sorted(self.teams, key=order), start=1):
+            entry = stats[team]
+            ratio = f"{entry['points_for'] / entry['points_against']:.3f}" if entry["points_against"] else "0"
+            standings.append({
+                "id": generate_team_uuid(team),
+                "team_name": team,
+                "rank": rank,
+                "points": entry["points"],
+                "played": entry["played"],
+                "wins": entry["wins"],
+                "losses": entry["losses"],
+                "breakdown": entry["breakdown"],
+                "sets_won": entry["sets_won"],
+                "sets_lost": entry["sets_lost"],
+                "points_for": entry["points_for"],
+                "points_against": entry["points_against"],
+                "ratio": float(ratio),
+                "ratio_text": ratio
+            })
+        return standings
+
+    # --- Rendu HTML -------------------------------------------------------
+
+    def standing_row(self, s):
+        if s["sets_lost"]:
+            set_ratio = f"{s['sets_won'] / s['sets_lost']:.3f}"
+        else:
+            set_ratio = "MAX" if s["sets_won"] else "0"
+        values = [f"{s['rank']}.", escape(s["team_name"]), s["points"], s["played"], s["wins"],
+                  s["losses"], *s["breakdown"], s["sets_won"], s["sets_lost"], set_ratio,
+                  s["points_for"], s["points_against"], s["ratio_text"]]
+        return cells(values, bgcolor="#EEEEF8")
+
+    def match_row(self, m):
+        day = date.fromisoformat(m["date"]).strftime("%d/%m/%y")
+        detail = f'<a href="{escape(m["detail_url"])}">FdM</a>' if m["detail_url"] else ""
+        values = [
+            m["match_id"], day, m["time"], escape(m["home_team"]), "", escape(m["away_team"]),
+            "" if m["home_sets"] is None else m["home_sets"],
+            "" if m["away_sets"] is None else m["away_sets"],
+            m["score_detail"], escape(m["venue"]), detail
+        ]
+        return cells(values, bgcolor="#EEEEF8")
+
+    def render(self):
+        """Page calendrier complète, encodée comme le site (ISO-8859-1)"""
+        parts = [
+            "<html><head>\n",
+            f'<meta http-equiv="Content-Type" content="text/html; charset={PAGE_ENCODING}">\n',
+            f"<title>Calendrier {self.poule}</title></head>\n<body>\n",
+            '<table width="100%"><tr><td>FFVB - Résultats et classements</td></tr></table>\n',
+            f"<table><tr><td>Saison {self.season} - Poule {self.poule}</td></tr></table>\n",
+            '<table cellspacing="1" cellpadding="2" width="100%">\n',
+            cells(STANDING_COLUMNS, bgcolor="#CCCCDD"),
+        ]
+        parts += [self.standing_row(s) for s in self.standings]
+        parts.append("</table>\n")
+
+        parts.append('<table cellspacing="1" cellpadding="2" width="100%">\n')
+        parts.append(cells([escape(c) for c in MATCH_COLUMNS], bgcolor="#CCCCDD"))
+        by_id = {m["match_id"]: m for m in self.matches}
+        for matchday in self.matchdays:
+            parts.append(
+                f'<tr><td colspan="{len(MATCH_COLUMNS)}" background="../images/bkrg.gif">'
+                f'<b>{escape(matchday["name"])}</b></td></tr>\n'
+            )
+            parts += [self.match_row(by_id[match_id]) for match_id in matchday["match_ids"]]
+        parts.append("</table>\n</body></html>\n")
+        return "".join(parts).encode(PAGE_ENCODING)
+
+    def expected(self):
+        """Enregistrements attendus (matchs, journées, classements)"""
+        standings = [
+            {k: v for k, v in s.items() if k not in ("breakdown", "ratio_text")}
+            for s in self.standings
+        ]
+        return self.matches, self.matchdays, standings
+
+
+class LeagueGenerator:
+    """Génère une ligue synthétique : pages calendrier + JSON attendu par saison
+
+        out/
+          manifest.json
+          <saison>/poules.txt            codes de poule (scraper.py --poules-file)
+          <saison>/html/<poule>.html     pages calendrier
+          <saison>/expected/*.jsonl      matchs, journées et classements attendus
+
+    Les pages peuvent aussi être injectées dans le cache HTTP du scraper
+    (`cache_dir`) pour un run `scraper.py --offline` complet. Seule la
+    dernière saison est partiellement jouée (`completion`), les précédentes
+    sont terminées. Les liens de feuille de match ne sont pas générés en
+    cache : ne pas utiliser --details hors-ligne.
+    """
+
+    def __init__(self, out_dir, pools=1, teams=6, seasons=1, completion=0.5,
+                 first_year=2025, codent="PTFL59", seed=0, cache_dir=None, write_html=True,
+                 logger=print):
+        self.out_dir = Path(out_dir)
+        self.pools = pools
+        self.teams = teams
+        self.seasons = seasons
+        self.completion = completion
+        self.first_year = first_year
+        self.codent = codent
+        self.seed = seed
+        self.cache = ResponseCache(cache_dir, max_bytes=sys.maxsize) if cache_dir else None
+        self.write_html = write_html
+        self.log = logger
+
+    def pool_teams(self, pool_index):
+        names = [team_name(pool_index * self.teams + i) for i in range(self.teams)]
+        rng = random.Random(f"{self.seed}:strength:{pool_index}")
+        return names, {name: rng.gauss(0.0, 1.0) for name in names}
+
+    def run(self):
+        totals = {"pages": 0, "matches": 0, "completed": 0, "bytes": 0}
+        seasons = []
+        for offset in range(self.seasons):
+            year = self.first_year - (self.seasons - 1 - offset)
+            completion = self.completion if offset == self.seasons - 1 else 1.0
+            season = f"{year}/{year + 1}"
+            season_dir = self.out_dir / season.replace("/", "-")
+            (season_dir / "expected").mkdir(parents=True, exist_ok=True)
+            if self.write_html:
+                (season_dir / "html").mkdir(parents=True, exist_ok=True)
+
+            outputs = {name: open(season_dir / "expected" / name, 'w', encoding='utf-8')
+                       for name in EXPECTED_FILES}
+            codes = []
+            try:
+                for pool_index in range(self.pools):
+                    code = pool_code(pool_index)
+                    names, strengths = self.pool_teams(pool_index)
+                    pool = PoolBuilder(year, code, names, strengths, completion, self.seed)
+                    page = pool.render()
+                    if self.write_html:
+                        (season_dir / "html" / f"{code}.html").write_bytes(page)
+                    if self.cache is not None:
+                        url = requests.Request('GET', calendar_url(season, self.codent, code)).prepare().url
+                        self.cache.store(url, page, headers={
+                            "Content-Type": f"text/html; charset={PAGE_ENCODING}"
+                        }, encoding=PAGE_ENCODING)
+
+                    for name, records in zip(EXPECTED_FILES, pool.expected()):
+                        for record in records:
+                            outputs[name].write(json.dumps(record, ensure_ascii=False) + "\n")
+                    codes.append(code)
+                    totals["pages"] += 1
+                    totals["matches"] += len(pool.matches)
+                    totals["completed"] += sum(1 for m in pool.matches if m["status"] == "completed")
+                    totals["bytes"] += len(page)
+            finally:
+                for f in outputs.values():
+                    f.close()
+
+            write_atomic(season_dir / "poules.txt", "\n".join(codes) + "\n")
+            seasons.append(season)
+            self.log(f"Saison {season}: {len(codes)} poules générées")
+
+        if self.cache is not None:
+            self.cache.save_index()
+
+        manifest = {
+            "seasons": seasons,
+            "codent": self.codent,
+            "pools": self.pools,
+            "teams_per_pool": self.teams,
+            "completion": self.completion,
+            "seed": self.seed,
+            **totals
+        }
+        write_atomic(self.out_dir / "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        self.log(f"{totals['matches']} matchs ({totals['completed']} terminés), "
+                 f"{totals['bytes'] / 1e6:.1f} Mo de HTML")
+        return manifest
+
+
+def compare_records(name, expected, actual, key):
+    """Compare deux listes d'enregistrements sur les champs attendus ; renvoie les écarts"""
+    errors = []
+    actual_by_key = {}
+    for record in actual:
+        actual_by_key.setdefault(key(record), []).append(record)
+    for record in expected:
+        candidates = actual_by_key.get(key(record))
+        if not candidates:
+            errors.append(f"{name}: {key(record)} absent")
+            continue
+        found = candidates.pop(0)
+        diff = [field for field, value in record.items() if found.get(field) != value]
+        if diff:
+            errors.append(f"{name}: {key(record)} diffère sur {', '.join(diff)}")
+    extra = sum(len(records) for records in actual_by_key.values())
+    if extra:
+        errors.append(f"{name}: {extra} enregistrement(s) en trop")
+    return errors
+
+
+def verify(expected_dir, data_dir):
+    """Compare le snapshot du scraper au JSON attendu d'une saison ; renvoie la liste des écarts"""
+    expected_dir = Path(expected_dir)
+
+    def load(directory, filename):
+        return list(iter_records(snapshot_path(directory, filename)))
+
+    errors = []
+    errors += compare_records("matches", load(expected_dir, "matches.json"),
+                              load(data_dir, "matches.json"), lambda r: r["match_id"])
+    errors += compare_records("matchdays", load(expected_dir, "matchdays.json"),
+                              load(data_dir, "matchdays.json"),
+                              lambda r: (r.get("pool"), r["name"], tuple(r["match_ids"])))
+    errors += compare_records("standings", load(expected_dir, "standings.json"),
+                              load(data_dir, "standings.json"), lambda r: r["team_name"])
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ligue synthétique (pages calendrier FFVB + JSON attendu)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="Générer les pages et le JSON attendu")
+    gen.add_argument("--out", default=str(DATA_DIR / "synthetic"))
+    gen.add_argument("--pools", type=int, default=10)
+    gen.add_argument("--teams", type=int, default=12, help="Équipes par poule")
+    gen.add_argument("--seasons", type=int, default=1)
+    gen.add_argument("--completion", type=float, default=0.5,
+                     help="Part des matchs joués dans la dernière saison (0 à 1)")
+    gen.add_argument("--first-year", type=int, default=2025, help="Année de début de la dernière saison")
+    gen.add_argument("--codent", default="PTFL59")
+    gen.add_argument("--seed", type=int, default=0)
+    gen.add_argument("--cache-dir", default=None,
+                     help="Cache HTTP à remplir pour scraper.py --offline (ex: data/http_cache)")
+    gen.add_argument("--no-html", action="store_true", help="Ne pas écrire les pages HTML sur disque")
+
+    check = sub.add_parser("verify", help="Comparer un snapshot scrapé au JSON attendu")
+    check.add_argument("expected_dir", help="Dossier <saison>/expected généré")
+    check.add_argument("--data-dir", default=str(DATA_DIR))
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        LeagueGenerator(
+            args.out, pools=args.pools, teams=args.teams, seasons=args.seasons,
+            completion=args.completion, first_year=args.first_year, codent=args.codent,
+            seed=args.seed, cache_dir=args.cache_dir, write_html=not args.no_html
+        ).run()
+    else:
+        errors = verify(args.expected_dir, args.data_dir)
+        for error in errors[:50]:
+            print(error)
+        if errors:
+            print(f"{len(errors)} écart(s)")
+            sys.exit(1)
+        print("Snapshot conforme au JSON attendu")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# scripts/match_frame.py
+import argparse
+import io
+import struct
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+# Import des utilitaires
+from utils import iter_records, snapshot_path, write_atomic, DATA_DIR
+from team_index import normalize_team_name
+from feeds import pool_of
+from rules import match_points_array, ranking_order
+
+
+def team_key(match, side):
+    """Identité d'une équipe de match : UUID résolu, sinon nom normalisé"""
+    return match.get(f"{side}_team_id") or normalize_team_name(match.get(f"{side}_team"))
+
+
+def set_points(score):
+    """(home, away) d'un set, qu'il soit stocké en dict ou en tuple"""
+    if isinstance(score, dict):
+        return score["home"], score["away"]
+    return score[0], score[1]
+
+
+def load_npz_mmap(path):
+    """Ouvre un .npz non compressé en mappant chaque tableau en mémoire
+
+    `np.load` ignore `mmap_mode` pour les archives .npz : chaque membre est
+    ici localisé dans le zip (en-tête local + en-tête .npy) puis ouvert avec
+    `np.memmap`, sans lire les données.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: membre compressé {info.filename}, mapping impossible")
+            # En-tête local : 30 octets fixes, puis nom et champ extra
+            f.seek(info.header_offset)
+            name_len, extra_len = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(),
+                                         shape=shape, order='F' if fortran_order else 'C')
+    return arrays
+
+
+class MatchFrame:
+    """Vue colonnaire (NumPy) des matchs et des scores de sets d'un snapshot
+
+    Une ligne par match : indices d'équipes (`home`, `away`, vers
+    `team_keys` / `team_names`), date, sets gagnés (-1 si inconnu). Les sets
+    de longueur variable sont aplatis dans `set_home` / `set_away` : ceux du
+    match i occupent `set_offsets[i]:set_offsets[i + 1]`.
+
+        frame = MatchFrame.from_snapshot(DATA_DIR)
+        frame.save(DATA_DIR / "matches_frame.npz")
+        frame = MatchFrame.load(DATA_DIR / "matches_frame.npz")  # mappé en mémoire
+        frame.team_aggregates()["wins"]
+    """
+
+    ARRAYS = (
+        "match_ids", "team_keys", "team_names", "home", "away", "dates", "completed",
+        "home_sets", "away_sets", "set_offsets", "set_home", "set_away"
+    )
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_matches(cls, matches):
+        codes = {}
+        team_names = []
+        home, away = [], []
+        match_ids, dates, completed = [], [], []
+        home_sets, away_sets = [], []
+        set_offsets = [0]
+        set_home, set_away = [], []
+
+        for match in matches:
+            for side, column in (("home", home), ("away", away)):
+                key = team_key(match, side)
+                if key not in codes:
+                    codes[key] = len(team_names)
+                    team_names.append(match.get(f"{side}_team") or key)
+                column.append(codes[key])
+
+            match_ids.append(match["match_id"])
+            dates.append(match.get("date") or "NaT")
+            played = match.get("status") == "completed" and match.get("home_sets") is not None
+            completed.append(played)
+            home_sets.append(match["home_sets"] if played else -1)
+            away_sets.append(match["away_sets"] if played else -1)
+
+            for score in match.get("sets") or ():
+                h, a = set_points(score)
+                set_home.append(h)
+                set_away.append(a)
+            set_offsets.append(len(set_home))
+
+        return cls(
+            match_ids=np.array(match_ids, dtype=str),
+            team_keys=np.array(list(codes), dtype=str),
+            team_names=np.array(team_names, dtype=str),
+            home=np.array(home, dtype=np.int32),
+            away=np.array(away, dtype=np.int32),
+            dates=np.array(dates, dtype='datetime64[D]'),
+            completed=np.array(completed, dtype=bool),
+            home_sets=np.array(home_sets, dtype=np.int8),
+            away_sets=np.array(away_sets, dtype=np.int8),
+            set_offsets=np.array(set_offsets, dtype=np.int64),
+            set_home=np.array(set_home, dtype=np.int16),
+            set_away=np.array(set_away, dtype=np.int16),
+        )
+
+    @classmethod
+    def from_snapshot(cls, data_dir=DATA_DIR):
+        return cls.from_matches(iter_records(snapshot_path(data_dir, "matches.json")))
+
+    def save(self, path):
+        """Enregistre le frame en .npz non compressé (donc mappable)"""
+        buffer = io.BytesIO()
+        np.savez(buffer, **{name: getattr(self, name) for name in self.ARRAYS})
+        write_atomic(path, buffer.getvalue())
+        return Path(path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        if mmap:
+            return cls(**load_npz_mmap(path))
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in cls.ARRAYS})
+
+    def __len__(self):
+        return len(self.match_ids)
+
+    @property
+    def n_teams(self):
+        return len(self.team_keys)
+
+    def team_code(self, team):
+        """Indice d'une équipe à partir de son UUID ou de son nom"""
+        for candidate in (team, normalize_team_name(team)):
+            found = np.flatnonzero(self.team_keys == candidate)
+            if len(found):
+                return int(found[0])
+        found = np.flatnonzero(np.char.upper(self.team_names) == normalize_team_name(team))
+        if len(found):
+            return int(found[0])
+        raise KeyError(team)
+
+    # --- Sets ---------------------------------------------------------------
+
+    def set_counts(self):
+        """Nombre de sets détaillés par match"""
+        return np.diff(self.set_offsets)
+
+    def set_margins(self):
+        """Écart de points de chaque set (domicile - extérieur), à plat"""
+        return self.set_home.astype(np.int32) - self.set_away.astype(np.int32)
+
+    def segment_sums(self, values):
+        """Somme de `values` (à plat, par set) sur les sets de chaque match"""
+        totals = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+        return totals[self.set_offsets[1:]] - totals[self.set_offsets[:-1]]
+
+    def points(self):
+        """Points marqués par match : (domicile, extérieur)"""
+        return self.segment_sums(self.set_home), self.segment_sums(self.set_away)
+
+    def point_margins(self):
+        """Écart de points total par match"""
+        return self.segment_sums(self.set_margins())
+
+    def tiebreaks(self):
+        """Masque des matchs terminés joués en 5 sets"""
+        total = self.home_sets.astype(np.int16) + self.away_sets.astype(np.int16)
+        return self.completed & (total == 5)
+
+    def tiebreak_rate(self):
+        played = int(self.completed.sum())
+        return float(self.tiebreaks().sum()) / played if played else 0.0
+
+    # --- Agrégats par équipe ----------------------------------------------
+
+    def team_aggregates(self):
+        """Agrégats par équipe (tableaux indexés comme `team_names`)"""
+        n = self.n_teams
+        done = self.completed
+        home, away = self.home[done], self.away[done]
+        hs = self.home_sets[done].astype(np.int64)
+        aws = self.away_sets[done].astype(np.int64)
+        home_points, away_points = (p[done] for p in self.points())
+        home_win = hs > aws
+
+        def per_team(home_values, away_values):
+            home_values = np.asarray(home_values, dtype=np.float64)
+            away_values = np.asarray(away_values, dtype=np.float64)
+            return (np.bincount(home, weights=home_values, minlength=n)
+                    + np.bincount(away, weights=away_values, minlength=n)).astype(np.int64)
+
+        home_rank = match_points_array(hs, aws)
+        away_rank = match_points_array(aws, hs)
+        tiebreak = self.tiebreaks()[done]
+
+        return {
+            "team": self.team_names,
+            "played": per_team(np.ones_like(hs), np.ones_like(aws)),
+            "wins": per_team(home_win, ~home_win),
+            "losses": per_team(~home_win, home_win),
+            "sets_for": per_team(hs, aws),
+            "sets_against": per_team(aws, hs),
+            "points_for": per_team(home_points, away_points),
+            "points_against": per_team(away_points, home_points),
+            "tiebreaks": per_team(tiebreak, tiebreak),
+            "rank_points": per_team(home_rank, away_rank),
+        }
+
+    def team_pools(self):
+        """Poule de chaque équipe (préfixe des identifiants de ses matchs)"""
+        pools = np.full(self.n_teams, "", dtype=object)
+        match_pools = np.array([pool_of(str(m)) or "" for m in self.match_ids], dtype=object)
+        pools[self.home] = match_pools
+        pools[self.away] = match_pools
+        return pools
+
+    def table(self):
+        """Classement calculé par poule : {poule: liste de dicts}, départage de `rules.ranking_order`"""
+        agg = self.team_aggregates()
+        pools = self.team_pools()
+        tables = {}
+        for pool in sorted(set(pools)):
+            members = np.flatnonzero(pools == pool)
+            order = members[ranking_order(*(agg[field][members] for field in (
+                "rank_points", "wins", "sets_for", "sets_against", "points_for", "points_against"
+            )))]
+            tables[pool] = [
+                {name: (str(values[i]) if name == "team" else int(values[i])) for name, values in agg.items()}
+                for i in order
+            ]
+        return tables
+
+    def rolling_form(self, team, window=5):
+        """Taux de victoire glissant d'une équipe sur ses `window` derniers matchs
+
+        Renvoie (dates, forme) dans l'ordre chronologique des matchs terminés.
+        """
+        code = self.team_code(team)
+        idx = np.flatnonzero(self.completed & ((self.home == code) | (self.away == code)))
+        idx = idx[np.argsort(self.dates[idx], kind='stable')]
+
+        is_home = self.home[idx] == code
+        won = np.where(is_home, self.home_sets[idx] > self.away_sets[idx],
+                       self.away_sets[idx] > self.home_sets[idx]).astype(np.float64)
+        totals = np.concatenate(([0.0], np.cumsum(won)))
+        end = np.arange(1, len(won) + 1)
+        start = np.maximum(end - window, 0)
+        return self.dates[idx], (totals[end] - totals[start]) / (end - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame colonnaire NumPy des matchs d'un snapshot")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--output", default=None, help="Fichier .npz (défaut: <data-dir>/matches_frame.npz)")
+    parser.add_argument("--team", default=None, help="Afficher la forme glissante de cette équipe")
+    parser.add_argument("--window", type=int, default=5)
+    args = parser.parse_args()
+
+    output = Path(args.output or Path(args.data_dir) / "matches_frame.npz")
+    MatchFrame.from_snapshot(args.data_dir).save(output)
+    frame = MatchFrame.load(output)
+
+    print(f"{len(frame)} matchs, {frame.n_teams} équipes, {int(frame.completed.sum())} terminés")
+    print(f"Tie-breaks: {frame.tiebreak_rate():.1%}")
+    for pool, rows in frame.table().items():
+        print(f"Poule {pool}")
+        for row in rows:
+            print(f"  {row['team']:<30} {row['rank_points']:>3} pts  {row['wins']:>2}V {row['losses']:>2}D  "
+                  f"sets {row['sets_for']}/{row['sets_against']}")
+
+    if args.team:
+        dates, form = frame.rolling_form(args.team, args.window)
+        for day, value in zip(dates, form):
+            print(f"  {day}  {value:.2f}")
+
+
+if __name__ == "__main__":
+    main()
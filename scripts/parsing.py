@@ -0,0 +1,421 @@
+# scripts/parsing.py
+import hashlib
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+# Import des utilitaires
+from utils import generate_uuid, generate_team_uuid, get_timestamp
+from records import Standing, Match, Matchday
+
+# Les fonctions de ce module sont au niveau module (pas de méthodes) pour
+# pouvoir être envoyées telles quelles aux processus de parsing.
+
+
+def log_error(message):
+    """Log d'erreur minimal utilisable depuis un processus de parsing"""
+    try:
+        clean_message = message.encode('ascii', 'ignore').decode('ascii')
+        print(f"ERROR: {clean_message}")
+    except Exception:
+        print("ERROR: Logging message")
+
+
+def extract_date_from_day_name(day_text):
+    """Extrait une date approximative depuis le nom de la journée"""
+    try:
+        day_number = day_text.split(' ')[1]
+        date_mapping = {
+            "01": "2025-10-04",
+            "02": "2025-10-18",
+            "03": "2025-11-15",
+            "04": "2025-11-29",
+            "05": "2025-12-06"
+        }
+        return date_mapping.get(day_number, f"2025-01-{day_number.zfill(2)}")
+    except:
+        return "2025-01-01"
+
+
+def parse_standing_row(row, timestamp=None):
+    """Parse une ligne de classement"""
+    cells = row.find_all('td')
+    if len(cells) < 19:
+        return None
+
+    try:
+        team_name = cells[1].get_text(strip=True)
+
+        # Validation et parsing sécurisés
+        rank_text = cells[0].get_text(strip=True).replace('.', '')
+        points_text = cells[2].get_text(strip=True)
+        played_text = cells[3].get_text(strip=True)
+        wins_text = cells[4].get_text(strip=True)
+        losses_text = cells[5].get_text(strip=True)
+        sets_won_text = cells[13].get_text(strip=True)
+        sets_lost_text = cells[14].get_text(strip=True)
+        points_for_text = cells[16].get_text(strip=True)
+        points_against_text = cells[17].get_text(strip=True)
+        ratio_text = cells[18].get_text(strip=True)
+
+        # Vérifier que les champs ne sont pas vides
+        if not team_name or not rank_text:
+            return None
+
+        timestamp = timestamp or get_timestamp()
+        return Standing(
+            id=generate_team_uuid(team_name),
+            team_name=team_name,
+            rank=int(rank_text) if rank_text else 0,
+            points=int(points_text) if points_text else 0,
+            played=int(played_text) if played_text else 0,
+            wins=int(wins_text) if wins_text else 0,
+            losses=int(losses_text) if losses_text else 0,
+            sets_won=int(sets_won_text) if sets_won_text else 0,
+            sets_lost=int(sets_lost_text) if sets_lost_text else 0,
+            points_for=int(points_for_text) if points_for_text else 0,
+            points_against=int(points_against_text) if points_against_text else 0,
+            ratio=float(ratio_text) if ratio_text else 0.0,
+            created_at=timestamp,
+            updated_at=timestamp
+        )
+    except (ValueError, IndexError) as e:
+        log_error(f"Erreur parsing ligne classement: {e}")
+        return None
+
+
+# Chemin d'une feuille de match (ex: ../vbspo_fdm.php?...) ; la recherche
+# porte sur le chemin seul, pas sur les paramètres de l'URL
+MATCH_SHEET_RE = re.compile(r"fdm|feuille|fmp", re.IGNORECASE)
+
+
+def extract_detail_link(cells):
+    """Renvoie le lien de la feuille de match d'une ligne de match, ou None
+
+    Les autres liens de la ligne (fiches d'équipes, salles, plans) ne sont
+    jamais pris pour une feuille de match.
+    """
+    for cell in cells:
+        for link in cell.find_all('a', href=True):
+            if MATCH_SHEET_RE.search(urlsplit(link['href']).path):
+                return link['href']
+    return None
+
+
+def parse_match_row(row, poule="BFQ", timestamp=None):
+    """Parse une ligne de match"""
+    cells = row.find_all('td')
+    if len(cells) < 10:
+        return None
+
+    try:
+        match_id = cells[0].get_text(strip=True)
+        if not match_id or poule not in match_id:
+            return None
+
+        date_text = cells[1].get_text(strip=True)
+        time_text = cells[2].get_text(strip=True)
+        home_team = cells[3].get_text(strip=True)
+        away_team = cells[5].get_text(strip=True)
+
+        # Extraire les scores
+        home_sets_text = cells[6].get_text(strip=True)
+        away_sets_text = cells[7].get_text(strip=True)
+        score_detail = cells[8].get_text(strip=True) if len(cells) > 8 else ""
+        venue = cells[9].get_text(strip=True) if len(cells) > 9 else ""
+
+        # Déterminer le gagnant
+        winner = None
+        if home_sets_text and away_sets_text:
+            home_sets = int(home_sets_text)
+            away_sets = int(away_sets_text)
+            if home_sets > away_sets:
+                winner = "home"
+            elif away_sets > home_sets:
+                winner = "away"
+            else:
+                winner = "draw"
+
+        # Parser les scores de sets
+        sets = []
+        if score_detail:
+            set_scores = score_detail.split(', ')
+            for set_score in set_scores:
+                if ':' in set_score:
+                    home_score, away_score = set_score.split(':')
+                    sets.append((int(home_score.strip()), int(away_score.strip())))
+
+        # Convertir la date
+        match_date = None
+        if date_text and '/' in date_text:
+            day, month, year = date_text.split('/')
+            match_date = f"20{year}-{month.zfill(2)}-{day.zfill(2)}"
+
+        timestamp = timestamp or get_timestamp()
+        return Match(
+            id=generate_uuid(),
+            match_id=match_id,
+            date=match_date,
+            time=time_text,
+            home_team=home_team,
+            away_team=away_team,
+            venue=venue,
+            home_sets=int(home_sets_text) if home_sets_text else None,
+            away_sets=int(away_sets_text) if away_sets_text else None,
+            score_detail=score_detail,
+            sets=sets,
+            winner=winner,
+            status="completed" if winner else "upcoming",
+            created_at=timestamp,
+            updated_at=timestamp,
+            detail_url=extract_detail_link(cells)
+        )
+    except (ValueError, IndexError) as e:
+        log_error(f"Erreur parsing ligne match: {e}")
+        return None
+
+
+def parse_standings(soup, timestamp=None):
+    """Extrait les classements d'une page calendrier déjà parsée"""
+    standings = []
+
+    # Trouver le tableau de classement
+    tables = soup.find_all('table', cellspacing='1', cellpadding='2')
+
+    for table in tables:
+        rows = table.find_all('tr')
+
+        # Vérifier si c'est le tableau de classement
+        header_row = rows[0] if rows else None
+        if header_row and any('Points' in cell.get_text() for cell in header_row.find_all('td')):
+
+            # Parser chaque ligne d'équipe
+            for row in rows[1:]:
+                if row.get('bgcolor') == '#EEEEF8':
+                    standing = parse_standing_row(row, timestamp)
+                    if standing:
+                        standings.append(standing)
+            break
+
+    return standings
+
+
+def parse_match_rows(rows, poule="BFQ", timestamp=None):
+    """Extrait journées et matchs d'une suite de lignes du tableau des matchs"""
+    timestamp = timestamp or get_timestamp()
+    matchdays = []
+    matches = []
+    current_matchday = None
+
+    for row in rows:
+        # Vérifier si c'est une ligne d'en-tête de journée
+        header_cells = row.find_all('td', {'background': '../images/bkrg.gif'})
+        if header_cells and 'Journée' in header_cells[0].get_text():
+            # Sauvegarder la journée précédente si elle existe
+            if current_matchday:
+                matchdays.append(current_matchday)
+
+            # Créer une nouvelle journée
+            day_text = header_cells[0].get_text(strip=True)
+
+            current_matchday = Matchday(
+                id=generate_uuid(),
+                name=day_text,
+                date=extract_date_from_day_name(day_text),
+                match_ids=[],
+                created_at=timestamp,
+                updated_at=timestamp,
+                pool=poule
+            )
+
+        # Vérifier si c'est une ligne de match
+        elif row.get('bgcolor') == '#EEEEF8':
+            match = parse_match_row(row, poule, timestamp)
+            if match:
+                matches.append(match)
+                # Ajouter l'ID du match à la journée courante
+                if current_matchday:
+                    current_matchday.match_ids.append(match.match_id)
+
+    # Ajouter la dernière journée
+    if current_matchday:
+        matchdays.append(current_matchday)
+
+    return matchdays, matches
+
+
+def parse_matchdays_and_matches(soup, poule="BFQ", timestamp=None):
+    """Extrait les journées et les matchs d'une page calendrier déjà parsée"""
+    # Trouver tous les tableaux
+    all_tables = soup.find_all('table')
+
+    # Le tableau des matchs est le tableau 3 (index 3)
+    if len(all_tables) > 3:
+        match_table = all_tables[3]
+        return parse_match_rows(match_table.find_all('tr'), poule, timestamp)
+
+    return [], []
+
+
+# Début d'une ligne d'en-tête de journée (cellule bkrg.gif contenant "Journée")
+SECTION_HEADER_RE = re.compile(
+    r"<tr[^>]*>\s*<td[^>]*background=['\"]?\.\./images/bkrg\.gif['\"]?[^>]*>(?:\s*<[^>]+>)*\s*Journ",
+    re.IGNORECASE
+)
+TABLE_END_RE = re.compile(r"</table\s*>", re.IGNORECASE)
+
+
+def split_calendar_sections(html):
+    """Découpe le HTML brut de la page en sections de journée
+
+    Renvoie (sections, reste) : chaque section va d'un en-tête de journée au
+    suivant (ou à la fin du tableau des matchs) ; le reste est la page privée
+    de ces sections, qui contient notamment le tableau de classement. Renvoie
+    None si aucune section n'est reconnue.
+    """
+    starts = [m.start() for m in SECTION_HEADER_RE.finditer(html)]
+    if not starts:
+        return None
+
+    table_end = TABLE_END_RE.search(html, starts[-1])
+    end = table_end.start() if table_end else len(html)
+    bounds = starts + [end]
+    sections = [html[bounds[i]:bounds[i + 1]] for i in range(len(starts))]
+    remainder = html[:starts[0]] + html[end:]
+    return sections, remainder
+
+
+def section_hash(section):
+    return hashlib.sha1(section.encode('utf-8')).hexdigest()
+
+
+def parse_calendar_incremental(content, poule="BFQ", timestamp=None, section_cache=None):
+    """Parse une page en ne re-parsant que les sections de journée modifiées
+
+    `section_cache` associe le hash du HTML brut d'une section au couple
+    (journée, matchs) déjà extrait. Les sections inchangées réutilisent ces
+    enregistrements (identifiants compris), réhorodatés avec `timestamp`
+    comme l'aurait fait un parsing complet ; seules les sections dont le
+    hash a changé passent par BeautifulSoup.
+
+    Renvoie (classements, journées, matchs, nouveau cache, sections re-parsées).
+    """
+    timestamp = timestamp or get_timestamp()
+    section_cache = section_cache or {}
+    html = UnicodeDammit(content, is_html=True).unicode_markup
+
+    split = split_calendar_sections(html)
+    if split is None:
+        # Structure non reconnue : parsing complet
+        soup = BeautifulSoup(content, "html.parser")
+        matchdays, matches = parse_matchdays_and_matches(soup, poule, timestamp)
+        return parse_standings(soup, timestamp), matchdays, matches, {}, None
+
+    sections, remainder = split
+    matchdays, matches, new_cache = [], [], {}
+    reparsed = 0
+    for section in sections:
+        digest = section_hash(section)
+        cached = section_cache.get(digest)
+        if cached is None:
+            soup = BeautifulSoup(f"<table>{section}</table>", "html.parser")
+            cached = parse_match_rows(soup.find_all('tr'), poule, timestamp)
+            reparsed += 1
+        else:
+            for record in (*cached[0], *cached[1]):
+                record.created_at = record.updated_at = timestamp
+        new_cache[digest] = cached
+        matchdays.extend(cached[0])
+        matches.extend(cached[1])
+
+    # Le classement est extrait du reste de la page, sans les sections
+    standings = parse_standings(BeautifulSoup(remainder, "html.parser"), timestamp)
+    return standings, matchdays, matches, new_cache, reparsed
+
+
+def parse_page(page):
+    """Parse une page calendrier complète (classements, journées, matchs)
+
+    `page` est un dict {"key", "poule", "content", "timestamp"} où `content`
+    contient les octets bruts de la réponse HTTP et `timestamp` l'horodatage
+    du run. Si `page["section_cache"]` est fourni (même vide), seules les
+    sections de journée modifiées sont re-parsées et le résultat contient le
+    cache à conserver. Le résultat doit rester picklable pour revenir au
+    processus principal.
+    """
+    poule = page.get("poule", "BFQ")
+    timestamp = page.get("timestamp") or get_timestamp()
+
+    if page.get("section_cache") is not None:
+        standings, matchdays, matches, section_cache, reparsed = parse_calendar_incremental(
+            page["content"], poule, timestamp, page["section_cache"]
+        )
+        return {
+            "key": page["key"],
+            "poule": poule,
+            "standings": standings,
+            "matchdays": matchdays,
+            "matches": matches,
+            "section_cache": section_cache,
+            "sections_reparsed": reparsed
+        }
+
+    soup = BeautifulSoup(page["content"], "html.parser")
+    matchdays, matches = parse_matchdays_and_matches(soup, poule, timestamp)
+    return {
+        "key": page["key"],
+        "poule": poule,
+        "standings": parse_standings(soup, timestamp),
+        "matchdays": matchdays,
+        "matches": matches
+    }
+
+
+def gil_disabled():
+    """Indique si l'interpréteur tourne sans GIL (build free-threaded)"""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def create_parse_executor(max_workers=None):
+    """Crée l'exécuteur de parsing adapté à l'interpréteur
+
+    Le parsing HTML est du Python pur lié au CPU : avec le GIL, seuls des
+    processus séparés permettent d'utiliser plusieurs cœurs. Sur un
+    interpréteur free-threaded, des threads suffisent et évitent la
+    sérialisation des pages.
+    """
+    if gil_disabled():
+        return ThreadPoolExecutor(max_workers=max_workers)
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+def parse_pages(pages, max_workers=None, chunksize=None):
+    """Parse une liste de pages et renvoie les résultats au fil de l'eau
+
+    Les pages sont soumises par paquets de `chunksize` pour amortir le coût
+    d'aller-retour vers les workers ; les résultats sont produits dans l'ordre
+    des pages dès qu'ils sont disponibles, ce qui permet à l'appelant
+    d'agréger pendant que les autres pages sont encore en cours de parsing.
+    """
+    pages = list(pages)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(pages)))
+
+    # Une seule page (ou un seul worker) : inutile de démarrer un pool
+    if max_workers == 1:
+        for page in pages:
+            yield parse_page(page)
+        return
+
+    if chunksize is None:
+        chunksize = max(1, len(pages) // (max_workers * 4))
+
+    with create_parse_executor(max_workers) as executor:
+        for result in executor.map(parse_page, pages, chunksize=chunksize):
+            yield result
@@ -0,0 +1,173 @@
+# scripts/pg_sync.py
+import psycopg
+from psycopg import sql
+from psycopg.types.json import Jsonb
+
+from final_sync import OPTIONAL_COLUMNS, MIGRATION_HINT
+
+# Clé de conflit utilisée pour la fusion de chaque table. L'identifiant des
+# journées est déterministe (poule + numéro de journée, cf. adapt_matchday).
+CONFLICT_KEYS = {
+    "matchdays": "id",
+    "matches": "match_id",
+    "standings": "id",
+}
+
+
+class PostgresBackend:
+    """Backend de synchronisation direct PostgreSQL (COPY + fusion ensembliste)
+
+    Chaque table est chargée par `COPY ... FROM STDIN` dans une table de
+    staging temporaire, puis fusionnée dans la table cible en une seule
+    requête `INSERT ... SELECT ... ON CONFLICT`. Toute la synchronisation
+    s'exécute dans une seule transaction : en cas d'erreur, rien n'est
+    appliqué.
+
+    Utilisable contre une instance locale :
+        python final_sync.py --backend postgres --dsn postgresql://localhost/volley
+    """
+
+    name = "postgres"
+    transactional = True
+
+    def __init__(self, dsn):
+        self.dsn = dsn
+        self.conn = None
+        self._column_types = {}
+        self._warned = set()
+
+    def __enter__(self):
+        self.conn = psycopg.connect(self.dsn)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+            self.conn = None
+        return False
+
+    def column_types(self, table):
+        """Types des colonnes de la table cible (mis en cache)"""
+        if table not in self._column_types:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    "SELECT column_name, data_type FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() AND table_name = %s",
+                    (table,)
+                )
+                self._column_types[table] = dict(cur.fetchall())
+        return self._column_types[table]
+
+    def convert_row(self, row, columns, types):
+        """Adapte les valeurs Python aux colonnes (JSON/JSONB encapsulés)"""
+        values = []
+        for column in columns:
+            value = row.get(column)
+            if value is not None and types.get(column) in ("json", "jsonb"):
+                value = Jsonb(value)
+            values.append(value)
+        return values
+
+    def stage(self, table, rows):
+        """Charge les lignes dans la table de staging par COPY ; renvoie (staging, colonnes, nombre)"""
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return None, [], 0
+
+        types = self.column_types(table)
+        # Colonnes optionnelles pas encore créées par la migration : ignorées
+        missing = [c for c in OPTIONAL_COLUMNS.get(table, ()) if c in first and c not in types]
+        if missing and table not in self._warned:
+            print(f"{table}: colonnes {', '.join(missing)} absentes, non envoyées ({MIGRATION_HINT})")
+            self._warned.add(table)
+        columns = [c for c in first.keys() if c not in missing]
+        staging = f"stage_{table}"
+
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL(
+                "CREATE TEMP TABLE IF NOT EXISTS {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ).format(sql.Identifier(staging), sql.Identifier(table)))
+            cur.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(staging)))
+
+            copy_query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+                sql.Identifier(staging),
+                sql.SQL(", ").join(map(sql.Identifier, columns))
+            )
+            count = 0
+            with cur.copy(copy_query) as copy:
+                copy.write_row(self.convert_row(first, columns, types))
+                count += 1
+                for row in rows:
+                    copy.write_row(self.convert_row(row, columns, types))
+                    count += 1
+
+        return staging, columns, count
+
+    def upsert(self, table, rows, on_conflict=None):
+        """COPY vers le staging puis INSERT ... ON CONFLICT DO UPDATE"""
+        staging, columns, count = self.stage(table, rows)
+        if not count:
+            return 0
+
+        key = on_conflict or CONFLICT_KEYS[table]
+        updates = [column for column in columns if column != key]
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        if updates:
+            action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column))
+                for column in updates
+            ))
+        else:
+            action = sql.SQL("DO NOTHING")
+
+        # DISTINCT ON : une même clé ne peut être mise à jour deux fois par requête
+        query = sql.SQL(
+            "INSERT INTO {table} ({columns}) "
+            "SELECT DISTINCT ON ({key}) {columns} FROM {staging} ORDER BY {key} "
+            "ON CONFLICT ({key}) {action}"
+        ).format(
+            table=sql.Identifier(table),
+            columns=column_list,
+            key=sql.Identifier(key),
+            staging=sql.Identifier(staging),
+            action=action
+        )
+        with self.conn.cursor() as cur:
+            cur.execute(query)
+            return cur.rowcount
+
+    def delete_missing(self, table, key, keep):
+        """Supprime les lignes dont la clé n'est pas dans `keep`
+
+        Refusé si `keep` est vide : un snapshot vide viderait toute la table.
+        """
+        keep = [str(k) for k in keep]
+        if not keep:
+            raise ValueError(f"{table}: aucune clé à conserver, suppression miroir refusée")
+        with self.conn.cursor() as cur:
+            cur.execute(
+                sql.SQL("DELETE FROM {} WHERE NOT ({}::text = ANY(%s))").format(
+                    sql.Identifier(table), sql.Identifier(key)
+                ),
+                (keep,)
+            )
+            return cur.rowcount
+
+    def replace(self, table, rows):
+        """Remplace le contenu de la table (dans la même transaction)"""
+        staging, columns, count = self.stage(table, rows)
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL("DELETE FROM {}").format(sql.Identifier(table)))
+            if not count:
+                return 0
+            column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+            cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(
+                sql.Identifier(table), column_list, column_list, sql.Identifier(staging)
+            ))
+            return cur.rowcount
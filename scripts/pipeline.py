@@ -0,0 +1,315 @@
+# scripts/pipeline.py
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+# Import des utilitaires
+from parsing import create_parse_executor, parse_page
+from team_index import TeamIndex
+from records import Team
+from final_sync import adapt_matchday, adapt_match, adapt_standing
+
+# Marqueur de fin de flux entre deux étages
+DONE = object()
+
+
+class PipelineError(Exception):
+    """Des éléments ont échoué dans un étage : le snapshot serait incomplet"""
+
+
+class StageStats:
+    """Compteurs d'un étage : éléments traités, temps actif, profondeur de file"""
+
+    def __init__(self, name, inbox=None):
+        self.name = name
+        self.inbox = inbox
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.started = None
+        self.finished = None
+        self.depth_samples = []
+
+    def sample(self):
+        if self.inbox is not None:
+            self.depth_samples.append(self.inbox.qsize())
+
+    def report(self):
+        elapsed = (self.finished or time.monotonic()) - (self.started or time.monotonic())
+        throughput = self.items / elapsed if elapsed > 0 else 0.0
+        depth = self.depth_samples or [0]
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 3),
+            "busy_s": round(self.busy, 3),
+            "throughput_per_s": round(throughput, 2),
+            "queue_depth_max": max(depth),
+            "queue_depth_avg": round(sum(depth) / len(depth), 2)
+        }
+
+
+class Pipeline:
+    """Runtime en étages fetch -> parse -> transform -> sync de `scrape_all_data`
+
+    Chaque étage tourne dans son propre thread et communique par des files
+    bornées (`queue_size`) : un étage rapide se bloque quand l'étage suivant
+    est saturé (contre-pression). Le parsing est confié au pool de processus
+    de `parsing.py`, avec au plus `max_workers` pages en vol ; la synchro
+    d'une poule démarre dès que ses lignes sont transformées, pendant que les
+    poules suivantes sont encore en téléchargement.
+
+    Si un étage lève une exception (pool de processus cassé, échec d'écriture
+    de l'index...), les autres étages s'arrêtent au lieu d'attendre sur leur
+    file et `run()` relève l'erreur. Si une poule échoue dans un étage
+    (téléchargement, parsing, synchro), les autres poules vont au bout mais
+    `run()` lève `PipelineError` sans écrire le snapshot ni retirer les
+    classements absents : une poule manquante n'efface jamais ses données.
+    """
+
+    def __init__(self, scraper, backend=None, max_workers=None, queue_size=4,
+                 sample_interval=0.2):
+        self.scraper = scraper
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.sample_interval = sample_interval
+
+        self.parse_q = queue.Queue(maxsize=queue_size)
+        self.transform_q = queue.Queue(maxsize=queue_size)
+        self.sync_q = queue.Queue(maxsize=queue_size)
+        self.stats = {
+            "fetch": StageStats("fetch"),
+            "parse": StageStats("parse", self.parse_q),
+            "transform": StageStats("transform", self.transform_q),
+            "sync": StageStats("sync", self.sync_q),
+        }
+        self.results = []
+        self.errors = []  # (étage, poule, message) des éléments en échec
+        self.failure = None
+        self._failed = threading.Event()
+        self._stop_sampling = threading.Event()
+
+    def log(self, message, level="INFO"):
+        self.scraper.log(message, level)
+
+    def timed(self, stage, poule, func, *args):
+        """Exécute `func` en comptant le temps actif et les erreurs de l'étage"""
+        stats = self.stats[stage]
+        start = time.monotonic()
+        try:
+            result = func(*args)
+            stats.items += 1
+            return result
+        except Exception as e:
+            self.record_error(stage, poule, e)
+            return None
+        finally:
+            stats.busy += time.monotonic() - start
+
+    def record_error(self, stage, poule, error):
+        self.stats[stage].errors += 1
+        self.errors.append((stage, poule, str(error)))
+        self.log(f"Erreur étage {stage} (poule {poule}): {error}", "ERROR")
+
+    def put(self, inbox, item, poll=0.1):
+        """Dépose un élément pour l'étage suivant ; renonce si le pipeline a échoué"""
+        while True:
+            try:
+                inbox.put(item, timeout=poll)
+                return True
+            except queue.Full:
+                if self._failed.is_set():
+                    return False
+
+    def get(self, inbox, poll=0.1):
+        """Élément suivant d'une file ; DONE si la file est vide et le pipeline en échec"""
+        while True:
+            try:
+                return inbox.get(timeout=poll)
+            except queue.Empty:
+                if self._failed.is_set():
+                    return DONE
+
+    # --- Étages -----------------------------------------------------------
+
+    def fetch_stage(self, poules):
+        for poule in poules:
+            if self._failed.is_set():
+                return
+            url = self.scraper.build_url(poule)
+            content = self.timed("fetch", poule, self.scraper.fetch_page, url)
+            if content is not None:
+                if not self.put(self.parse_q, self.scraper.page_for(poule, url, content)):
+                    return
+
+    def parse_stage(self):
+        stats = self.stats["parse"]
+        in_flight = {}
+        with create_parse_executor(self.max_workers) as executor:
+            exhausted = False
+            while not exhausted or in_flight:
+                # Alimenter le pool sans dépasser max_workers pages en vol
+                # (attente courte si des pages sont en vol, pour remonter leurs résultats)
+                while not exhausted and len(in_flight) < self.max_workers:
+                    if in_flight:
+                        try:
+                            page = self.parse_q.get(timeout=0.05)
+                        except queue.Empty:
+                            break
+                    else:
+                        page = self.get(self.parse_q)
+                    if page is DONE:
+                        exhausted = True
+                        break
+                    in_flight[executor.submit(parse_page, page)] = (page["poule"], time.monotonic())
+
+                if not in_flight:
+                    continue
+                done, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    poule, start = in_flight.pop(future)
+                    stats.busy += time.monotonic() - start
+                    try:
+                        result = future.result()
+                        stats.items += 1
+                    except Exception as e:
+                        self.record_error("parse", poule, e)
+                        continue
+                    if not self.put(self.transform_q, result):
+                        return
+
+    def transform(self, result, index):
+        self.scraper.remember_sections(result)
+        for standing in result["standings"]:
+            standing.id = index.register(standing.team_name, standing.id, season=self.scraper.saison)
+        for match in result["matches"]:
+            match.home_team_id = index.resolve(match.home_team, season=self.scraper.saison)
+            match.away_team_id = index.resolve(match.away_team, season=self.scraper.saison)
+        result["teams"] = [
+            Team(s.id, s.team_name, s.created_at, s.updated_at) for s in result["standings"]
+        ]
+        return result
+
+    def transform_stage(self):
+        index = TeamIndex(self.scraper.data_dir / "team_index.json")
+        while True:
+            result = self.get(self.transform_q)
+            if result is DONE:
+                break
+            result = self.timed("transform", result["poule"], self.transform, result, index)
+            if result is not None:
+                self.results.append(result)
+                if not self.put(self.sync_q, result):
+                    return
+        if not self._failed.is_set():
+            index.save()
+            self.log(f"Index des équipes: {len(index.teams)} équipes connues")
+
+    def sync(self, result):
+        if self.backend is None:
+            return
+        self.backend.upsert('matchdays', [adapt_matchday(m) for m in result["matchdays"]], on_conflict='id')
+        self.backend.upsert('matches', [adapt_match(m) for m in result["matches"]], on_conflict='match_id')
+        self.backend.upsert('standings', [adapt_standing(s) for s in result["standings"]], on_conflict='id')
+
+    def sync_stage(self):
+        while True:
+            result = self.get(self.sync_q)
+            if result is DONE:
+                break
+            self.timed("sync", result["poule"], self.sync, result)
+
+    def sample_stage(self):
+        while not self._stop_sampling.wait(self.sample_interval):
+            for stats in self.stats.values():
+                stats.sample()
+
+    # --- Exécution --------------------------------------------------------
+
+    def run(self, poules):
+        """Exécute le pipeline sur les poules données et renvoie le rapport par étage"""
+        # (nom, fonction, arguments, file de sortie recevant DONE en fin d'étage)
+        stages = [
+            ("fetch", self.fetch_stage, (poules,), self.parse_q),
+            ("parse", self.parse_stage, (), self.transform_q),
+            ("transform", self.transform_stage, (), self.sync_q),
+            ("sync", self.sync_stage, (), None),
+        ]
+        sampler = threading.Thread(target=self.sample_stage, daemon=True)
+        sampler.start()
+
+        threads = []
+        for name, target, args, outbox in stages:
+            self.stats[name].started = time.monotonic()
+            thread = threading.Thread(target=self.run_stage, args=(name, target, args, outbox), name=name)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        self._stop_sampling.set()
+        sampler.join()
+        if self.failure is not None:
+            raise self.failure
+        if self.errors:
+            poules = sorted({poule for _, poule, _ in self.errors})
+            raise PipelineError(
+                f"{len(self.errors)} erreur(s), poules {', '.join(poules)} : snapshot non sauvegardé"
+            )
+        self.finalize()
+        return self.report()
+
+    def report(self):
+        """Rapport par étage (disponible aussi après un échec)"""
+        return [stats.report() for stats in self.stats.values()]
+
+    def log_report(self):
+        self.log("=== RAPPORT PIPELINE ===")
+        for stage in self.report():
+            self.log(
+                f"{stage['stage']:<9} {stage['items']:>5} elements  "
+                f"{stage['throughput_per_s']:>8} /s  "
+                f"file max {stage['queue_depth_max']} (moy {stage['queue_depth_avg']})  "
+                f"erreurs {stage['errors']}"
+            )
+
+    def run_stage(self, name, target, args, outbox):
+        try:
+            target(*args)
+        except Exception as e:
+            # Premier échec conservé ; les autres étages cessent d'attendre
+            if self.failure is None:
+                self.failure = e
+            self._failed.set()
+            self.log(f"Étage {name} interrompu: {e}", "ERROR")
+        finally:
+            self.stats[name].finished = time.monotonic()
+            # DONE toujours transmis, même si l'étage a échoué
+            if outbox is not None:
+                self.put(outbox, DONE)
+
+    def finalize(self):
+        """Agrège les résultats dans le scraper et écrit les fichiers JSON"""
+        scraper = self.scraper
+        scraper.standings = [s for r in self.results for s in r["standings"]]
+        scraper.matchdays = [m for r in self.results for m in r["matchdays"]]
+        scraper.matches = [m for r in self.results for m in r["matches"]]
+        scraper.teams = [t for r in self.results for t in r["teams"]]
+        scraper.save_all_data()
+        scraper.save_section_cache()
+
+        # Les classements absents du snapshot complet sont retirés en dernier
+        if self.backend is not None and scraper.standings:
+            self.backend.delete_missing('standings', 'id', [s.id for s in scraper.standings])
+
+
+def main():
+    """Même point d'entrée que scraper.py (options --sync, --dsn, --queue-size...)"""
+    from scraper import main as scrape
+    scrape()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+# scripts/projection.py
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Import des utilitaires
+from utils import generate_team_uuid, iter_records, load_json, snapshot_path, write_atomic, DATA_DIR
+from feeds import pool_of
+from rules import match_points_array, ranking_order
+from sync_checkpoint import snapshot_hash
+
+PROJECTION_VERSION = 2
+DEFAULT_BATCH = 10000
+
+
+def match_team_ids(match):
+    """Identifiants (domicile, extérieur) des équipes d'un match
+
+    Ce sont les UUID du classement (cf. team_index.py) ; à défaut, l'UUID
+    dérivé du nom tel qu'écrit sur la page.
+    """
+    return tuple(
+        match.get(f"{side}_team_id") or generate_team_uuid(match[f"{side}_team"])
+        for side in ("home", "away")
+    )
+
+
+def fit_strengths(n_teams, home, away, home_sets, away_sets, iterations=50, prior=0.5):
+    """Forces d'équipes (Bradley-Terry sur les sets) et avantage du terrain
+
+    P(l'équipe i gagne un set contre j à domicile) = sigmoid(r_i - r_j + h).
+    Ajustement par pas de Newton diagonaux sur la vraisemblance des sets
+    gagnés, avec un a priori gaussien qui ramène vers 0 les équipes ayant
+    peu joué.
+    """
+    ratings = np.zeros(n_teams)
+    advantage = 0.0
+    home_sets = np.asarray(home_sets, dtype=np.float64)
+    away_sets = np.asarray(away_sets, dtype=np.float64)
+    total = home_sets + away_sets
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-(ratings[home] - ratings[away] + advantage)))
+        residual = home_sets - total * p  # d(log-vraisemblance)/d(r_home - r_away)
+        curvature = total * p * (1.0 - p)
+        gradient = (np.bincount(home, weights=residual, minlength=n_teams)
+                    - np.bincount(away, weights=residual, minlength=n_teams)
+                    - prior * ratings)
+        hessian = (np.bincount(home, weights=curvature, minlength=n_teams)
+                   + np.bincount(away, weights=curvature, minlength=n_teams) + prior)
+        ratings += gradient / hessian
+        advantage += (residual.sum() - prior * advantage) / (curvature.sum() + prior)
+    return ratings - ratings.mean(), advantage
+
+
+def simulate_batch(task):
+    """Simule `size` fins de saison ; renvoie les comptes de places (équipes x rangs)
+
+    Chaque match restant est joué en 5 sets tirés indépendamment : le
+    vainqueur est la première équipe à 3 sets, les sets suivants sont
+    ignorés. Le classement final applique `rules.match_points_array` et le
+    départage de `rules.ranking_order` ; les points de jeu (rallyes) des
+    matchs simulés ne sont pas tirés, le quotient de points reste celui du
+    classement actuel.
+    """
+    size, seed, state = task
+    rng = np.random.default_rng(seed)
+    n_teams = len(state["points"])
+    home, away, p_set = state["home"], state["away"], state["p_set"]
+
+    wins = rng.random((size, len(home), 5)) < p_set[None, :, None]
+    home_cum = np.cumsum(wins, axis=2)
+    away_cum = np.cumsum(~wins, axis=2)
+    end = np.argmax((home_cum == 3) | (away_cum == 3), axis=2)[..., None]
+    hs = np.take_along_axis(home_cum, end, axis=2)[..., 0]
+    aws = np.take_along_axis(away_cum, end, axis=2)[..., 0]
+
+    # Incidence match -> équipe pour agréger (simulations x matchs) @ (matchs x équipes)
+    home_onehot = np.zeros((len(home), n_teams))
+    home_onehot[np.arange(len(home)), home] = 1
+    away_onehot = np.zeros((len(away), n_teams))
+    away_onehot[np.arange(len(away)), away] = 1
+
+    def per_team(home_values, away_values):
+        return home_values @ home_onehot + away_values @ away_onehot
+
+    points = state["points"] + per_team(match_points_array(hs, aws), match_points_array(aws, hs))
+    team_wins = state["wins"] + per_team(hs > aws, aws > hs)
+    sets_won = state["sets_won"] + per_team(hs, aws)
+    sets_lost = state["sets_lost"] + per_team(aws, hs)
+
+    order = ranking_order(points, team_wins, sets_won, sets_lost,
+                          state["points_for"], state["points_against"])
+    # counts[équipe, rang] : nombre de simulations où l'équipe finit à ce rang
+    cells = order * n_teams + np.arange(n_teams)
+    counts = np.bincount(cells.ravel(), minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+    return counts, points.sum(axis=0)
+
+
+class SeasonProjection:
+    """Projection Monte Carlo du classement final de chaque poule
+
+    Les forces d'équipes sont ajustées sur les sets des matchs terminés,
+    puis les matchs restants sont simulés par lots vectorisés, répartis sur
+    un pool de processus. Les résultats sont mis en cache par hash du
+    snapshot (et paramètres) dans `data/projections/`.
+
+        projection = SeasonProjection(DATA_DIR, simulations=100000)
+        projection.run()["BFQ"]["teams"][0]["rank_probabilities"]
+    """
+
+    def __init__(self, data_dir=DATA_DIR, simulations=100000, promote=1, relegate=1,
+                 batch_size=DEFAULT_BATCH, max_workers=None, seed=0, logger=print):
+        self.data_dir = Path(data_dir)
+        self.simulations = simulations
+        self.promote = promote
+        self.relegate = relegate
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.seed = seed
+        self.log = logger
+        self.cache_dir = self.data_dir / "projections"
+
+    def cache_path(self):
+        params = json.dumps([PROJECTION_VERSION, self.simulations, self.promote, self.relegate,
+                             self.batch_size, self.seed])
+        key = snapshot_hash(self.data_dir, ["matches.json", "standings.json"])
+        key = hashlib.sha256((key + params).encode('utf-8')).hexdigest()[:24]
+        return self.cache_dir / f"{key}.json"
+
+    def pools(self):
+        """Regroupe équipes (classement) et matchs par poule
+
+        Les équipes des matchs sont rattachées au classement par leur
+        identifiant. Une poule dont une équipe est absente du classement est
+        ignorée (avec un avertissement) : partir de zéro point pour cette
+        équipe fausserait toute la projection.
+        """
+        standings = {s["id"]: s for s in iter_records(snapshot_path(self.data_dir, "standings.json"))}
+        pools = {}
+        for match in iter_records(snapshot_path(self.data_dir, "matches.json")):
+            pools.setdefault(pool_of(match["match_id"]), []).append(match)
+        result = {}
+        for pool, matches in pools.items():
+            names = {}
+            for match in matches:
+                for team_id, side in zip(match_team_ids(match), ("home_team", "away_team")):
+                    names.setdefault(team_id, match[side])
+            missing = sorted(name for team_id, name in names.items() if team_id not in standings)
+            if missing:
+                self.log(f"Poule {pool}: équipes absentes du classement ({', '.join(missing)}), "
+                         f"projection ignorée")
+                continue
+            teams = sorted(names, key=lambda team_id: standings[team_id]["team_name"])
+            result[pool] = (teams, matches, [standings[t] for t in teams])
+        return result
+
+    def pool_state(self, teams, matches, standings):
+        """Situation actuelle d'une poule et probabilités de set des matchs restants"""
+        code = {team: i for i, team in enumerate(teams)}
+        done = [m for m in matches if m.get("status") == "completed" and m.get("home_sets") is not None]
+        remaining = [m for m in matches if m.get("status") != "completed"]
+
+        def indices(selected):
+            pairs = np.array([[code[t] for t in match_team_ids(m)] for m in selected],
+                             dtype=np.int64).reshape(-1, 2)
+            return pairs[:, 0], pairs[:, 1]
+
+        done_home, done_away = indices(done)
+        ratings, advantage = fit_strengths(
+            len(teams), done_home, done_away,
+            [m["home_sets"] for m in done],
+            [m["away_sets"] for m in done],
+        )
+        home, away = indices(remaining)
+
+        def column(field):
+            return np.array([s.get(field) or 0 for s in standings], dtype=np.float64)
+
+        return {
+            "home": home,
+            "away": away,
+            "p_set": 1.0 / (1.0 + np.exp(-(ratings[home] - ratings[away] + advantage))),
+            "points": column("points"),
+            "wins": column("wins"),
+            "sets_won": column("sets_won"),
+            "sets_lost": column("sets_lost"),
+            "points_for": column("points_for"),
+            "points_against": column("points_against"),
+        }, ratings, len(remaining)
+
+    def simulate(self, state, executor, pool_seed):
+        n_teams = len(state["points"])
+        sizes = [self.batch_size] * (self.simulations // self.batch_size)
+        if self.simulations % self.batch_size:
+            sizes.append(self.simulations % self.batch_size)
+        seeds = np.random.SeedSequence([self.seed, pool_seed]).spawn(len(sizes))
+        tasks = [(size, seed, state) for size, seed in zip(sizes, seeds)]
+
+        counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+        points = np.zeros(n_teams)
+        results = executor.map(simulate_batch, tasks) if executor else map(simulate_batch, tasks)
+        for batch_counts, batch_points in results:
+            counts += batch_counts
+            points += batch_points
+        return counts, points / self.simulations
+
+    def project_pool(self, pool, teams, matches, standings, executor):
+        state, ratings, remaining = self.pool_state(teams, matches, standings)
+        pool_seed = int(hashlib.sha1(pool.encode('utf-8')).hexdigest()[:8], 16)
+        counts, expected_points = self.simulate(state, executor, pool_seed)
+        probabilities = counts / self.simulations
+        n_teams = len(teams)
+
+        rows = []
+        for i, team in enumerate(teams):
+            rows.append({
+                "team": standings[i]["team_name"],
+                "team_id": team,
+                "strength": round(float(ratings[i]), 4),
+                "current_rank": standings[i].get("rank"),
+                "current_points": int(state["points"][i]),
+                "expected_points": round(float(expected_points[i]), 2),
+                "rank_probabilities": [round(float(p), 5) for p in probabilities[i]],
+                "promotion": round(float(probabilities[i, :self.promote].sum()), 5),
+                "relegation": round(float(probabilities[i, n_teams - self.relegate:].sum()), 5)
+                if self.relegate else 0.0,
+            })
+        rows.sort(key=lambda row: -row["expected_points"])
+        return {"pool": pool, "remaining_matches": remaining, "simulations": self.simulations, "teams": rows}
+
+    def run(self, use_cache=True):
+        """Projection de toutes les poules du snapshot (depuis le cache si possible)"""
+        path = self.cache_path()
+        if use_cache and path.exists():
+            cached = load_json(str(path))
+            if cached is not None:
+                self.log(f"Projection en cache: {path.name}")
+                return cached
+
+        pools = self.pools()
+        executor = ProcessPoolExecutor(self.max_workers) if self.max_workers > 1 else None
+        try:
+            result = {
+                pool: self.project_pool(pool, *pools[pool], executor)
+                for pool in sorted(p for p in pools if p)
+            }
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(result, ensure_ascii=False, indent=2))
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Projection Monte Carlo du classement final")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--simulations", type=int, default=100000)
+    parser.add_argument("--promote", type=int, default=1, help="Nombre de places de montée")
+    parser.add_argument("--relegate", type=int, default=1, help="Nombre de places de descente")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    projection = SeasonProjection(
+        args.data_dir, simulations=args.simulations, promote=args.promote,
+        relegate=args.relegate, batch_size=args.batch_size, max_workers=args.workers, seed=args.seed
+    )
+    for pool, result in projection.run(use_cache=not args.no_cache).items():
+        print(f"Poule {pool} ({result['remaining_matches']} matchs restants, "
+              f"{result['simulations']} simulations)")
+        for row in result["teams"]:
+            print(f"  {row['team']:<30} {row['current_points']:>3} -> {row['expected_points']:>6.2f} pts  "
+                  f"montée {row['promotion']:.1%}  descente {row['relegation']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# scripts/query.py
+import argparse
+import json
+import pickle
+from bisect import bisect_left, bisect_right
+from datetime import date
+from pathlib import Path
+
+# Import des utilitaires
+from utils import iter_records, snapshot_path, write_atomic, DATA_DIR
+from team_index import normalize_team_name
+
+INDEX_VERSION = 2
+
+
+def file_signature(path):
+    """Signature (taille, date de modification) d'un fichier, pour invalider le cache"""
+    stat = Path(path).stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def match_sort_key(match):
+    return (match.get("date") or "9999-99-99", match.get("time") or "", match["match_id"])
+
+
+class SnapshotQuery:
+    """Requêtes indexées sur un snapshot de matchs
+
+    Les index secondaires (équipe, journée, date, statut) sont construits une
+    fois puis enregistrés à côté du snapshot (`matches.json.idx`) ; tant que
+    les fichiers du snapshot ne changent pas, ils sont rechargés tels quels.
+
+        q = SnapshotQuery(DATA_DIR)
+        q.next_matches("CAMBRAI 1", 3)
+        q.matchday_results("03", pool="BFQ")
+        q.between("2025-10-01", "2025-11-30")
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self.matches_path = snapshot_path(self.data_dir, "matches.json")
+        self.matchdays_path = snapshot_path(self.data_dir, "matchdays.json")
+        self.index_path = self.matches_path.with_name(self.matches_path.name + ".idx")
+        self.load()
+
+    def signature(self):
+        paths = [self.matches_path, self.matchdays_path]
+        return [INDEX_VERSION] + [file_signature(p) if p.exists() else None for p in paths]
+
+    def load(self):
+        """Charge les index depuis le cache disque, ou les reconstruit"""
+        signature = self.signature()
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'rb') as f:
+                    state = pickle.load(f)
+                if state.get("signature") == signature:
+                    self.__dict__.update(state["indexes"])
+                    return
+            except Exception as e:
+                # Cache illisible (tronqué, ancien format, classe disparue) : reconstruit
+                print(f"Index {self.index_path.name} ignoré ({e.__class__.__name__}), reconstruction")
+
+        self.build()
+        indexes = {
+            "matches": self.matches,
+            "by_team": self.by_team,
+            "by_team_id": self.by_team_id,
+            "by_matchday": self.by_matchday,
+            "by_status": self.by_status,
+            "dates": self.dates,
+            "date_positions": self.date_positions,
+        }
+        write_atomic(self.index_path, pickle.dumps(
+            {"signature": signature, "indexes": indexes}, protocol=pickle.HIGHEST_PROTOCOL
+        ))
+
+    def build(self):
+        """Construit les index secondaires à partir des fichiers du snapshot"""
+        # Matchs triés par date : les listes de positions sont alors déjà ordonnées
+        self.matches = sorted(iter_records(self.matches_path), key=match_sort_key)
+        self.by_team = {}
+        self.by_team_id = {}
+        self.by_status = {}
+        positions = {}
+
+        for pos, match in enumerate(self.matches):
+            positions[match["match_id"]] = pos
+            for side in ("home", "away"):
+                name = normalize_team_name(match.get(f"{side}_team"))
+                self.by_team.setdefault(name, []).append(pos)
+                team_id = match.get(f"{side}_team_id")
+                if team_id:
+                    self.by_team_id.setdefault(team_id, []).append(pos)
+            self.by_status.setdefault(match.get("status"), []).append(pos)
+
+        # Journées : via match_ids, indexées par nom complet et par numéro,
+        # puis par poule ("03" existe dans chaque poule)
+        self.by_matchday = {}
+        if self.matchdays_path.exists():
+            for matchday in iter_records(self.matchdays_path):
+                found = sorted(positions[m] for m in matchday["match_ids"] if m in positions)
+                parts = matchday["name"].split(" ")
+                keys = [matchday["name"]] + ([parts[1]] if len(parts) > 1 else [])
+                for key in keys:
+                    by_pool = self.by_matchday.setdefault(key, {})
+                    by_pool.setdefault(matchday.get("pool"), []).extend(found)
+
+        # Index de dates : positions des matchs datés, dans l'ordre des dates
+        dated = [pos for pos, match in enumerate(self.matches) if match.get("date")]
+        self.dates = [self.matches[pos]["date"] for pos in dated]
+        self.date_positions = dated
+
+    # --- Requêtes ---------------------------------------------------------
+
+    def get(self, positions):
+        return [self.matches[pos] for pos in positions]
+
+    def team_positions(self, team):
+        """Positions des matchs d'une équipe (nom, variante d'écriture ou UUID)"""
+        if team in self.by_team_id:
+            return self.by_team_id[team]
+        return self.by_team.get(normalize_team_name(team), [])
+
+    def team_matches(self, team, status=None):
+        matches = self.get(self.team_positions(team))
+        if status:
+            matches = [m for m in matches if m.get("status") == status]
+        return matches
+
+    def next_matches(self, team, n=5, after=None):
+        """Les `n` prochains matchs à jouer d'une équipe, à partir de `after` (défaut: aujourd'hui)"""
+        after = after or date.today().isoformat()
+        upcoming = [
+            m for m in self.team_matches(team, status="upcoming")
+            if (m.get("date") or "9999-99-99") >= after
+        ]
+        return upcoming[:n]
+
+    def matchday_results(self, matchday, status="completed", pool=None):
+        """Matchs d'une journée ("03" ou "Journée 03"), terminés par défaut
+
+        Sans `pool`, la journée de toutes les poules, dans l'ordre des dates.
+        """
+        by_pool = self.by_matchday.get(matchday, {})
+        if pool is not None:
+            positions = by_pool.get(pool, [])
+        else:
+            positions = sorted(pos for found in by_pool.values() for pos in found)
+        matches = self.get(positions)
+        if status:
+            matches = [m for m in matches if m.get("status") == status]
+        return matches
+
+    def between(self, start, end, status=None):
+        """Matchs dont la date est comprise entre `start` et `end` (inclus, ISO)"""
+        lo = bisect_left(self.dates, start)
+        hi = bisect_right(self.dates, end)
+        matches = self.get(self.date_positions[lo:hi])
+        if status:
+            matches = [m for m in matches if m.get("status") == status]
+        return matches
+
+    def with_status(self, status):
+        return self.get(self.by_status.get(status, []))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requêtes sur le snapshot de matchs")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    next_parser = sub.add_parser("next", help="Prochains matchs d'une équipe")
+    next_parser.add_argument("team")
+    next_parser.add_argument("-n", type=int, default=5)
+
+    matchday_parser = sub.add_parser("matchday", help="Résultats d'une journée")
+    matchday_parser.add_argument("matchday")
+    matchday_parser.add_argument("--pool", default=None, help="Code de poule (ex: BFQ)")
+
+    between_parser = sub.add_parser("between", help="Matchs entre deux dates")
+    between_parser.add_argument("start")
+    between_parser.add_argument("end")
+    between_parser.add_argument("--status", default=None)
+
+    team_parser = sub.add_parser("team", help="Tous les matchs d'une équipe")
+    team_parser.add_argument("team")
+    team_parser.add_argument("--status", default=None)
+
+    args = parser.parse_args()
+    q = SnapshotQuery(args.data_dir)
+
+    if args.command == "next":
+        result = q.next_matches(args.team, args.n)
+    elif args.command == "matchday":
+        result = q.matchday_results(args.matchday, pool=args.pool)
+    elif args.command == "between":
+        result = q.between(args.start, args.end, args.status)
+    else:
+        result = q.team_matches(args.team, args.status)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# scripts/records.py
+import sys
+
+# Types d'enregistrements compacts pour les données extraites.
+#
+# Chaque type déclare ses champs dans `__slots__` (pas de __dict__ par
+# instance) ; les noms d'équipes sont internés pour n'exister qu'une fois en
+# mémoire quel que soit le nombre de matchs, et les horodatages sont ceux du
+# run (une seule chaîne partagée). La conversion en dict n'a lieu qu'à la
+# sérialisation via `to_dict()`.
+
+
+def intern_name(name):
+    """Interne un nom d'équipe (les chaînes vides ou None sont renvoyées telles quelles)"""
+    return sys.intern(name) if name else name
+
+
+class Record:
+    """Base commune : conversion dict et sérialisation compacte"""
+    __slots__ = ()
+
+    def to_dict(self):
+        """Convertit l'enregistrement en dict (format JSON historique)"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construit un enregistrement depuis un dict (ex: fichier JSON)"""
+        return cls(**{field: data.get(field) for field in cls.__slots__})
+
+    def __getitem__(self, key):
+        # Compatibilité avec le code qui manipule encore des dicts
+        return getattr(self, key)
+
+    def __reduce__(self):
+        # Repasse par le constructeur pour ré-interner les noms après pickle
+        return (self.__class__, tuple(getattr(self, field) for field in self.__slots__))
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.__slots__)
+
+    # Égalité par valeur sur des enregistrements modifiables (réhorodatage,
+    # résolution des identifiants d'équipes) : pas de hash, comme un dict
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class Team(Record):
+    __slots__ = ("id", "name", "created_at", "updated_at")
+
+    def __init__(self, id, name, created_at=None, updated_at=None):
+        self.id = id
+        self.name = intern_name(name)
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+class Standing(Record):
+    __slots__ = (
+        "id", "team_name", "rank", "points", "played", "wins", "losses",
+        "sets_won", "sets_lost", "points_for", "points_against", "ratio",
+        "created_at", "updated_at"
+    )
+
+    def __init__(self, id, team_name, rank=0, points=0, played=0, wins=0, losses=0,
+                 sets_won=0, sets_lost=0, points_for=0, points_against=0, ratio=0.0,
+                 created_at=None, updated_at=None):
+        self.id = id
+        self.team_name = intern_name(team_name)
+        self.rank = rank
+        self.points = points
+        self.played = played
+        self.wins = wins
+        self.losses = losses
+        self.sets_won = sets_won
+        self.sets_lost = sets_lost
+        self.points_for = points_for
+        self.points_against = points_against
+        self.ratio = ratio
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+class Match(Record):
+    __slots__ = (
+        "id", "match_id", "date", "time", "home_team", "away_team", "venue",
+        "home_sets", "away_sets", "score_detail", "sets", "winner", "status",
+        "created_at", "updated_at", "detail_url", "home_team_id", "away_team_id"
+    )
+
+    def __init__(self, id, match_id, date=None, time="", home_team="", away_team="",
+                 venue="", home_sets=None, away_sets=None, score_detail="", sets=(),
+                 winner=None, status="upcoming", created_at=None, updated_at=None,
+                 detail_url=None, home_team_id=None, away_team_id=None):
+        self.id = id
+        self.match_id = match_id
+        self.date = date
+        self.time = time
+        self.home_team = intern_name(home_team)
+        self.away_team = intern_name(away_team)
+        self.venue = intern_name(venue)
+        self.home_sets = home_sets
+        self.away_sets = away_sets
+        self.score_detail = score_detail
+        # Sets stockés en tuples (home, away) : bien plus compact qu'une liste de dicts
+        self.sets = tuple(
+            (s["home"], s["away"]) if isinstance(s, dict) else tuple(s)
+            for s in (sets or ())
+        )
+        self.winner = winner
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.detail_url = detail_url  # Lien relatif vers la feuille de match, s'il existe
+        self.home_team_id = home_team_id  # UUID résolu par team_index.TeamIndex
+        self.away_team_id = away_team_id
+
+    def to_dict(self):
+        data = Record.to_dict(self)
+        data["sets"] = [{"home": home, "away": away} for home, away in self.sets]
+        return data
+
+
+class Matchday(Record):
+    __slots__ = ("id", "name", "date", "match_ids", "created_at", "updated_at", "pool")
+
+    def __init__(self, id, name, date=None, match_ids=None, created_at=None, updated_at=None,
+                 pool=None):
+        self.id = id
+        self.name = name
+        self.date = date
+        self.match_ids = list(match_ids or [])
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.pool = pool  # Chaque poule a sa "Journée 01" : le nom seul n'identifie pas la journée
+
+
+def as_dict(record):
+    """Renvoie la forme dict d'un enregistrement (les dicts passent tels quels)"""
+    if isinstance(record, Record):
+        return record.to_dict()
+    return record
+
+
+def to_serializable(obj):
+    """Hook `default` de json.dump pour les enregistrements"""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    if isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
@@ -0,0 +1,42 @@
+# scripts/rules.py
+
+# Règles de classement partagées par le générateur de ligue, le frame
+# d'analyse et les projections : barème des points et départage.
+
+
+def match_points(sets_for, sets_against):
+    """Points au classement : 3 pour 3-0 / 3-1, 2 pour 3-2, 1 pour 2-3, 0 sinon"""
+    if sets_for > sets_against:
+        return 2 if sets_against == 2 else 3
+    return 1 if sets_for == 2 else 0
+
+
+def match_points_array(sets_for, sets_against):
+    """Version vectorisée (tableaux NumPy) de match_points"""
+    import numpy as np
+    sets_for = np.asarray(sets_for)
+    sets_against = np.asarray(sets_against)
+    return np.where(sets_for > sets_against,
+                    np.where(sets_against == 2, 2, 3),
+                    np.where(sets_for == 2, 1, 0))
+
+
+def ranking_key(points, wins, sets_won, sets_lost, points_for, points_against):
+    """Clé de tri croissante : points, victoires, quotient des sets, quotient des points"""
+    return (-points, -wins, -sets_won / max(sets_lost, 1), -points_for / max(points_against, 1))
+
+
+def ranking_order(points, wins, sets_won, sets_lost, points_for, points_against):
+    """Ordre de classement vectorisé : indices d'équipes du 1er au dernier (dernier axe)
+
+    Mêmes critères que `ranking_key` ; les tableaux sont diffusés entre eux,
+    par exemple (simulations, équipes) pour les points et (équipes,) pour
+    les points marqués.
+    """
+    import numpy as np
+    points, wins, sets_won, sets_lost, points_for, points_against = np.broadcast_arrays(
+        points, wins, sets_won, sets_lost, points_for, points_against
+    )
+    set_ratio = sets_won / np.maximum(sets_lost, 1)
+    point_ratio = points_for / np.maximum(points_against, 1)
+    return np.lexsort((-point_ratio, -set_ratio, -wins, -points), axis=-1)
@@ -1,27 +1,59 @@
 # scripts/scraper.py
 import requests
-from bs4 import BeautifulSoup
-import json
-import uuid
 from datetime import datetime
 from pathlib import Path
 import sys
-import time
+import argparse
+import pickle
 
 # Import des utilitaires
-from utils import generate_uuid, generate_team_uuid, get_timestamp, save_json, load_json, create_backup
+from utils import get_timestamp, save_json, load_json, create_backup, write_atomic, DATA_DIR
+from detail_crawler import DetailCrawler
+from http_cache import CachedSession, DEFAULT_TTL_RULES
+from events import diff_snapshots, EventPublisher, JsonLinesSink, WebhookSink
+from feeds import FeedGenerator
+from pipeline import Pipeline
+from parsing import parse_pages
+
+BASE_URL = "https://www.ffvbbeach.org/ffvbapp/resu/vbspo_calendrier.php"
+
+def calendar_url(saison, codent, poule):
+    """URL du calendrier d'une poule"""
+    return f"{BASE_URL}?saison={saison}&codent={codent}&poule={poule}"
 
 class VolleyballScraper:
-    def __init__(self):
-        self.base_url = "https://www.ffvbbeach.org/ffvbapp/resu/vbspo_calendrier.php?saison=2025/2026&codent=PTFL59&poule=BFQ"
-        self.session = requests.Session()
+    def __init__(self, saison="2025/2026", codent="PTFL59", poule="BFQ",
+                 use_cache=False, offline=False, cache_ttl=None, data_dir=None):
+        self.saison = saison
+        self.codent = codent
+        self.poule = poule
+        self.base_url = self.build_url(poule)
+        
+        # Configuration des dossiers
+        self.data_dir = Path(data_dir) if data_dir else DATA_DIR
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Session HTTP ; cache disque des réponses seulement sur demande
+        # (développement, retraitement, rejeu hors-ligne) : un run de
+        # production va toujours chercher les pages à jour
+        if use_cache or offline:
+            ttl_rules = None
+            if cache_ttl is not None:
+                ttl_rules = [(r"vbspo_calendrier\.php", cache_ttl)] + DEFAULT_TTL_RULES[1:]
+            self.session = CachedSession(
+                self.data_dir / "http_cache",
+                ttl_rules=ttl_rules,
+                offline=offline
+            )
+        else:
+            self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
-        
-        # Configuration des dossiers
-        self.data_dir = Path("../data")
-        self.data_dir.mkdir(exist_ok=True)
+        self._pages = {}  # Pages déjà téléchargées pendant ce run (url -> octets)
+        self.section_cache_path = self.data_dir / ".section_cache.pkl"
+        self.section_cache = self.load_section_cache()  # poule -> {hash de section: (journée, matchs)}
+        self.run_timestamp = get_timestamp()  # Horodatage unique partagé par tous les enregistrements
         
         # Données extraites
         self.matchdays = []  # Nouveau : journées de match
@@ -40,221 +72,32 @@ class VolleyballScraper:
             # Fallback to basic message if encoding still fails
             print(f"[{timestamp}] {level}: Logging message")
     
-    def scrape_standings(self):
-        """Extrait les classements du tableau de classement"""
-        self.log("Début de l'extraction des classements...")
-        
-        try:
-            response = self.session.get(self.base_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            standings = []
-            
-            # Trouver le tableau de classement
-            tables = soup.find_all('table', cellspacing='1', cellpadding='2')
-            
-            for table in tables:
-                rows = table.find_all('tr')
-                
-                # Vérifier si c'est le tableau de classement
-                header_row = rows[0] if rows else None
-                if header_row and any('Points' in cell.get_text() for cell in header_row.find_all('td')):
-                    
-                    self.log(f"Tableau de classement trouvé avec {len(rows)} lignes")
-                    
-                    # Parser chaque ligne d'équipe
-                    for row in rows[1:]:
-                        if row.get('bgcolor') == '#EEEEF8':
-                            standing = self.parse_standing_row(row)
-                            if standing:
-                                standings.append(standing)
-                    break
-            
-            self.standings = standings
-            self.log(f"{len(standings)} équipes extraites des classements")
-            return standings
-            
-        except Exception as e:
-            self.log(f"Erreur lors de l'extraction des classements: {e}", "ERROR")
-            return []
-    
-    def parse_standing_row(self, row):
-        """Parse une ligne de classement"""
-        cells = row.find_all('td')
-        if len(cells) < 19:
-            return None
-        
-        try:
-            team_name = cells[1].get_text(strip=True)
-            
-            # Validation et parsing sécurisés
-            rank_text = cells[0].get_text(strip=True).replace('.', '')
-            points_text = cells[2].get_text(strip=True)
-            played_text = cells[3].get_text(strip=True)
-            wins_text = cells[4].get_text(strip=True)
-            losses_text = cells[5].get_text(strip=True)
-            sets_won_text = cells[13].get_text(strip=True)
-            sets_lost_text = cells[14].get_text(strip=True)
-            points_for_text = cells[16].get_text(strip=True)
-            points_against_text = cells[17].get_text(strip=True)
-            ratio_text = cells[18].get_text(strip=True)
-            
-            # Vérifier que les champs ne sont pas vides
-            if not team_name or not rank_text:
-                return None
-                
-            return {
-                "id": generate_team_uuid(team_name),
-                "team_name": team_name,
-                "rank": int(rank_text) if rank_text else 0,
-                "points": int(points_text) if points_text else 0,
-                "played": int(played_text) if played_text else 0,
-                "wins": int(wins_text) if wins_text else 0,
-                "losses": int(losses_text) if losses_text else 0,
-                "sets_won": int(sets_won_text) if sets_won_text else 0,
-                "sets_lost": int(sets_lost_text) if sets_lost_text else 0,
-                "points_for": int(points_for_text) if points_for_text else 0,
-                "points_against": int(points_against_text) if points_against_text else 0,
-                "ratio": float(ratio_text) if ratio_text else 0.0,
-                "created_at": get_timestamp(),
-                "updated_at": get_timestamp()
-            }
-        except (ValueError, IndexError) as e:
-            self.log(f"Erreur parsing ligne classement: {e}", "ERROR")
-            return None
-    
-    def scrape_matches(self):
-        """Extrait les matchs du calendrier"""
-        self.log("Début de l'extraction des matchs...")
-        
-        try:
-            response = self.session.get(self.base_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            matches = []
-            
-            # Trouver les tableaux de matchs
-            tables = soup.find_all('table', cellspacing='1', cellpadding='2')
-            
-            for table in tables:
-                rows = table.find_all('tr')
-                
-                # Parser les lignes de matchs
-                for row in rows:
-                    if row.get('bgcolor') == '#EEEEF8':
-                        match = self.parse_match_row(row)
-                        if match:
-                            matches.append(match)
-            
-            self.matches = matches
-            self.log(f"{len(matches)} matchs extraits")
-            return matches
-            
-        except Exception as e:
-            self.log(f"Erreur lors de l'extraction des matchs: {e}", "ERROR")
-            return []
-    
-    def parse_match_row(self, row):
-        """Parse une ligne de match"""
-        cells = row.find_all('td')
-        if len(cells) < 10:
-            return None
-        
-        try:
-            match_id = cells[0].get_text(strip=True)
-            if not match_id or 'BFQ' not in match_id:
-                return None
-            
-            date_text = cells[1].get_text(strip=True)
-            time_text = cells[2].get_text(strip=True)
-            home_team = cells[3].get_text(strip=True)
-            away_team = cells[5].get_text(strip=True)
-            
-            # Extraire les scores
-            home_sets_text = cells[6].get_text(strip=True)
-            away_sets_text = cells[7].get_text(strip=True)
-            score_detail = cells[8].get_text(strip=True) if len(cells) > 8 else ""
-            venue = cells[9].get_text(strip=True) if len(cells) > 9 else ""
-            
-            # Déterminer le gagnant
-            winner = None
-            if home_sets_text and away_sets_text:
-                home_sets = int(home_sets_text)
-                away_sets = int(away_sets_text)
-                if home_sets > away_sets:
-                    winner = "home"
-                elif away_sets > home_sets:
-                    winner = "away"
-                else:
-                    winner = "draw"
-            
-            # Parser les scores de sets
-            sets = []
-            if score_detail:
-                set_scores = score_detail.split(', ')
-                for set_score in set_scores:
-                    if ':' in set_score:
-                        home_score, away_score = set_score.split(':')
-                        sets.append({
-                            "home": int(home_score.strip()),
-                            "away": int(away_score.strip())
-                        })
-            
-            # Convertir la date
-            match_date = None
-            if date_text and '/' in date_text:
-                day, month, year = date_text.split('/')
-                match_date = f"20{year}-{month.zfill(2)}-{day.zfill(2)}"
-            
-            return {
-                "id": generate_uuid(),
-                "match_id": match_id,
-                "date": match_date,
-                "time": time_text,
-                "home_team": home_team,
-                "away_team": away_team,
-                "venue": venue,
-                "home_sets": int(home_sets_text) if home_sets_text else None,
-                "away_sets": int(away_sets_text) if away_sets_text else None,
-                "score_detail": score_detail,
-                "sets": sets,
-                "winner": winner,
-                "status": "completed" if winner else "upcoming",
-                "created_at": get_timestamp(),
-                "updated_at": get_timestamp()
-            }
-        except (ValueError, IndexError) as e:
-            self.log(f"Erreur parsing ligne match: {e}", "ERROR")
-            return None
-    
-    def extract_teams_from_standings(self):
-        """Extrait la liste des équipes depuis les classements"""
-        teams = []
-        
-        for standing in self.standings:
-            team = {
-                "id": standing["id"],
-                "name": standing["team_name"],
-                "created_at": standing["created_at"],
-                "updated_at": standing["updated_at"]
-            }
-            teams.append(team)
-        
-        self.teams = teams
-        self.log(f"{len(teams)} équipes générées depuis les classements")
-        return teams
+    def build_url(self, poule):
+        """Construit l'URL du calendrier d'une poule"""
+        return calendar_url(self.saison, self.codent, poule)
     
+    def fetch_page(self, url=None):
+        """Télécharge une page calendrier et renvoie ses octets bruts"""
+        url = url or self.base_url
+        if url in self._pages:
+            return self._pages[url]
+
+        response = self.session.get(url)
+        response.raise_for_status()
+        self._pages[url] = response.content
+        return response.content
+
     def create_backups(self):
         """Crée des backups des fichiers existants"""
         self.log("Création des backups...")
         
-        files_to_backup = ['teams.json', 'matches.json', 'standings.json']
+        # Un seul horodatage par run : les backups d'un même run forment un snapshot
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        files_to_backup = ['teams.json', 'matches.json', 'matchdays.json', 'standings.json']
         for filename in files_to_backup:
             filepath = self.data_dir / filename
             if filepath.exists():
-                backup_path = create_backup(str(filepath))
+                backup_path = create_backup(str(filepath), timestamp)
                 if backup_path:
                     self.log(f"Backup créé: {backup_path}")
     
@@ -276,25 +119,80 @@ class VolleyballScraper:
             save_json(data, str(filepath))
             self.log(f"{filename} sauvegardé ({len(data)} éléments)")
     
-    def scrape_all_data(self):
-        """Fonction principale de scraping"""
+    def publish_changes(self, previous, publisher):
+        """Publie les changements entre le snapshot précédent et le nouveau"""
+        events = diff_snapshots(
+            previous.get("matches"), self.matches,
+            previous.get("standings"), self.standings,
+            emitted_at=self.run_timestamp
+        )
+        publisher.publish(events)
+        self.log(f"{len(events)} événements publiés")
+        return events
+    
+    def crawl_details(self, max_workers=4):
+        """Télécharge les feuilles de match manquantes ou modifiées"""
+        self.log("Récupération des feuilles de match...")
+        crawler = DetailCrawler(
+            self.session,
+            data_dir=self.data_dir,
+            season=self.saison,
+            base_url=BASE_URL,
+            max_workers=max_workers,
+            logger=self.log
+        )
+        return crawler.run(self.matches)
+    
+    def scrape_all_data(self, poules=None, max_workers=None, details=False, publisher=None,
+                        feeds=False, arrow=False, backend=None, queue_size=4):
+        """Fonction principale de scraping
+
+        Téléchargement, parsing, résolution des équipes et synchro (si un
+        `backend` est fourni) tournent en étages concurrents (`Pipeline`) ;
+        le snapshot n'est écrit que si toutes les poules ont abouti.
+        """
         self.log("=== DÉBUT DU SCRAPING VOLLEY-CYSOING ===")
         
+        self.run_timestamp = get_timestamp()
+        self.pipeline = Pipeline(self, backend=backend, max_workers=max_workers, queue_size=queue_size)
+        
         try:
             # 1. Créer les backups
             self.create_backups()
             
-            # 2. Extraire les classements
-            self.scrape_standings()
-            
-            # 3. Extraire les matchs
-            self.scrape_matchdays_and_matches()
-            
-            # 4. Extraire les équipes depuis les classements
-            self.extract_teams_from_standings()
-            
-            # 5. Sauvegarder toutes les données
-            self.save_all_data()
+            # Snapshot précédent, pour les événements de changement
+            previous = {}
+            if publisher:
+                previous = {
+                    "matches": load_json(str(self.data_dir / "matches.json")),
+                    "standings": load_json(str(self.data_dir / "standings.json"))
+                }
+            
+            # 2 à 5. Classements, journées et matchs de chaque poule (seules les
+            # journées modifiées depuis le run précédent sont re-parsées),
+            # identités d'équipes, synchro au fil de l'eau, puis sauvegarde
+            if backend is not None:
+                with backend:
+                    self.pipeline.run(poules or [self.poule])
+            else:
+                self.pipeline.run(poules or [self.poule])
+            
+            # 5a. Publier les changements (optionnel)
+            if publisher:
+                self.publish_changes(previous, publisher)
+            
+            # 5b. Flux calendrier par équipe et par poule (optionnel, incrémental)
+            if feeds:
+                FeedGenerator(self.data_dir, logger=self.log).run(self.matches)
+            
+            # 5c. Export Arrow/Parquet du nouveau snapshot (optionnel, incrémental)
+            if arrow:
+                from arrow_export import ArrowExporter
+                ArrowExporter(self.data_dir, season=self.saison, logger=self.log).export()
+            
+            # 5d. Feuilles de match (optionnel)
+            if details:
+                self.crawl_details()
             
             # 6. Rapport final
             self.log("=== RAPPORT FINAL ===")
@@ -310,186 +208,157 @@ class VolleyballScraper:
         except Exception as e:
             self.log(f"❌ Erreur lors du scraping: {str(e)}", "ERROR")
             return False
-
-    def extract_date_from_day_name(self, day_text):
-        """Extrait une date approximative depuis le nom de la journée"""
-        try:
-            day_number = day_text.split(' ')[1]
-            date_mapping = {
-                "01": "2025-10-04",
-                "02": "2025-10-18", 
-                "03": "2025-11-15",
-                "04": "2025-11-29",
-                "05": "2025-12-06"
-            }
-            return date_mapping.get(day_number, f"2025-01-{day_number.zfill(2)}")
-        except:
-            return "2025-01-01"
-
-    def scrape_matchdays_and_matches(self):
-        """Extrait les journées et les matchs du calendrier"""
-        self.log("Début de l'extraction des journées et matchs...")
         
+        finally:
+            self.pipeline.log_report()
+            self.session.close()
+
+    def load_section_cache(self):
+        """Charge le cache des sections de calendrier déjà parsées"""
+        if not self.section_cache_path.exists():
+            return {}
         try:
-            response = self.session.get(self.base_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            matchdays = []
-            matches = []
-            current_matchday = None
-            
-            # Trouver tous les tableaux
-            all_tables = soup.find_all('table')
-            
-            # Le tableau des matchs est le tableau 3 (index 3)
-            if len(all_tables) > 3:
-                match_table = all_tables[3]
-                rows = match_table.find_all('tr')
-                
-                for row in rows:
-                    # Vérifier si c'est une ligne d'en-tête de journée
-                    header_cells = row.find_all('td', {'background': '../images/bkrg.gif'})
-                    if header_cells and 'Journée' in header_cells[0].get_text():
-                        # Sauvegarder la journée précédente si elle existe
-                        if current_matchday:
-                            matchdays.append(current_matchday)
-                        
-                        # Créer une nouvelle journée
-                        day_text = header_cells[0].get_text(strip=True)
-                        self.log(f"Nouvelle journée trouvée: {day_text}")
-                        
-                        current_matchday = {
-                            "id": generate_uuid(),
-                            "name": day_text,
-                            "date": self.extract_date_from_day_name(day_text),
-                            "match_ids": [],
-                            "created_at": get_timestamp(),
-                            "updated_at": get_timestamp()
-                        }
-                    
-                    # Vérifier si c'est une ligne de match
-                    elif row.get('bgcolor') == '#EEEEF8':
-                        match = self.parse_match_row(row)
-                        if match:
-                            matches.append(match)
-                            # Ajouter l'ID du match à la journée courante
-                            if current_matchday:
-                                current_matchday["match_ids"].append(match["match_id"])
-                
-                # Ajouter la dernière journée
-                if current_matchday:
-                    matchdays.append(current_matchday)
-            
-            self.matchdays = matchdays
-            self.matches = matches
-            self.log(f"{len(matchdays)} journées et {len(matches)} matchs extraits")
-            return matchdays, matches
-            
+            with open(self.section_cache_path, 'rb') as f:
+                return pickle.load(f)
         except Exception as e:
-            self.log(f"Erreur lors de l'extraction des journées et matchs: {e}", "ERROR")
-            return [], []
-
-def main():
-    """Fonction principale"""
-    scraper = VolleyballScraper()
-    success = scraper.scrape_all_data()
+            self.log(f"Cache de sections illisible, re-parsing complet: {e}", "WARNING")
+            return {}
     
-    if success:
-        print("\nScraping termine avec succes!")
-        print("Prochaines etapes:")
-        print("  1. Demarrer le backoffice: cd backoffice && npm start")
-        print("  2. Acceder a http://localhost:3001")
-        print(" 3. Lancer le scraping via l'interface")
-        print(" 4. Demarrer le front-end: cd frontend && npm run dev")
-        print(" 5. Acceder a http://localhost:3000")
-    else:
-        print("\nOperation echouee - verifiez les erreurs ci-dessus")
-        sys.exit(1)
-
-    def extract_date_from_day_name(self, day_text):
-        """Extrait une date approximative depuis le nom de la journée"""
-        try:
-            day_number = day_text.split(' ')[1]
-            date_mapping = {
-                "01": "2025-10-04",
-                "02": "2025-10-18", 
-                "03": "2025-11-15",
-                "04": "2025-11-29",
-                "05": "2025-12-06"
-            }
-            return date_mapping.get(day_number, f"2025-01-{day_number.zfill(2)}")
-        except:
-            return "2025-01-01"
+    def save_section_cache(self):
+        write_atomic(self.section_cache_path,
+                     pickle.dumps(self.section_cache, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    def page_for(self, poule, url, content):
+        """Page à confier au parsing, avec les sections connues de cette poule"""
+        return {
+            "key": url,
+            "poule": poule,
+            "content": content,
+            "timestamp": self.run_timestamp,
+            "section_cache": self.section_cache.get(poule, {})
+        }
+    
+    def remember_sections(self, result):
+        """Met à jour le cache de sections avec le résultat d'un parsing"""
+        if "section_cache" not in result:
+            return
+        self.section_cache[result["poule"]] = result["section_cache"]
+        reparsed = result.get("sections_reparsed")
+        if reparsed is not None:
+            self.log(f"Poule {result['poule']}: {reparsed}/{len(result['section_cache'])} "
+                     f"journées re-parsées")
+    
+    def scrape_pools(self, poules, max_workers=None):
+        """Extrait plusieurs poules : téléchargement séquentiel, parsing en parallèle
 
-    def scrape_matchdays_and_matches(self):
-        """Extrait les journées et les matchs du calendrier"""
-        self.log("Début de l'extraction des journées et matchs...")
+        Les pages sont téléchargées dans le processus principal puis confiées
+        brutes (octets) au pool de parsing ; les résultats sont agrégés au fur
+        et à mesure de leur retour. Si une poule ne peut pas être téléchargée,
+        rien n'est renvoyé : un snapshot sans elle supprimerait ses classements
+        à la synchro suivante.
+        """
+        self.log(f"Extraction de {len(poules)} poules...")
         
-        try:
-            response = self.session.get(self.base_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            matchdays = []
-            matches = []
-            current_matchday = None
-            
-            # Trouver tous les tableaux
-            all_tables = soup.find_all('table')
-            
-            # Le tableau des matchs est le tableau 3 (index 3)
-            if len(all_tables) > 3:
-                match_table = all_tables[3]
-                rows = match_table.find_all('tr')
-                
-                for row in rows:
-                    # Vérifier si c'est une ligne d'en-tête de journée
-                    header_cells = row.find_all('td', {'background': '../images/bkrg.gif'})
-                    if header_cells and 'Journée' in header_cells[0].get_text():
-                        # Sauvegarder la journée précédente si elle existe
-                        if current_matchday:
-                            matchdays.append(current_matchday)
-                        
-                        # Créer une nouvelle journée
-                        day_text = header_cells[0].get_text(strip=True)
-                        self.log(f"Nouvelle journée trouvée: {day_text}")
-                        
-                        current_matchday = {
-                            "id": generate_uuid(),
-                            "name": day_text,
-                            "date": self.extract_date_from_day_name(day_text),
-                            "match_ids": [],
-                            "created_at": get_timestamp(),
-                            "updated_at": get_timestamp()
-                        }
-                    
-                    # Vérifier si c'est une ligne de match
-                    elif row.get('bgcolor') == '#EEEEF8':
-                        match = self.parse_match_row(row)
-                        if match:
-                            matches.append(match)
-                            # Ajouter l'ID du match à la journée courante
-                            if current_matchday:
-                                current_matchday["match_ids"].append(match["match_id"])
-                
-                # Ajouter la dernière journée
-                if current_matchday:
-                    matchdays.append(current_matchday)
-            
-            self.matchdays = matchdays
-            self.matches = matches
-            self.log(f"{len(matchdays)} journées et {len(matches)} matchs extraits")
-            return matchdays, matches
-            
-        except Exception as e:
-            self.log(f"Erreur lors de l'extraction des journées et matchs: {e}", "ERROR")
-            return [], []
+        pages, failed = [], []
+        for poule in poules:
+            url = self.build_url(poule)
+            try:
+                pages.append(self.page_for(poule, url, self.fetch_page(url)))
+            except Exception as e:
+                self.log(f"Erreur lors du téléchargement de la poule {poule}: {e}", "ERROR")
+                failed.append(poule)
+        if failed:
+            raise RuntimeError(f"Téléchargement en échec pour les poules {', '.join(failed)}")
+        
+        standings, matchdays, matches = [], [], []
+        for result in parse_pages(pages, max_workers=max_workers):
+            self.remember_sections(result)
+            standings.extend(result["standings"])
+            matchdays.extend(result["matchdays"])
+            matches.extend(result["matches"])
+            self.log(f"Poule {result['poule']}: {len(result['matches'])} matchs, "
+                     f"{len(result['standings'])} équipes")
+        self.save_section_cache()
+        
+        self.standings = standings
+        self.matchdays = matchdays
+        self.matches = matches
+        self.log(f"{len(matchdays)} journées et {len(matches)} matchs extraits")
+        return standings, matchdays, matches
+
+def parse_args(argv=None):
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Scraping des calendriers FFVB")
+    parser.add_argument("--saison", default="2025/2026")
+    parser.add_argument("--codent", default="PTFL59")
+    parser.add_argument("--poule", action="append", dest="poules",
+                        help="Code de poule (répétable, défaut: BFQ)")
+    parser.add_argument("--poules-file", default=None,
+                        help="Fichier listant des codes de poule (un par ligne)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Nombre de processus de parsing (défaut: nombre de coeurs)")
+    parser.add_argument("--details", action="store_true",
+                        help="Récupérer aussi les feuilles de match des matchs terminés")
+    parser.add_argument("--offline", action="store_true",
+                        help="Rejouer uniquement depuis le cache HTTP (aucun accès réseau)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Utiliser le cache HTTP (développement, retraitement)")
+    parser.add_argument("--cache-ttl", type=int, default=None,
+                        help="Durée de vie (s) des pages calendrier en cache")
+    parser.add_argument("--events-file", default=None,
+                        help="Fichier JSON-lines où ajouter les événements de changement")
+    parser.add_argument("--webhook", action="append", default=[],
+                        help="URL de webhook recevant les événements (répétable)")
+    parser.add_argument("--feeds", action="store_true",
+                        help="Mettre à jour les flux calendrier (iCal/JSON) par équipe et par poule")
+    parser.add_argument("--arrow", action="store_true",
+                        help="Exporter le snapshot en Arrow IPC / Parquet (nécessite pyarrow)")
+    parser.add_argument("--sync", choices=["rest", "postgres"], default=None,
+                        help="Synchroniser chaque poule au fil de l'eau avec ce backend")
+    parser.add_argument("--dsn", default=None, help="DSN Postgres (avec --sync postgres)")
+    parser.add_argument("--queue-size", type=int, default=4,
+                        help="Taille des files entre étages du pipeline")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Fonction principale"""
-    scraper = VolleyballScraper()
-    success = scraper.scrape_all_data()
+    args = parse_args(argv)
+    poules = list(args.poules or [])
+    if args.poules_file:
+        with open(args.poules_file, 'r', encoding='utf-8') as f:
+            poules += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    poules = poules or ["BFQ"]
+    scraper = VolleyballScraper(
+        saison=args.saison,
+        codent=args.codent,
+        poule=poules[0],
+        use_cache=args.cache,
+        offline=args.offline,
+        cache_ttl=args.cache_ttl
+    )
+    
+    sinks = [JsonLinesSink(args.events_file)] if args.events_file else []
+    sinks += [WebhookSink(url) for url in args.webhook]
+    publisher = EventPublisher(sinks, logger=scraper.log) if sinks else None
+    
+    backend = None
+    if args.sync:
+        from final_sync import create_backend, load_env
+        load_env()
+        backend = create_backend(args.sync, args.dsn)
+    
+    success = scraper.scrape_all_data(
+        poules=poules,
+        max_workers=args.workers,
+        details=args.details,
+        publisher=publisher,
+        feeds=args.feeds,
+        arrow=args.arrow,
+        backend=backend,
+        queue_size=args.queue_size
+    )
+    if publisher:
+        publisher.close()
     
     if success:
         print("\nScraping termine avec succes!")
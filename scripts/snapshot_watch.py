@@ -0,0 +1,244 @@
+# scripts/snapshot_watch.py
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Import des utilitaires
+from utils import load_json, snapshot_path, write_atomic, DATA_DIR
+from final_sync import SYNC_TABLES, create_backend, load_env, sync_snapshot
+from sync_checkpoint import SyncCheckpoint
+
+# Masques inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0x00000800
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def watched_names():
+    """Fichiers de snapshot surveillés (variantes .json et .jsonl) -> table"""
+    names = {}
+    for table, filename, _, _, _, _ in SYNC_TABLES:
+        names[filename] = table
+        names[filename.replace('.json', '.jsonl')] = table
+    return names
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class InotifyWatcher:
+    """Événements inotify du dossier de données (Linux, via la libc)"""
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library("c")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if self.libc.inotify_add_watch(self.fd, str(directory).encode(), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch")
+
+    def wait(self, timeout):
+        """Noms de fichiers modifiés pendant au plus `timeout` secondes"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            names.add(data[offset:offset + length].rstrip(b"\0").decode('utf-8', 'replace'))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class StatPoller:
+    """Repli sans inotify : compare (taille, mtime) des fichiers surveillés"""
+
+    def __init__(self, directory, names, interval=1.0):
+        self.directory = Path(directory)
+        self.names = names
+        self.interval = interval
+        self.signatures = self.scan()
+
+    def scan(self):
+        signatures = {}
+        for name in self.names:
+            try:
+                stat = (self.directory / name).stat()
+                signatures[name] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                signatures[name] = None
+        return signatures
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            signatures = self.scan()
+            changed = {name for name in self.names if signatures[name] != self.signatures[name]}
+            self.signatures = signatures
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class SnapshotWatcher:
+    """Mode watch : synchronise automatiquement chaque nouveau snapshot publié
+
+    Les écritures du dossier de données sont suivies par inotify (sinon par
+    sondage des dates de modification). Une rafale d'écritures (le scraper
+    écrit plusieurs fichiers) est regroupée : la synchro part après
+    `debounce` secondes de calme, ou au plus tard après `max_delay`. Seules
+    les tables dont le contenu a réellement changé depuis la dernière synchro
+    réussie (hash SHA-256, conservé dans `.watch_state.json`) sont envoyées.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, backend="rest", dsn=None, chunk_size=500,
+                 debounce=1.0, max_delay=10.0, rescan=60.0, poll_interval=1.0,
+                 use_inotify=True, logger=print):
+        self.data_dir = Path(data_dir)
+        self.backend_name = backend
+        self.dsn = dsn
+        self.chunk_size = chunk_size
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.rescan = rescan
+        self.names = watched_names()
+        self.log = logger
+        self.state_path = self.data_dir / ".watch_state.json"
+        self.state = load_json(str(self.state_path)) or {"tables": {}}
+        self.checkpoint = SyncCheckpoint(self.data_dir / ".sync_checkpoint.json", logger=logger)
+
+        self.watcher = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self.watcher = InotifyWatcher(self.data_dir)
+                self.log("Surveillance du dossier de données via inotify")
+            except (OSError, AttributeError) as e:
+                self.log(f"inotify indisponible ({e}), repli sur le sondage")
+        if self.watcher is None:
+            self.watcher = StatPoller(self.data_dir, list(self.names), poll_interval)
+            self.log(f"Surveillance du dossier de données par sondage ({poll_interval}s)")
+
+    def changed_tables(self):
+        """Tables dont le fichier de snapshot diffère de la dernière synchro réussie"""
+        changed = {}
+        for table, filename, _, _, _, _ in SYNC_TABLES:
+            path = snapshot_path(self.data_dir, filename)
+            if not path.exists():
+                continue
+            digest = file_digest(path)
+            if self.state["tables"].get(table) != digest:
+                changed[table] = digest
+        return changed
+
+    def sync(self):
+        """Synchronise les tables modifiées ; renvoie leur liste"""
+        changed = self.changed_tables()
+        if not changed:
+            return []
+
+        tables = [table for table, _, _, _, _, _ in SYNC_TABLES if table in changed]
+        self.log(f"Snapshot modifié, synchronisation de: {', '.join(tables)}")
+        start = time.monotonic()
+        backend = create_backend(self.backend_name, self.dsn)
+        with backend:
+            sync_snapshot(backend, self.data_dir, self.chunk_size, self.checkpoint, tables=tables)
+
+        # Hashes enregistrés seulement après une synchro réussie
+        self.state["tables"].update(changed)
+        self.state["synced_at"] = time.time()
+        write_atomic(self.state_path, json.dumps(self.state, indent=2))
+        self.log(f"Synchronisation terminée en {time.monotonic() - start:.1f}s")
+        return tables
+
+    def relevant(self, names):
+        """Vrai si l'un des noms est un fichier de snapshot (ou son fichier temporaire d'écriture)"""
+        return any(
+            name in self.names or any(name.startswith(f".{watched}.") for watched in self.names)
+            for name in names
+        )
+
+    def wait_for_burst(self):
+        """Attend une écriture de snapshot puis la fin de la rafale (debounce)"""
+        if not self.relevant(self.watcher.wait(self.rescan)):
+            return False
+        first = time.monotonic()
+        while time.monotonic() - first < self.max_delay:
+            if not self.relevant(self.watcher.wait(self.debounce)):
+                break
+        return True
+
+    def run(self):
+        """Boucle principale (Ctrl+C pour arrêter)"""
+        self.log(f"Mode watch sur {self.data_dir}")
+        try:
+            while True:
+                try:
+                    self.sync()
+                except Exception as e:
+                    # Nouvel essai au prochain événement ou au prochain balayage
+                    self.log(f"Erreur de synchronisation: {e}")
+                self.wait_for_burst()
+        except KeyboardInterrupt:
+            self.log("Arrêt du mode watch")
+        finally:
+            self.watcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchro automatique des nouveaux snapshots (mode watch)")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--backend", choices=["rest", "postgres"], default="rest")
+    parser.add_argument("--dsn", default=None)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--debounce", type=float, default=1.0,
+                        help="Secondes de calme avant de lancer la synchro")
+    parser.add_argument("--max-delay", type=float, default=10.0,
+                        help="Délai maximal d'une rafale avant synchro forcée")
+    parser.add_argument("--rescan", type=float, default=60.0,
+                        help="Vérification périodique même sans événement (s)")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--no-inotify", action="store_true", help="Forcer le sondage")
+    args = parser.parse_args()
+
+    load_env()
+    SnapshotWatcher(
+        args.data_dir, backend=args.backend, dsn=args.dsn, chunk_size=args.chunk_size,
+        debounce=args.debounce, max_delay=args.max_delay, rescan=args.rescan,
+        poll_interval=args.poll_interval, use_inotify=not args.no_inotify
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
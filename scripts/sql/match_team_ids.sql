@@ -0,0 +1,11 @@
+-- Identifiants d'équipes dans les matchs (UUID du classement, cf. team_index.py)
+-- À exécuter une fois dans l'éditeur SQL Supabase (ou psql). Tant que ces
+-- colonnes n'existent pas, final_sync.py ne les envoie pas.
+
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS home_team_id UUID;
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS away_team_id UUID;
+CREATE INDEX IF NOT EXISTS matches_home_team_id_idx ON matches (home_team_id);
+CREATE INDEX IF NOT EXISTS matches_away_team_id_idx ON matches (away_team_id);
+
+-- Recharger le cache de schéma de PostgREST pour exposer les nouvelles colonnes
+NOTIFY pgrst, 'reload schema';
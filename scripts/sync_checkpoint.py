@@ -0,0 +1,92 @@
+# scripts/sync_checkpoint.py
+import hashlib
+import json
+from pathlib import Path
+
+# Import des utilitaires
+from utils import get_timestamp, load_json, write_atomic
+
+SNAPSHOT_FILES = ["matchdays.json", "matches.json", "standings.json"]
+
+
+def snapshot_hash(data_dir, filenames=SNAPSHOT_FILES):
+    """Hash SHA-256 du contenu des fichiers d'un snapshot (lecture par blocs)"""
+    digest = hashlib.sha256()
+    for filename in filenames:
+        # Variante JSON-lines comprise, si elle existe
+        for name in (filename, filename.replace('.json', '.jsonl')):
+            path = Path(data_dir) / name
+            if not path.exists():
+                continue
+            digest.update(name.encode('utf-8'))
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+class SyncCheckpoint:
+    """Journal durable de progression d'une synchronisation
+
+    Le journal (JSON, réécrit atomiquement à chaque acquittement) contient le
+    hash du snapshot en cours et, pour chaque table, l'offset du dernier lot
+    acquitté et le filigrane (clé de la dernière ligne écrite). Une relance
+    sur le même snapshot reprend après le dernier lot acquitté ; un nouveau
+    snapshot remplace proprement un run partiel.
+    """
+
+    def __init__(self, path, logger=print):
+        self.path = Path(path)
+        self.log = logger
+        self.state = load_json(str(self.path)) or {}
+
+    def save(self):
+        write_atomic(self.path, json.dumps(self.state, ensure_ascii=False, indent=2))
+
+    def begin(self, snapshot):
+        """Démarre (ou reprend) la synchronisation d'un snapshot ; renvoie True en cas de reprise"""
+        previous = self.state.get("snapshot_hash")
+        if previous == snapshot and not self.state.get("completed"):
+            self.log(f"Reprise de la synchronisation du snapshot {snapshot[:12]}")
+            return True
+
+        if previous and previous != snapshot and not self.state.get("completed"):
+            self.log(f"Run partiel du snapshot {previous[:12]} remplacé par {snapshot[:12]}")
+
+        self.state = {
+            "snapshot_hash": snapshot,
+            "started_at": get_timestamp(),
+            "completed": False,
+            "tables": {}
+        }
+        self.save()
+        return False
+
+    def table(self, name):
+        return self.state["tables"].setdefault(name, {"offset": 0, "done": False})
+
+    def offset(self, name):
+        """Nombre de lignes déjà acquittées pour cette table"""
+        return self.table(name)["offset"]
+
+    def is_done(self, name):
+        return self.table(name)["done"]
+
+    def ack(self, name, offset, watermark=None):
+        """Enregistre l'acquittement d'un lot (offset = lignes écrites au total)"""
+        entry = self.table(name)
+        entry.update({
+            "offset": offset,
+            "watermark": watermark,
+            "updated_at": get_timestamp()
+        })
+        self.save()
+
+    def complete_table(self, name):
+        self.table(name)["done"] = True
+        self.save()
+
+    def finish(self):
+        self.state["completed"] = True
+        self.state["completed_at"] = get_timestamp()
+        self.save()
@@ -0,0 +1,125 @@
+# scripts/team_index.py
+import argparse
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+# Import des utilitaires
+from utils import generate_team_uuid, load_json, write_atomic, DATA_DIR
+
+
+def normalize_team_name(name):
+    """Forme canonique d'un nom d'équipe pour les comparaisons
+
+    Majuscules, accents retirés, espaces multiples réduits et tirets sans
+    espaces : "Hellemmes - Lille  1" et "HELLEMMES-LILLE 1" sont identiques.
+    """
+    if not name:
+        return ""
+    text = unicodedata.normalize('NFKD', name)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"\s*-\s*", "-", text.upper())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TeamIndex:
+    """Index persistant des identités d'équipes (nom normalisé -> UUID)
+
+    L'UUID d'une équipe est celui du classement (`generate_team_uuid` sur le
+    nom exact) la première fois qu'elle est vue ; les variantes d'écriture
+    retombent ensuite sur le même UUID via le nom normalisé ou un alias
+    déclaré. L'index est conservé d'un run et d'une saison à l'autre dans
+    `team_index.json`.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        state = load_json(str(self.path)) or {}
+        self.teams = state.get("teams", {})      # team_id -> {"name", "seasons"}
+        self.names = state.get("names", {})      # nom normalisé -> team_id
+        self.aliases = state.get("aliases", {})  # alias normalisé -> team_id
+        self.dirty = False
+
+    def lookup(self, name):
+        """UUID connu pour ce nom (ou alias), sinon None"""
+        key = normalize_team_name(name)
+        return self.names.get(key) or self.aliases.get(key)
+
+    def register(self, name, team_id=None, season=None):
+        """Enregistre une équipe (ex: ligne de classement) et renvoie son UUID"""
+        key = normalize_team_name(name)
+        if not key:
+            return None
+
+        # Un UUID déjà attribué est conservé même si l'orthographe a dérivé,
+        # pour que les identifiants restent stables d'une saison à l'autre
+        team_id = self.lookup(name) or team_id or generate_team_uuid(name.strip())
+
+        if key not in self.names and key not in self.aliases:
+            self.names[key] = team_id
+            self.dirty = True
+        entry = self.teams.setdefault(team_id, {"name": name.strip(), "seasons": []})
+        if season and season not in entry["seasons"]:
+            entry["seasons"].append(season)
+            self.dirty = True
+        return team_id
+
+    def resolve(self, name, season=None):
+        """UUID d'une équipe de match, créé si l'équipe est inconnue"""
+        return self.lookup(name) or self.register(name, season=season)
+
+    def add_alias(self, alias, canonical_name):
+        """Déclare `alias` comme autre nom de l'équipe `canonical_name`
+
+        Si la variante avait déjà été enregistrée comme équipe à part (nom de
+        match inconnu résolu avant l'alias), elle est rattachée à l'équipe
+        canonique.
+        """
+        team_id = self.lookup(canonical_name) or self.register(canonical_name)
+        key = normalize_team_name(alias)
+        if self.names.get(key) not in (None, team_id):
+            del self.names[key]
+        self.aliases[key] = team_id
+        self.dirty = True
+        return team_id
+
+    def save(self):
+        if not self.dirty and self.path.exists():
+            return
+        state = {"teams": self.teams, "names": self.names, "aliases": self.aliases}
+        write_atomic(self.path, json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True))
+        self.dirty = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index des identités d'équipes")
+    parser.add_argument("--index", default=str(DATA_DIR / "team_index.json"),
+                        help="Fichier d'index (défaut: data/team_index.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    alias = sub.add_parser("alias", help="Rattacher une variante d'écriture à une équipe")
+    alias.add_argument("alias", help='Variante, ex: "HLM 1"')
+    alias.add_argument("canonical", help='Nom de l\'équipe, ex: "HELLEMMES-LILLE 1"')
+
+    lookup = sub.add_parser("lookup", help="Afficher l'UUID d'un nom d'équipe")
+    lookup.add_argument("name")
+    args = parser.parse_args()
+
+    index = TeamIndex(args.index)
+    if args.command == "alias":
+        if index.lookup(args.canonical) is None:
+            print(f"Attention: équipe inconnue, nouvel UUID créé pour {args.canonical}")
+        team_id = index.add_alias(args.alias, args.canonical)
+        index.save()
+        print(f"{args.alias} -> {index.teams[team_id]['name']} ({team_id})")
+    else:
+        team_id = index.lookup(args.name)
+        if team_id is None:
+            print(f"{args.name}: inconnue")
+        else:
+            print(f"{args.name} -> {index.teams.get(team_id, {}).get('name', '?')} ({team_id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+# scripts/tests/conftest.py
+import sys
+from pathlib import Path
+
+# Les scripts sont des modules à plat (`from utils import ...`) : rendre
+# scripts/ importable quel que soit le répertoire de lancement de pytest
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
@@ -0,0 +1,90 @@
+# scripts/tests/test_arrow_export.py
+import os
+import shutil
+
+from arrow_export import ArrowExporter, read_table
+from scraper import VolleyballScraper
+from utils import save_json
+
+TIMESTAMP = "2025-10-04T12:00:00Z"
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def snapshot(home_sets=3):
+    matches = [{
+        "id": "m1", "match_id": "BFQ001", "date": "2025-10-04", "time": "20:00",
+        "home_team": "CYSOING 1", "away_team": "LILLE 1", "home_sets": home_sets, "away_sets": 1,
+        "status": "completed", "created_at": TIMESTAMP, "updated_at": TIMESTAMP,
+    }]
+    return {
+        "teams.json": [{"id": "t1", "name": "CYSOING 1", "created_at": TIMESTAMP, "updated_at": TIMESTAMP},
+                       {"id": "t2", "name": "LILLE 1", "created_at": TIMESTAMP, "updated_at": TIMESTAMP}],
+        "matches.json": matches,
+        "matchdays.json": [{"id": "d1", "name": "Journée 01", "date": "2025-10-04",
+                            "match_ids": ["BFQ001"], "pool": "BFQ"}],
+        "standings.json": [{"id": "t1", "team_name": "CYSOING 1", "rank": 1},
+                           {"id": "t2", "team_name": "LILLE 1", "rank": 2}],
+    }
+
+
+def write_snapshot(data_dir, files, mtime):
+    for filename, rows in files.items():
+        save_json(rows, str(data_dir / filename))
+        os.utime(data_dir / filename, (mtime, mtime))
+
+
+def exporter(data_dir):
+    return ArrowExporter(data_dir, logger=quiet)
+
+
+def snapshot_ids(data_dir, table="matches"):
+    return set(read_table(data_dir / "arrow", table, columns=["snapshot_id"])["snapshot_id"].to_pylist())
+
+
+def test_backup_of_an_exported_snapshot_is_not_exported_again(tmp_path):
+    write_snapshot(tmp_path, snapshot(), 1_760_000_000)
+    [live] = exporter(tmp_path).export()
+
+    # Début du run suivant : backups des 4 fichiers, puis nouveau snapshot courant
+    scraper = VolleyballScraper(data_dir=tmp_path)
+    scraper.log = quiet
+    scraper.create_backups()
+    backups = sorted(path.name for path in (tmp_path / "backups").iterdir())
+    assert [name.split("_", 1)[0] for name in backups] == [
+        "matchdays.json", "matches.json", "standings.json", "teams.json"
+    ]
+    assert len({name.split("_", 1)[1] for name in backups}) == 1
+    assert exporter(tmp_path).export() == []
+
+    write_snapshot(tmp_path, snapshot(home_sets=2), 1_760_600_000)
+    [newer] = exporter(tmp_path).export()
+    assert newer != live
+    for table in ("teams", "matches", "matchdays", "standings"):
+        assert snapshot_ids(tmp_path, table) == {live, newer}
+
+
+def test_backups_of_one_run_spanning_seconds_form_one_snapshot(tmp_path):
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    write_snapshot(tmp_path, snapshot(), 1_760_000_000)
+    # Ancien run (sans matchdays) dont les backups sont à cheval sur deux secondes
+    for filename, stamp in [("teams.json", "20251004_120059"), ("matches.json", "20251004_120059"),
+                            ("standings.json", "20251004_120100")]:
+        shutil.copy2(tmp_path / filename, backup_dir / f"{filename}_{stamp}.json")
+    # Run suivant : backups des 4 tables
+    for filename in ("teams.json", "matches.json", "matchdays.json", "standings.json"):
+        shutil.copy2(tmp_path / filename, backup_dir / f"{filename}_20251005_120000.json")
+
+    groups = exporter(tmp_path).snapshots()
+    assert sorted(sorted(files) for files, current in groups.values() if not current) == [
+        ["matchdays", "matches", "standings", "teams"], ["matches", "standings", "teams"]
+    ]
+
+    # L'ancien run est exporté, le suivant seulement pour ses matchdays encore
+    # jamais vues ; le snapshot courant, identique au dernier backup, est ignoré
+    assert exporter(tmp_path).export() == ["20251004_120059", "20251005_120000"]
+    assert exporter(tmp_path).export() == []
+    assert snapshot_ids(tmp_path, "matchdays") == {"20251005_120000"}
@@ -0,0 +1,89 @@
+# scripts/tests/test_detail_crawler.py
+import hashlib
+
+from detail_crawler import DetailCrawler
+
+BASE_URL = "https://www.ffvbbeach.org/ffvbapp/resu/vbspo_calendrier.php"
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Session en mémoire : renvoie `pages[url]` et note chaque requête"""
+
+    def __init__(self, pages=None):
+        self.pages = pages or {}
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        return FakeResponse(self.pages.get(url, f"<html>{url}</html>".encode()))
+
+
+def match(number, status="completed", home_sets=3, detail_url=None):
+    return {"match_id": f"BFQ{number:03d}", "status": status, "home_sets": home_sets, "away_sets": 1,
+            "score_detail": "25:20, 25:21, 20:25, 25:18",
+            "detail_url": detail_url or f"vbspo_fdm.php?saison=2025/2026&codmatch=BFQ{number:03d}"}
+
+
+def crawler(tmp_path, session, season="2025/2026"):
+    return DetailCrawler(session, data_dir=tmp_path, season=season, base_url=BASE_URL,
+                         max_workers=2, min_interval=0, logger=quiet)
+
+
+def test_frontier_is_deduplicated_by_url(tmp_path):
+    c = crawler(tmp_path, FakeSession())
+    shared = "vbspo_fdm.php?saison=2025/2026&codmatch=BFQ001"
+    assert c.discover([match(1), match(2, detail_url=shared), match(3)]) == 2
+    assert c.discover([match(1), match(3)]) == 0
+    assert list(c.frontier) == [
+        "https://www.ffvbbeach.org/ffvbapp/resu/vbspo_fdm.php?saison=2025/2026&codmatch=BFQ001",
+        "https://www.ffvbbeach.org/ffvbapp/resu/vbspo_fdm.php?saison=2025/2026&codmatch=BFQ003",
+    ]
+    # Matchs à venir ou sans lien : jamais dans la frontière
+    assert c.discover([match(4, status="upcoming"), dict(match(5), detail_url=None)]) == 0
+
+
+def test_unchanged_completed_matches_are_not_fetched_again(tmp_path):
+    session = FakeSession()
+    c = crawler(tmp_path, session)
+    assert c.run([match(1), match(2)]) == 2
+
+    # Nouveau run (index relu depuis le disque) : rien n'a changé
+    again = crawler(tmp_path, session)
+    assert again.run([match(1), match(2)]) == 0
+    assert len(session.requested) == 2
+
+    # Score corrigé sur BFQ002 : sa feuille seule est re-téléchargée
+    assert again.run([match(1), dict(match(2), score_detail="25:20, 25:21, 20:25, 25:17")]) == 1
+    assert session.requested[-1].endswith("codmatch=BFQ002")
+
+
+def test_pages_are_stored_once_by_content(tmp_path):
+    sheet = b"<html>Feuille de match</html>"
+    urls = [f"https://www.ffvbbeach.org/ffvbapp/resu/vbspo_fdm.php?saison=2025/2026&codmatch=BFQ00{i}"
+            for i in (1, 2)]
+    session = FakeSession({url: sheet for url in urls})
+    c = crawler(tmp_path, session)
+    c.run([match(1), match(2)])
+
+    digest = hashlib.sha256(sheet).hexdigest()
+    objects = sorted(p.relative_to(tmp_path) for p in (tmp_path / "details").rglob("*.html"))
+    assert [str(p) for p in objects] == [f"details/objects/{digest[:2]}/{digest}.html"]
+    assert {e["hash"] for e in c.cache.index["2025/2026"].values()} == {digest}
+    assert c.cache.load("2025/2026", "BFQ002") == sheet
+
+    # L'index est rangé par saison : une autre saison ne voit pas ces feuilles
+    other = crawler(tmp_path, session, season="2024/2025")
+    assert other.cache.load("2024/2025", "BFQ001") is None
+    assert other.discover([match(1)]) == 1
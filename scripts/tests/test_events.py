@@ -0,0 +1,124 @@
+# scripts/tests/test_events.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from events import WebhookSink, diff_snapshots
+
+
+class WebhookReceiver:
+    """Webhook local : enregistre les lots reçus et répond selon un script de statuts"""
+
+    def __init__(self, statuses=None):
+        self.statuses = list(statuses or [])
+        self.batches = []
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                receiver.batches.append(json.loads(self.rfile.read(length))["events"])
+                status = receiver.statuses.pop(0) if receiver.statuses else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def events(count):
+    return [{"id": str(i), "type": "rank_changed"} for i in range(count)]
+
+
+def test_webhook_posts_in_batches():
+    with WebhookReceiver() as receiver:
+        WebhookSink(receiver.url, batch_size=2, backoff=0).send(events(5))
+    assert [[e["id"] for e in batch] for batch in receiver.batches] == [["0", "1"], ["2", "3"], ["4"]]
+
+
+@pytest.mark.parametrize("statuses", [[503], [429], [500, 502, 429]])
+def test_webhook_retries_transient_errors_then_succeeds(statuses):
+    with WebhookReceiver(statuses + [200]) as receiver:
+        WebhookSink(receiver.url, max_retries=3, backoff=0).send(events(3))
+    assert len(receiver.batches) == len(statuses) + 1
+    assert all(batch == receiver.batches[0] for batch in receiver.batches)
+
+
+def test_webhook_gives_up_after_max_retries():
+    with WebhookReceiver([503] * 10) as receiver:
+        with pytest.raises(requests.HTTPError):
+            WebhookSink(receiver.url, max_retries=2, backoff=0).send(events(1))
+    assert len(receiver.batches) == 3
+
+
+@pytest.mark.parametrize("status", [400, 404, 422])
+def test_webhook_does_not_retry_client_errors(status):
+    with WebhookReceiver([status]) as receiver:
+        with pytest.raises(requests.HTTPError):
+            WebhookSink(receiver.url, max_retries=3, backoff=0).send(events(4))
+    assert len(receiver.batches) == 1
+
+
+def match(match_id, status="upcoming", home_sets=None, away_sets=None):
+    return {
+        "match_id": match_id, "home_team": "A", "away_team": "B", "status": status,
+        "home_sets": home_sets, "away_sets": away_sets, "score_detail": "", "winner": None
+    }
+
+
+def standing(team_id, rank, points=10):
+    return {"id": team_id, "team_name": team_id.upper(), "rank": rank, "points": points}
+
+
+def test_diff_snapshots_emits_match_and_rank_events():
+    old_matches = [match("BFQ001"), match("BFQ002", "completed", 3, 1), match("BFQ003")]
+    new_matches = [
+        match("BFQ001", "completed", 3, 0),   # terminé
+        match("BFQ002", "completed", 3, 2),   # score corrigé
+        match("BFQ003"),                      # inchangé
+        match("BFQ004", "completed", 3, 0),   # inconnu du snapshot précédent
+    ]
+    old_standings = [standing("a", 1), standing("b", 2)]
+    new_standings = [standing("a", 2), standing("b", 1), standing("c", 3)]
+
+    found = diff_snapshots(old_matches, new_matches, old_standings, new_standings,
+                           emitted_at="2025-10-04T12:00:00Z")
+
+    assert [(e["type"], e["key"]) for e in found] == [
+        ("match_completed", "BFQ001"),
+        ("score_updated", "BFQ002"),
+        ("rank_changed", "a"),
+        ("rank_changed", "b"),
+    ]
+    assert found[1]["data"]["previous"]["away_sets"] == 1
+    assert found[2]["data"]["old_rank"] == 1 and found[2]["data"]["new_rank"] == 2
+
+
+def test_diff_snapshots_without_previous_snapshot():
+    assert diff_snapshots(None, [match("BFQ001")], None, [standing("a", 1)]) == []
+
+
+def test_event_ids_are_stable_within_a_run_and_unique_across_runs():
+    def run(emitted_at):
+        return diff_snapshots([], [], [standing("a", 3)], [standing("a", 2)], emitted_at=emitted_at)
+
+    first, replay, later = run("2025-10-04T12:00:00Z"), run("2025-10-04T12:00:00Z"), run("2025-10-11T12:00:00Z")
+    assert first[0]["id"] == replay[0]["id"]
+    assert first[0]["data"] == later[0]["data"]
+    assert first[0]["id"] != later[0]["id"]
@@ -0,0 +1,128 @@
+# scripts/tests/test_feeds.py
+import json
+
+import pytest
+
+from feeds import FEED_VERSION, FeedGenerator, render_ical
+
+
+def match(number, home, away, pool="BFQ", **fields):
+    return {
+        "match_id": f"{pool}{number:03d}", "date": f"2025-10-{number:02d}", "time": "20:00",
+        "home_team": home, "away_team": away, "venue": f"SALLE {home}",
+        "home_sets": None, "away_sets": None, "status": "upcoming", **fields
+    }
+
+
+def season():
+    return [
+        match(1, "CYSOING 1", "LILLE 1"),
+        match(2, "LENS 1", "DOUAI 1"),
+        match(3, "CYSOING 1", "LENS 1"),
+        match(1, "ARRAS 1", "CALAIS 1", pool="BMA"),
+    ]
+
+
+@pytest.fixture
+def generator(tmp_path):
+    def make():
+        return FeedGenerator(tmp_path, tmp_path / "feeds", logger=lambda message: None)
+    return make
+
+
+def test_first_run_writes_every_feed(generator, tmp_path):
+    written = generator().run(season())
+    assert written == [
+        "pools/bfq", "pools/bma",
+        "teams/arras-1", "teams/calais-1", "teams/cysoing-1",
+        "teams/douai-1", "teams/lens-1", "teams/lille-1",
+    ]
+    assert (tmp_path / "feeds" / "teams" / "cysoing-1.ics").exists()
+    assert (tmp_path / "feeds" / "pools" / "bfq.json").exists()
+
+
+def test_unchanged_snapshot_rewrites_nothing(generator, tmp_path):
+    generator().run(season())
+    manifest = json.loads((tmp_path / "feeds" / "manifest.json").read_text(encoding="utf-8"))
+    assert generator().run(season()) == []
+    again = json.loads((tmp_path / "feeds" / "manifest.json").read_text(encoding="utf-8"))
+    assert again["feeds"] == manifest["feeds"]
+
+
+def test_score_change_dirties_its_teams_and_pool_only(generator):
+    generator().run(season())
+    matches = season()
+    matches[1].update(home_sets=3, away_sets=1, status="completed")
+    assert generator().run(matches) == ["pools/bfq", "teams/douai-1", "teams/lens-1"]
+
+
+def test_timestamps_alone_do_not_dirty_feeds(generator):
+    generator().run(season())
+    matches = [dict(m, created_at="2025-10-11T12:00:00Z", updated_at="2025-10-11T12:00:00Z")
+               for m in season()]
+    assert generator().run(matches) == []
+
+
+def test_moved_match_also_dirties_its_previous_feeds(generator, tmp_path):
+    generator().run(season())
+    matches = season()
+    matches[2]["away_team"] = "DOUAI 1"  # CYSOING 1 - LENS 1 devient CYSOING 1 - DOUAI 1
+    assert generator().run(matches) == ["pools/bfq", "teams/cysoing-1", "teams/douai-1", "teams/lens-1"]
+
+    # LILLE 1 n'a plus de match : son flux est supprimé
+    matches[0]["away_team"] = "DOUAI 1"
+    assert generator().run(matches) == ["pools/bfq", "teams/cysoing-1", "teams/douai-1"]
+    assert not (tmp_path / "feeds" / "teams" / "lille-1.ics").exists()
+
+
+def test_removed_match_dirties_its_feeds_and_drops_empty_ones(generator, tmp_path):
+    generator().run(season())
+    matches = [m for m in season() if m["match_id"] != "BMA001"]
+    assert generator().run(matches) == []
+    for key in ("pools/bma", "teams/arras-1", "teams/calais-1"):
+        assert not (tmp_path / "feeds" / f"{key}.ics").exists()
+
+    matches = [m for m in season() if m["match_id"] != "BFQ001"]
+    generator().run(season())
+    assert generator().run(matches) == ["pools/bfq", "teams/cysoing-1"]
+    assert not (tmp_path / "feeds" / "teams" / "lille-1.ics").exists()
+
+
+def test_manifest_from_another_version_rewrites_everything(generator, tmp_path):
+    generator().run(season())
+    path = tmp_path / "feeds" / "manifest.json"
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    assert manifest["version"] == FEED_VERSION
+    manifest["version"] = FEED_VERSION - 1
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    assert len(generator().run(season())) == 8
+
+
+def test_ical_defines_the_referenced_timezone():
+    ical = render_ical("CYSOING 1", season()[:1], "2025-10-04T12:00:00Z")
+    lines = ical.split("\r\n")
+    assert "DTSTART;TZID=Europe/Paris:20251001T200000" in lines
+    assert lines.index("BEGIN:VTIMEZONE") < lines.index("BEGIN:VEVENT")
+    timezone = lines[lines.index("BEGIN:VTIMEZONE"):lines.index("END:VTIMEZONE") + 1]
+    assert "TZID:Europe/Paris" in timezone
+    assert {"BEGIN:STANDARD", "BEGIN:DAYLIGHT", "TZOFFSETTO:+0100", "TZOFFSETTO:+0200"} <= set(timezone)
+
+
+def test_team_feeds_are_keyed_on_team_ids(generator, tmp_path):
+    cysoing = "6f1c2d3e-0000-4000-8000-000000000001"
+    lille = "6f1c2d3e-0000-4000-8000-000000000002"
+    matches = [
+        match(1, "CYSOING 1", "LILLE 1", home_team_id=cysoing, away_team_id=lille),
+        # Orthographe différente sur la page, même équipe
+        match(2, "LILLE 1", "Cysoing  1", home_team_id=lille, away_team_id=cysoing),
+        # Identifiant pas encore résolu : repli sur le slug du nom
+        match(3, "LENS 1", "CYSOING 1", away_team_id=cysoing),
+    ]
+    assert generator().run(matches) == ["pools/bfq", f"teams/{cysoing}", f"teams/{lille}", "teams/lens-1"]
+    feed = json.loads((tmp_path / "feeds" / "teams" / f"{cysoing}.json").read_text(encoding="utf-8"))
+    assert feed["title"] == "CYSOING 1"
+    assert [m["match_id"] for m in feed["matches"]] == ["BFQ001", "BFQ002", "BFQ003"]
+
+    # Équipe renommée : même flux, réécrit sur place
+    renamed = [dict(m, home_team="CYSOING VB 1") if m["match_id"] == "BFQ001" else m for m in matches]
+    assert generator().run(renamed) == ["pools/bfq", f"teams/{cysoing}", f"teams/{lille}"]
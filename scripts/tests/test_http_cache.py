@@ -0,0 +1,162 @@
+# scripts/tests/test_http_cache.py
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_cache
+from http_cache import CachedSession, OfflineCacheMiss, ResponseCache
+
+PAGE = "<html><body>Journée 01 - CYSOING 1</body></html>".encode("iso-8859-1")
+
+
+class FakeSite:
+    """Site local : sert PAGE (compressée gzip si demandé) et compte les requêtes"""
+
+    def __init__(self):
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append(self.path)
+                body = PAGE
+                self.send_response(404 if "absent" in self.path else 200)
+                self.send_header("Content-Type", "text/html; charset=iso-8859-1")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    with FakeSite() as site:
+        yield site
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge contrôlée du module (stockage, accès, expiration)"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_ttl_rules_by_url(tmp_path):
+    session = CachedSession(tmp_path)
+    assert session.ttl_for("https://www.ffvbbeach.org/ffvbapp/resu/vbspo_calendrier.php?poule=BFQ") == 600
+    assert session.ttl_for("https://www.ffvbbeach.org/ffvbapp/resu/vbspo_fdm.php?codmatch=BFQ001") == 30 * 24 * 3600
+    assert session.ttl_for("https://www.ffvbbeach.org/ffvbapp/resu/autre.php") == http_cache.DEFAULT_TTL
+    custom = CachedSession(tmp_path, ttl_rules=[(r"calendrier", 5)], default_ttl=7)
+    assert (custom.ttl_for("/vbspo_calendrier.php"), custom.ttl_for("/vbspo_fdm.php")) == (5, 7)
+
+
+def test_cached_page_expires_after_its_ttl(site, tmp_path, clock):
+    session = CachedSession(tmp_path)
+    calendar = f"{site.url}/vbspo_calendrier.php"
+    sheet = f"{site.url}/vbspo_fdm.php"
+    for url in (calendar, sheet):
+        assert session.get(url).content == PAGE
+    assert session.get(calendar).headers["X-Cache"] == "HIT"
+    assert len(site.requests) == 2
+
+    # 11 minutes plus tard : le calendrier est expiré, pas la feuille de match
+    clock[0] += 11 * 60
+    assert "X-Cache" not in session.get(calendar).headers
+    assert session.get(sheet).headers["X-Cache"] == "HIT"
+    assert session.get(calendar, refresh=True).content == PAGE
+    assert len(site.requests) == 4
+    assert (session.hits, session.misses) == (2, 4)
+
+    # Seules les réponses 200 sont mises en cache
+    session.get(f"{site.url}/absent")
+    session.get(f"{site.url}/absent")
+    assert len(site.requests) == 6
+
+
+def test_gzip_response_round_trip(site, tmp_path):
+    session = CachedSession(tmp_path)
+    url = f"{site.url}/vbspo_calendrier.php?poule=BFQ"
+    fresh = session.get(url, headers={"Accept-Encoding": "gzip"})
+    assert fresh.headers["Content-Encoding"] == "gzip" and fresh.content == PAGE
+    session.close()
+
+    # Corps stocké compressé une fois, en-têtes d'encodage retirés
+    cache = ResponseCache(tmp_path)
+    entry, body = cache.get(url)
+    assert body == PAGE
+    assert gzip.decompress(cache.body_path(cache.key(url)).read_bytes()) == PAGE
+    assert "Content-Encoding" not in entry["headers"] and "Content-Length" not in entry["headers"]
+
+    hit = CachedSession(tmp_path).get(url)
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.text == PAGE.decode("iso-8859-1") and hit.encoding == fresh.encoding
+    assert len(site.requests) == 1
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path, clock):
+    cache = ResponseCache(tmp_path, max_bytes=10 ** 9)
+    for name in ("a", "b", "c"):
+        clock[0] += 1
+        cache.store(f"http://site/{name}", name.encode() * 1000)
+    size = cache.index[cache.key("http://site/a")]["size"]
+
+    # "a" relu : "b" devient la moins récemment utilisée
+    clock[0] += 1
+    assert cache.get("http://site/a") is not None
+    cache.max_bytes = 2 * size
+    cache.evict()
+    assert cache.get("http://site/b") is None
+    assert not cache.body_path(cache.key("http://site/b")).exists()
+    assert cache.get("http://site/a") is not None and cache.get("http://site/c") is not None
+
+
+def test_offline_mode_serves_stale_entries_and_raises_on_miss(site, tmp_path, clock):
+    url = f"{site.url}/vbspo_calendrier.php?poule=BFQ"
+    online = CachedSession(tmp_path)
+    online.get(url)
+    online.close()
+
+    clock[0] += 365 * 24 * 3600
+    offline = CachedSession(tmp_path, offline=True)
+    assert offline.get(url).content == PAGE
+    with pytest.raises(OfflineCacheMiss):
+        offline.get(f"{site.url}/vbspo_calendrier.php?poule=BFR")
+    with pytest.raises(OfflineCacheMiss):
+        offline.post(url)
+    assert len(site.requests) == 1
+
+
+def test_index_is_written_in_batches_and_on_close(site, tmp_path):
+    session = CachedSession(tmp_path, save_every=3)
+    index_path = tmp_path / "index.json"
+    for poule in ("A", "B"):
+        session.get(f"{site.url}/vbspo_calendrier.php?poule={poule}")
+    assert not index_path.exists()
+
+    session.get(f"{site.url}/vbspo_calendrier.php?poule=C")
+    assert len(ResponseCache(tmp_path).index) == 3
+
+    session.get(f"{site.url}/vbspo_calendrier.php?poule=D")
+    assert len(ResponseCache(tmp_path).index) == 3
+    session.close()
+    assert len(ResponseCache(tmp_path).index) == 4
@@ -0,0 +1,64 @@
+# scripts/tests/test_league_generator.py
+import pytest
+
+from league_generator import LeagueGenerator, verify
+from scraper import VolleyballScraper
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+# 8 poules de 12 équipes : 1056 matchs ; les volumes supérieurs (jusqu'à 1M)
+# passent par la CLI (league_generator.py generate / verify, cf. NEXT_STEPS.md)
+@pytest.mark.parametrize("pools, teams, completion", [(3, 6, 0.6), (2, 12, 1.0), (1, 4, 0.0), (8, 12, 0.6)])
+def test_offline_scrape_of_synthetic_league_matches_expected(tmp_path, pools, teams, completion):
+    data_dir = tmp_path / "data"
+    manifest = LeagueGenerator(
+        tmp_path / "synthetic", pools=pools, teams=teams, completion=completion,
+        cache_dir=data_dir / "http_cache", write_html=False, logger=quiet
+    ).run()
+    season_dir = tmp_path / "synthetic" / "2025-2026"
+    poules = (season_dir / "poules.txt").read_text(encoding="utf-8").split()
+    assert len(poules) == pools
+
+    scraper = VolleyballScraper(saison="2025/2026", codent=manifest["codent"], poule=poules[0],
+                                offline=True, data_dir=data_dir)
+    scraper.log = quiet
+    standings, matchdays, matches = scraper.scrape_pools(poules, max_workers=1)
+    scraper.save_all_data()
+
+    assert len(matches) == manifest["matches"]
+    assert len(standings) == pools * teams
+    assert verify(season_dir / "expected", data_dir) == []
+
+
+def test_verify_reports_differences(tmp_path):
+    data_dir = tmp_path / "data"
+    LeagueGenerator(tmp_path / "synthetic", pools=1, teams=4, completion=1.0,
+                    cache_dir=data_dir / "http_cache", write_html=False, logger=quiet).run()
+    season_dir = tmp_path / "synthetic" / "2025-2026"
+
+    scraper = VolleyballScraper(poule="PAAA", offline=True, data_dir=data_dir)
+    scraper.log = quiet
+    scraper.scrape_pools(["PAAA"], max_workers=1)
+    scraper.matches[0].home_sets = 0
+    scraper.matches.pop()
+    scraper.save_all_data()
+
+    errors = verify(season_dir / "expected", data_dir)
+    assert any("PAAA001 diffère sur home_sets" in error for error in errors)
+    assert any("absent" in error for error in errors)
+
+
+def test_failed_pool_download_aborts_instead_of_dropping_the_pool(tmp_path):
+    data_dir = tmp_path / "data"
+    LeagueGenerator(tmp_path / "synthetic", pools=2, teams=4, completion=1.0,
+                    cache_dir=data_dir / "http_cache", write_html=False, logger=quiet).run()
+
+    scraper = VolleyballScraper(poule="PAAA", offline=True, data_dir=data_dir)
+    scraper.log = quiet
+    # PZZZ n'est pas dans le cache hors-ligne : son téléchargement échoue
+    with pytest.raises(RuntimeError, match="PZZZ"):
+        scraper.scrape_pools(["PAAA", "PZZZ", "PAAB"], max_workers=1)
+    assert scraper.standings == [] and scraper.matches == []
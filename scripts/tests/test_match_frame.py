@@ -0,0 +1,99 @@
+# scripts/tests/test_match_frame.py
+import numpy as np
+import pytest
+
+from match_frame import MatchFrame, load_npz_mmap
+from rules import ranking_key
+
+
+def match(match_id, home, away, day, sets=None):
+    """Match terminé si `sets` est donné (liste de (domicile, extérieur)), sinon à venir"""
+    sets = sets or []
+    home_sets = sum(h > a for h, a in sets)
+    away_sets = len(sets) - home_sets
+    return {"match_id": match_id, "home_team": home, "away_team": away, "date": day,
+            "status": "completed" if sets else "upcoming",
+            "home_sets": home_sets if sets else None, "away_sets": away_sets if sets else None,
+            "sets": [{"home": h, "away": a} for h, a in sets]}
+
+
+WIN_3_0 = [(25, 20), (25, 18), (25, 23)]
+WIN_3_2 = [(25, 20), (20, 25), (25, 23), (22, 25), (15, 12)]
+LOSS_2_3 = [(a, h) for h, a in WIN_3_2]
+LOSS_1_3 = [(20, 25), (25, 22), (18, 25), (21, 25)]
+
+MATCHES = [
+    match("BFQ001", "CYSOING 1", "LILLE 1", "2025-10-04", WIN_3_0),
+    match("BFQ002", "RONCQ 1", "HEM 1", "2025-10-04", WIN_3_2),
+    match("BFQ003", "LILLE 1", "RONCQ 1", "2025-10-18", LOSS_1_3),
+    match("BFQ004", "HEM 1", "CYSOING 1", "2025-10-18", LOSS_2_3),
+    match("BFQ005", "CYSOING 1", "RONCQ 1", "2025-11-15"),
+    match("BFR001", "DOUAI 1", "ARRAS 1", "2025-10-05", WIN_3_2),
+    match("BFR002", "ARRAS 1", "DOUAI 1", "2025-10-19", WIN_3_0),
+]
+
+
+@pytest.fixture
+def frame():
+    return MatchFrame.from_matches(MATCHES)
+
+
+def test_saved_frame_is_memory_mapped_back_unchanged(frame, tmp_path):
+    path = frame.save(tmp_path / "matches_frame.npz")
+    mapped = MatchFrame.load(path)
+    assert isinstance(mapped.set_home, np.memmap)
+    for name in MatchFrame.ARRAYS:
+        np.testing.assert_array_equal(getattr(mapped, name), getattr(frame, name))
+        np.testing.assert_array_equal(getattr(MatchFrame.load(path, mmap=False), name), getattr(frame, name))
+    assert mapped.table() == frame.table()
+
+
+def test_compressed_npz_cannot_be_mapped(frame, tmp_path):
+    path = tmp_path / "compressed.npz"
+    np.savez_compressed(path, **{name: getattr(frame, name) for name in MatchFrame.ARRAYS})
+    with pytest.raises(ValueError, match="compressé"):
+        load_npz_mmap(path)
+
+
+def test_set_margins_and_points(frame):
+    margins = frame.set_margins()
+    assert margins[:3].tolist() == [5, 7, 2]
+    assert len(margins) == sum(len(m["sets"]) for m in MATCHES)
+    home_points, away_points = frame.points()
+    assert (int(home_points[0]), int(away_points[0])) == (75, 61)
+    assert frame.point_margins()[0] == 14
+    assert frame.set_counts().tolist() == [3, 5, 4, 5, 0, 5, 3]
+
+
+def test_tiebreak_rate_counts_completed_five_set_matches(frame):
+    # 3 matchs en 5 sets sur 6 terminés ; le match à venir ne compte pas
+    assert frame.tiebreaks().tolist() == [False, True, False, True, False, True, False]
+    assert frame.tiebreak_rate() == 0.5
+    assert MatchFrame.from_matches([MATCHES[4]]).tiebreak_rate() == 0.0
+
+
+def test_rolling_form_in_date_order():
+    results = [("2025-11-15", WIN_3_0), ("2025-10-04", LOSS_1_3), ("2025-10-18", WIN_3_2),
+               ("2025-11-29", WIN_3_0), ("2025-10-11", WIN_3_0)]
+    matches = [match(f"BFQ{i:03d}", "CYSOING 1", f"ADVERSAIRE {i}", day, sets)
+               for i, (day, sets) in enumerate(results, start=1)]
+    # Un match à l'extérieur perdu par l'équipe à domicile = victoire
+    matches.append(match("BFQ006", "HEM 1", "CYSOING 1", "2025-12-06", LOSS_2_3))
+    dates, form = MatchFrame.from_matches(matches).rolling_form("cysoing  1", window=2)
+    assert [str(d) for d in dates] == ["2025-10-04", "2025-10-11", "2025-10-18", "2025-11-15",
+                                       "2025-11-29", "2025-12-06"]
+    assert form.tolist() == [0.0, 0.5, 1.0, 1.0, 1.0, 1.0]
+
+
+def test_table_ranks_each_pool_separately(frame):
+    tables = frame.table()
+    assert list(tables) == ["BFQ", "BFR"]
+    assert [row["team"] for row in tables["BFR"]] == ["ARRAS 1", "DOUAI 1"]
+    assert {row["team"] for row in tables["BFQ"]} == {"CYSOING 1", "LILLE 1", "RONCQ 1", "HEM 1"}
+
+    rows = tables["BFQ"]
+    assert rows == sorted(rows, key=lambda r: ranking_key(r["rank_points"], r["wins"], r["sets_for"],
+                                                          r["sets_against"], r["points_for"],
+                                                          r["points_against"]))
+    cysoing = rows[0]
+    assert (cysoing["team"], cysoing["rank_points"], cysoing["played"]) == ("CYSOING 1", 5, 2)
@@ -0,0 +1,136 @@
+# scripts/tests/test_parsing.py
+from pathlib import Path
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+from records import as_dict
+from parsing import (extract_detail_link, parse_calendar_incremental, parse_matchdays_and_matches,
+                     parse_standings, split_calendar_sections)
+from league_generator import PoolBuilder, team_name
+
+TIMESTAMP = "2025-10-04T12:00:00Z"
+# Page au format du site FFVB : ISO-8859-1, balises en majuscules, attributs
+# sans guillemets, fins de ligne CRLF, en-têtes de journée imbriqués
+# (<FONT><B>), "Journée" tantôt en octet 0xE9 tantôt en entité &eacute;
+FFVB_PAGE = Path(__file__).parent / "fixtures" / "ffvb_calendrier_BFQ.html"
+
+
+def pool(completion=0.5):
+    teams = [team_name(i) for i in range(6)]
+    return PoolBuilder(2025, "PAAA", teams, {team: 0.0 for team in teams}, completion, seed=1)
+
+
+def without_ids(records):
+    """Dicts comparables (journées et matchs ont un UUID aléatoire par parsing)"""
+    return [{k: v for k, v in as_dict(r).items() if k != "id"} for r in records]
+
+
+def complete_first_upcoming(builder):
+    """Joue le premier match à venir ; renvoie son identifiant"""
+    match = next(m for m in builder.matches if m["status"] == "upcoming")
+    match.update({
+        "home_sets": 3, "away_sets": 0, "score_detail": "25:10, 25:12, 25:14",
+        "sets": [{"home": 25, "away": 10}, {"home": 25, "away": 12}, {"home": 25, "away": 14}],
+        "winner": "home", "status": "completed",
+    })
+    return match["match_id"]
+
+
+def test_first_parse_matches_full_parse():
+    builder = pool()
+    page = builder.render()
+    standings, matchdays, matches, cache, reparsed = parse_calendar_incremental(page, "PAAA", TIMESTAMP, {})
+
+    soup = BeautifulSoup(page, "html.parser")
+    full_matchdays, full_matches = parse_matchdays_and_matches(soup, "PAAA", TIMESTAMP)
+    assert reparsed == len(full_matchdays) == len(cache) == len(builder.matchdays)
+    assert without_ids(matches) == without_ids(full_matches)
+    assert without_ids(matchdays) == without_ids(full_matchdays)
+    assert [as_dict(s) for s in standings] == [as_dict(s) for s in parse_standings(soup, TIMESTAMP)]
+
+
+def test_unchanged_page_reuses_every_section():
+    page = pool().render()
+    _, matchdays, matches, cache, _ = parse_calendar_incremental(page, "PAAA", TIMESTAMP, {})
+
+    _, again_matchdays, again_matches, again_cache, reparsed = parse_calendar_incremental(
+        page, "PAAA", "2025-10-11T12:00:00Z", cache
+    )
+    assert reparsed == 0
+    assert again_cache.keys() == cache.keys()
+    # Identifiants réutilisés, horodatages du nouveau run
+    assert [m.id for m in again_matchdays] == [m.id for m in matchdays]
+    assert [m.id for m in again_matches] == [m.id for m in matches]
+    assert {(r.created_at, r.updated_at) for r in again_matchdays + again_matches} == {
+        ("2025-10-11T12:00:00Z", "2025-10-11T12:00:00Z")
+    }
+
+
+def test_changed_section_is_reparsed_alone():
+    builder = pool()
+    _, matchdays, _, cache, _ = parse_calendar_incremental(builder.render(), "PAAA", TIMESTAMP, {})
+
+    match_id = complete_first_upcoming(builder)
+    _, new_matchdays, new_matches, new_cache, reparsed = parse_calendar_incremental(
+        builder.render(), "PAAA", "2025-10-11T12:00:00Z", cache
+    )
+    assert reparsed == 1
+    assert len(new_cache) == len(cache) and len(set(new_cache) - set(cache)) == 1
+
+    changed = next(m for m in new_matches if m.match_id == match_id)
+    assert (changed.status, changed.home_sets, changed.away_sets) == ("completed", 3, 0)
+    assert changed.created_at == "2025-10-11T12:00:00Z"
+    # Les autres journées gardent leurs enregistrements d'origine
+    kept = [m for m in new_matchdays if match_id not in m.match_ids]
+    assert {m.id for m in kept} <= {m.id for m in matchdays}
+    assert len(kept) == len(matchdays) - 1
+
+
+def test_ffvb_page_is_split_on_every_matchday_header():
+    content = FFVB_PAGE.read_bytes()
+    sections, remainder = split_calendar_sections(UnicodeDammit(content, is_html=True).unicode_markup)
+    assert len(sections) == 3
+    assert ["BFQ001" in sections[0], "BFQ003" in sections[1], "BFQ005" in sections[2]] == [True] * 3
+    # La dernière section s'arrête au </TABLE> : le pied de page (heure de
+    # génération) reste dans le reste, avec le classement
+    assert "Page générée" not in sections[-1] and "Page générée" in remainder
+    assert "CYSOING 1" in remainder and "BFQ001" not in remainder
+
+
+def test_ffvb_page_incremental_parse_matches_full_parse():
+    content = FFVB_PAGE.read_bytes()
+    standings, matchdays, matches, cache, reparsed = parse_calendar_incremental(content, "BFQ", TIMESTAMP, {})
+
+    soup = BeautifulSoup(content, "html.parser")
+    full_matchdays, full_matches = parse_matchdays_and_matches(soup, "BFQ", TIMESTAMP)
+    assert reparsed == len(cache) == 3
+    assert [m.name for m in matchdays] == ["Journée 01", "Journée 02", "Journée 03"]
+    assert without_ids(matchdays) == without_ids(full_matchdays)
+    assert without_ids(matches) == without_ids(full_matches)
+    assert [as_dict(s) for s in standings] == [as_dict(s) for s in parse_standings(soup, TIMESTAMP)]
+    assert [s.team_name for s in standings] == [
+        "CYSOING 1", "VILLENEUVE D'ASCQ 2", "SAINT-ANDRÉ 1", "LILLE MÉTROPOLE"
+    ]
+    assert [m.status for m in matches] == ["completed"] * 4 + ["upcoming"] * 2
+
+    # Seconde passe sur la même page : aucune section re-parsée
+    assert parse_calendar_incremental(content, "BFQ", TIMESTAMP, cache)[4] == 0
+
+
+def row_cells(*links):
+    """Cellules d'une ligne de match dont la salle (colonne 9) porte les liens donnés"""
+    values = ["BFQ001", "04/10/25", "20:00",
+              '<a href="vbspo_equipe.php?equipe=CYSOING+1">CYSOING 1</a>', "-",
+              '<a href="vbspo_equipe.php?equipe=LILLE+1">LILLE 1</a>', "3", "0", "", "".join(links), ""]
+    html = "<table><tr>" + "".join(f"<td>{v}</td>" for v in values) + "</tr></table>"
+    return BeautifulSoup(html, "html.parser").find_all("td")
+
+
+def test_detail_link_is_only_a_match_sheet():
+    sheet = "../vbspo_fdm.php?saison=2025/2026&codent=PTFL59&numero=BFQ001"
+    assert extract_detail_link(row_cells('<a href="plan_salle.php?id=12">plan</a>',
+                                         f'<a href="{sheet}">FdM</a>')) == sheet
+    # Liens d'équipes et de salle seuls : pas de feuille de match
+    assert extract_detail_link(row_cells('<a href="plan_salle.php?id=12">plan</a>')) is None
+    # Le motif doit être dans le chemin, pas dans les paramètres
+    assert extract_detail_link(row_cells('<a href="plan_salle.php?retour=fdm">plan</a>')) is None
@@ -0,0 +1,164 @@
+# scripts/tests/test_pg_sync.py
+"""Tests du backend PostgreSQL contre une instance locale
+
+Lancés seulement si TEST_PG_DSN est défini, par exemple :
+    TEST_PG_DSN=postgresql://postgres@localhost/postgres python -m pytest tests/test_pg_sync.py
+Chaque test travaille dans un schéma temporaire, supprimé à la fin.
+"""
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+from psycopg.conninfo import make_conninfo
+
+from final_sync import sync_snapshot
+from pg_sync import PostgresBackend
+from utils import save_json
+
+pytestmark = pytest.mark.skipif(not os.getenv("TEST_PG_DSN"), reason="TEST_PG_DSN non défini")
+
+SCHEMA = """
+CREATE TABLE matchdays (
+    id UUID PRIMARY KEY, name TEXT, day_number TEXT, date_text TEXT,
+    match_date DATE, match_ids TEXT[]
+);
+CREATE TABLE matches (
+    match_id TEXT PRIMARY KEY, date DATE, time TEXT, home_team TEXT, away_team TEXT,
+    home_team_id UUID, away_team_id UUID, venue TEXT, score_detail TEXT,
+    home_sets INTEGER, away_sets INTEGER, winner TEXT, sets JSONB DEFAULT '[]',
+    status TEXT DEFAULT 'upcoming', created_at TIMESTAMPTZ
+);
+CREATE TABLE standings (
+    id UUID PRIMARY KEY, team_name TEXT, rank INTEGER, points INTEGER, played INTEGER,
+    wins INTEGER, losses INTEGER, sets_won INTEGER, sets_lost INTEGER,
+    points_for INTEGER, points_against INTEGER, ratio DOUBLE PRECISION
+);
+"""
+
+
+@pytest.fixture
+def dsn():
+    schema = f"test_pg_sync_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(os.environ["TEST_PG_DSN"], autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {schema}")
+        conn.execute(f"SET search_path TO {schema}")
+        conn.execute(SCHEMA)
+    try:
+        yield make_conninfo(os.environ["TEST_PG_DSN"], options=f"-c search_path={schema}")
+    finally:
+        with psycopg.connect(os.environ["TEST_PG_DSN"], autocommit=True) as conn:
+            conn.execute(f"DROP SCHEMA {schema} CASCADE")
+
+
+def fetch(dsn, query):
+    with psycopg.connect(dsn) as conn:
+        return conn.execute(query).fetchall()
+
+
+def standing(i, points=0):
+    return {"id": str(uuid.UUID(int=i + 1)), "team_name": f"EQUIPE {i}", "rank": i + 1,
+            "points": points, "played": 0, "wins": 0, "losses": 0, "sets_won": 0, "sets_lost": 0,
+            "points_for": 0, "points_against": 0, "ratio": 0.0}
+
+
+def match(number, home_sets=None):
+    return {"match_id": f"BFQ{number:03d}", "date": "2025-10-04", "time": "20:00",
+            "home_team": "CYSOING 1", "away_team": "LILLE 1", "home_team_id": None,
+            "away_team_id": None, "venue": "SALLE", "score_detail": "", "home_sets": home_sets,
+            "away_sets": 0 if home_sets is not None else None, "winner": None,
+            "sets": [{"home": 25, "away": 20}] if home_sets else [], "status": "upcoming",
+            "created_at": "2025-10-04T12:00:00Z"}
+
+
+def test_stage_copies_rows_into_a_temporary_table(dsn):
+    with PostgresBackend(dsn) as backend:
+        staging, columns, count = backend.stage("matches", (match(i) for i in range(1, 51)))
+        assert (staging, count) == ("stage_matches", 50)
+        assert columns[0] == "match_id"
+        rows = backend.conn.execute(
+            "SELECT count(*), count(DISTINCT match_id), min(sets::text) FROM stage_matches"
+        ).fetchone()
+        assert rows == (50, 50, "[]")
+        # Le staging est vidé à chaque chargement
+        backend.stage("matches", [match(99)])
+        assert backend.conn.execute("SELECT match_id FROM stage_matches").fetchall() == [("BFQ099",)]
+    # Rien n'a été fusionné dans la table cible
+    assert fetch(dsn, "SELECT count(*) FROM matches") == [(0,)]
+
+
+def test_upsert_merges_on_conflict_and_tolerates_duplicate_keys(dsn):
+    with PostgresBackend(dsn) as backend:
+        assert backend.upsert("matches", [match(1), match(2)], on_conflict="match_id") == 2
+
+    # BFQ002 joué, BFQ003 nouveau ; BFQ003 présent deux fois dans le même flux
+    with PostgresBackend(dsn) as backend:
+        written = backend.upsert("matches", [match(2, home_sets=3), match(3), match(3)],
+                                 on_conflict="match_id")
+    assert written == 2
+    assert fetch(dsn, "SELECT match_id, home_sets, sets FROM matches ORDER BY match_id") == [
+        ("BFQ001", None, []),
+        ("BFQ002", 3, [{"home": 25, "away": 20}]),
+        ("BFQ003", None, []),
+    ]
+
+
+def test_error_rolls_back_the_whole_sync(dsn):
+    with PostgresBackend(dsn) as backend:
+        backend.upsert("standings", [standing(0)], on_conflict="id")
+
+    broken = dict(standing(2), rank="premier")  # entier attendu : le COPY échoue
+    with pytest.raises(psycopg.Error):
+        with PostgresBackend(dsn) as backend:
+            backend.upsert("matches", [match(1)], on_conflict="match_id")
+            backend.upsert("standings", [standing(0, points=9), standing(1), broken], on_conflict="id")
+    assert fetch(dsn, "SELECT count(*) FROM matches") == [(0,)]
+    assert fetch(dsn, "SELECT team_name, points FROM standings") == [("EQUIPE 0", 0)]
+
+
+def test_delete_missing_keeps_only_the_snapshot_keys(dsn):
+    with PostgresBackend(dsn) as backend:
+        backend.upsert("standings", [standing(i) for i in range(6)], on_conflict="id")
+        assert backend.delete_missing("standings", "id", [standing(i)["id"] for i in (1, 4)]) == 4
+    assert fetch(dsn, "SELECT team_name FROM standings ORDER BY rank") == [("EQUIPE 1",), ("EQUIPE 4",)]
+
+    # Un snapshot vide ne vide jamais la table
+    with pytest.raises(ValueError, match="refusée"):
+        with PostgresBackend(dsn) as backend:
+            backend.delete_missing("standings", "id", [])
+    assert fetch(dsn, "SELECT count(*) FROM standings") == [(2,)]
+
+
+def test_sync_snapshot_loads_and_mirrors_every_table(dsn, tmp_path):
+    matchdays = [{"name": "Journée 01", "date": "2025-10-04", "match_ids": ["BFQ001", "BFQ002"],
+                  "pool": "BFQ"}]
+    save_json(matchdays, str(tmp_path / "matchdays.json"))
+    save_json([match(1, home_sets=3), match(2)], str(tmp_path / "matches.json"))
+    save_json([standing(i) for i in range(4)], str(tmp_path / "standings.json"))
+    with PostgresBackend(dsn) as backend:
+        assert sync_snapshot(backend, tmp_path) == {"matchdays": 1, "matches": 2, "standings": 4}
+
+    # Snapshot suivant : une équipe en moins, la journée fusionnée sur son identifiant
+    save_json([standing(i, points=3) for i in range(3)], str(tmp_path / "standings.json"))
+    with PostgresBackend(dsn) as backend:
+        sync_snapshot(backend, tmp_path)
+    assert fetch(dsn, "SELECT count(*), sum(points) FROM standings") == [(3, 9)]
+    assert fetch(dsn, "SELECT name, match_ids FROM matchdays") == [("Journée 01", ["BFQ001", "BFQ002"])]
+
+
+def test_team_id_columns_are_skipped_until_migrated(dsn, capsys):
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute("ALTER TABLE matches DROP COLUMN home_team_id, DROP COLUMN away_team_id")
+    row = dict(match(1), home_team_id=str(uuid.UUID(int=7)), away_team_id=str(uuid.UUID(int=8)))
+    with PostgresBackend(dsn) as backend:
+        assert backend.upsert("matches", [row], on_conflict="match_id") == 1
+    assert "sql/match_team_ids.sql" in capsys.readouterr().out
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        migration = (Path(__file__).resolve().parent.parent / "sql" / "match_team_ids.sql").read_text()
+        conn.execute(migration)
+    with PostgresBackend(dsn) as backend:
+        backend.upsert("matches", [row], on_conflict="match_id")
+    assert fetch(dsn, "SELECT home_team_id::text FROM matches") == [(str(uuid.UUID(int=7)),)]
@@ -0,0 +1,224 @@
+# scripts/tests/test_pipeline.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pipeline
+from pipeline import Pipeline, PipelineError
+from league_generator import LeagueGenerator, verify
+from records import Matchday
+from scraper import VolleyballScraper
+from team_index import TeamIndex
+
+
+class FakeScraper:
+    """Scraper minimal : pages vides, aucun accès réseau, écritures comptées"""
+
+    saison = "2025/2026"
+
+    def __init__(self, data_dir, failing=None):
+        self.data_dir = data_dir
+        self.failing = failing or "=aucune"
+        self.saved = 0
+
+    def log(self, message, level="INFO"):
+        pass
+
+    def build_url(self, poule):
+        return f"http://calendrier.invalid/?poule={poule}"
+
+    def fetch_page(self, url):
+        if url.endswith(self.failing):
+            raise ConnectionError("délai dépassé")
+        return b"<html><body></body></html>"
+
+    def page_for(self, poule, url, content):
+        return {"key": url, "poule": poule, "content": content, "timestamp": "2025-10-04T12:00:00Z"}
+
+    def remember_sections(self, result):
+        pass
+
+    def save_all_data(self):
+        self.saved += 1
+
+    def save_section_cache(self):
+        pass
+
+
+class BrokenExecutor:
+    """Exécuteur dont les workers sont morts (OOM, kill)"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, *args):
+        raise BrokenProcessPool("worker tué")
+
+
+def run_with_timeout(target, timeout=20):
+    """Exécute `target` dans un thread ; échoue si elle ne rend pas la main"""
+    outcome = {}
+
+    def runner():
+        try:
+            outcome["result"] = target()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "le pipeline est resté bloqué"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+POULES = [f"P{i}" for i in range(8)]
+
+
+def test_pipeline_runs_every_stage(tmp_path):
+    scraper = FakeScraper(tmp_path)
+    report = run_with_timeout(lambda: Pipeline(scraper, max_workers=1, queue_size=1).run(POULES))
+    assert {stage["stage"]: stage["items"] for stage in report} == {
+        "fetch": 8, "parse": 8, "transform": 8, "sync": 8
+    }
+    assert scraper.saved == 1
+
+
+def test_broken_process_pool_fails_the_run_instead_of_hanging(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "create_parse_executor", BrokenExecutor)
+    scraper = FakeScraper(tmp_path)
+    with pytest.raises(BrokenProcessPool):
+        run_with_timeout(lambda: Pipeline(scraper, queue_size=1).run(POULES))
+    assert scraper.saved == 0
+
+
+def test_failing_index_save_fails_the_run_instead_of_hanging(tmp_path, monkeypatch):
+    def save(self):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(TeamIndex, "save", save)
+    scraper = FakeScraper(tmp_path)
+    with pytest.raises(OSError, match="disque plein"):
+        run_with_timeout(lambda: Pipeline(scraper, max_workers=1, queue_size=1).run(POULES))
+    assert scraper.saved == 0
+
+
+class RecordingBackend:
+    """Backend en mémoire ; l'upsert numéro `fail_at` échoue"""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.calls = 0
+        self.upserts = []
+        self.deletes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def upsert(self, table, rows, on_conflict=None):
+        rows = list(rows)
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise RuntimeError("HTTP 500")
+        self.upserts.append((table, rows))
+        return len(rows)
+
+    def delete_missing(self, table, key, keep):
+        self.deletes.append((table, key, list(keep)))
+
+
+def test_failed_fetch_of_one_pool_saves_nothing(tmp_path):
+    scraper = FakeScraper(tmp_path, failing="poule=P3")
+    backend = RecordingBackend()
+    run = Pipeline(scraper, backend=backend, max_workers=1, queue_size=1)
+    with pytest.raises(PipelineError, match="P3"):
+        run_with_timeout(lambda: run.run(POULES))
+
+    # Les autres poules ont été traitées, mais ni snapshot ni suppression miroir
+    assert {stage["stage"]: (stage["items"], stage["errors"]) for stage in run.report()} == {
+        "fetch": (7, 1), "parse": (7, 0), "transform": (7, 0), "sync": (7, 0)
+    }
+    assert run.errors == [("fetch", "P3", "délai dépassé")]
+    assert scraper.saved == 0
+    assert backend.deletes == []
+
+
+def test_failed_sync_of_one_pool_skips_the_mirror_delete(tmp_path, monkeypatch):
+    # Une journée par poule, pour que chaque poule ait des lignes à synchroniser
+    def parse_page(page):
+        return {"key": page["key"], "poule": page["poule"], "standings": [], "matches": [],
+                "matchdays": [Matchday(f"id-{page['poule']}", "Journée 01", match_ids=[],
+                                       pool=page["poule"])]}
+
+    monkeypatch.setattr(pipeline, "parse_page", parse_page)
+    monkeypatch.setattr(pipeline, "create_parse_executor", ThreadPoolExecutor)
+    scraper = FakeScraper(tmp_path)
+    backend = RecordingBackend(fail_at=7)  # matchdays de la 3e poule (3 tables par poule)
+    run = Pipeline(scraper, backend=backend, max_workers=1, queue_size=1)
+    with pytest.raises(PipelineError, match="P2"):
+        run_with_timeout(lambda: run.run(POULES))
+    assert [(stage, poule) for stage, poule, _ in run.errors] == [("sync", "P2")]
+    assert len([table for table, _ in backend.upserts if table == "matchdays"]) == 7
+    assert scraper.saved == 0
+    assert backend.deletes == []
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def test_scrape_all_data_runs_through_the_pipeline(tmp_path):
+    data_dir = tmp_path / "data"
+    manifest = LeagueGenerator(tmp_path / "synthetic", pools=3, teams=6, completion=0.5,
+                               cache_dir=data_dir / "http_cache", write_html=False, logger=quiet).run()
+    season_dir = tmp_path / "synthetic" / "2025-2026"
+    poules = (season_dir / "poules.txt").read_text(encoding="utf-8").split()
+
+    scraper = VolleyballScraper(codent=manifest["codent"], poule=poules[0], offline=True, data_dir=data_dir)
+    scraper.log = quiet
+    backend = RecordingBackend()
+    assert scraper.scrape_all_data(poules, max_workers=2, feeds=True, backend=backend)
+
+    # Synchro au fil de l'eau, snapshot complet, puis étapes de fin de run
+    assert {stage["stage"]: stage["items"] for stage in scraper.pipeline.report()} == {
+        "fetch": 3, "parse": 3, "transform": 3, "sync": 3
+    }
+    synced = [row for table, rows in backend.upserts if table == "matches" for row in rows]
+    assert len(synced) == manifest["matches"]
+    assert all(row["home_team_id"] for row in synced)
+    assert [(table, key) for table, key, _ in backend.deletes] == [("standings", "id")]
+    assert verify(season_dir / "expected", data_dir) == []
+    assert (data_dir / "feeds" / "manifest.json").exists()
+
+
+def test_scrape_all_data_keeps_the_previous_snapshot_when_a_pool_fails(tmp_path):
+    data_dir = tmp_path / "data"
+    manifest = LeagueGenerator(tmp_path / "synthetic", pools=2, teams=4, completion=1.0,
+                               cache_dir=data_dir / "http_cache", write_html=False, logger=quiet).run()
+    poules = (tmp_path / "synthetic" / "2025-2026" / "poules.txt").read_text(encoding="utf-8").split()
+
+    scraper = VolleyballScraper(codent=manifest["codent"], poule=poules[0], offline=True, data_dir=data_dir)
+    scraper.log = quiet
+    assert scraper.scrape_all_data(poules, max_workers=1)
+    before = (data_dir / "standings.json").read_bytes()
+
+    # Poule absente du cache hors-ligne : échec du téléchargement
+    scraper = VolleyballScraper(codent=manifest["codent"], poule=poules[0], offline=True, data_dir=data_dir)
+    scraper.log = quiet
+    backend = RecordingBackend()
+    assert not scraper.scrape_all_data(poules + ["PZZZ"], max_workers=1, backend=backend)
+    assert (data_dir / "standings.json").read_bytes() == before
+    assert backend.deletes == []
@@ -0,0 +1,98 @@
+# scripts/tests/test_projection.py
+from itertools import combinations
+
+from league_generator import PoolBuilder, team_name
+from projection import SeasonProjection
+from rules import ranking_key
+from utils import generate_team_uuid, save_json
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def project(data_dir, simulations=200, logger=quiet):
+    projection = SeasonProjection(data_dir, simulations=simulations, batch_size=50,
+                                  max_workers=1, logger=logger)
+    return projection.run(use_cache=False)
+
+
+def rank_of(row):
+    """Rang (1er = 1) que la projection donne avec probabilité 1, sinon None"""
+    for rank, probability in enumerate(row["rank_probabilities"], start=1):
+        if probability == 1.0:
+            return rank
+    return None
+
+
+def standing(name, points, wins, sets_won, sets_lost, points_for, points_against):
+    return {"id": generate_team_uuid(name), "team_name": name, "rank": 0, "points": points,
+            "wins": wins, "sets_won": sets_won, "sets_lost": sets_lost,
+            "points_for": points_for, "points_against": points_against}
+
+
+def played_round_robin(pool, teams):
+    return [{"match_id": f"{pool}{i:03d}", "home_team": home, "away_team": away,
+             "home_sets": 3, "away_sets": 1, "status": "completed"}
+            for i, (home, away) in enumerate(combinations(teams, 2), start=1)]
+
+
+def test_fully_played_season_projects_the_actual_ranking(tmp_path):
+    teams = [team_name(i) for i in range(6)]
+    builder = PoolBuilder(2025, "PAAA", teams, {team: i * 0.3 for i, team in enumerate(teams)}, 1.0, seed=3)
+    save_json(builder.matches, str(tmp_path / "matches.json"))
+    save_json(builder.expected()[2], str(tmp_path / "standings.json"))
+
+    result = project(tmp_path)["PAAA"]
+    assert result["remaining_matches"] == 0
+    assert {row["team"]: rank_of(row) for row in result["teams"]} == {
+        s["team_name"]: s["rank"] for s in builder.standings
+    }
+
+
+def test_ties_are_broken_like_rules_ranking_key(tmp_path):
+    standings = [
+        # A et B : mêmes points, victoires et sets -> quotient des points
+        standing("EQUIPE A", 6, 2, 6, 3, 200, 180),
+        standing("EQUIPE B", 6, 2, 6, 3, 210, 180),
+        # C : mêmes points et victoires, meilleur quotient des sets
+        standing("EQUIPE C", 6, 2, 6, 2, 150, 180),
+        # D et E : mêmes points -> victoires
+        standing("EQUIPE D", 4, 1, 5, 5, 230, 200),
+        standing("EQUIPE E", 4, 2, 6, 6, 180, 200),
+    ]
+    save_json(standings, str(tmp_path / "standings.json"))
+    save_json(played_round_robin("PBBB", [s["team_name"] for s in standings]), str(tmp_path / "matches.json"))
+
+    expected = sorted(standings, key=lambda s: ranking_key(
+        s["points"], s["wins"], s["sets_won"], s["sets_lost"], s["points_for"], s["points_against"]
+    ))
+    assert [s["team_name"][-1] for s in expected] == ["C", "B", "A", "E", "D"]
+    result = project(tmp_path)["PBBB"]
+    assert {row["team"]: rank_of(row) for row in result["teams"]} == {
+        s["team_name"]: rank for rank, s in enumerate(expected, start=1)
+    }
+
+
+def test_teams_are_joined_on_their_id_not_their_spelling(tmp_path):
+    names = ["CYSOING 1", "LILLE 1", "RONCQ 1"]
+    save_json([standing("CYSOING 1", 6, 2, 6, 2, 150, 120), standing("LILLE 1", 3, 1, 4, 3, 160, 150),
+               standing("RONCQ 1", 0, 0, 1, 6, 120, 160)], str(tmp_path / "standings.json"))
+    matches = played_round_robin("PCCC", names)
+    # Orthographe de la page différente du classement : seul l'identifiant fait foi
+    matches[0].update(home_team="CYSOING  1 ", home_team_id=generate_team_uuid("CYSOING 1"))
+    save_json(matches, str(tmp_path / "matches.json"))
+
+    rows = project(tmp_path)["PCCC"]["teams"]
+    assert [(row["team"], row["current_points"], rank_of(row)) for row in rows] == [
+        ("CYSOING 1", 6, 1), ("LILLE 1", 3, 2), ("RONCQ 1", 0, 3)
+    ]
+
+
+def test_pool_with_a_team_missing_from_standings_is_skipped(tmp_path):
+    save_json([standing("CYSOING 1", 3, 1, 3, 1, 100, 80)], str(tmp_path / "standings.json"))
+    save_json(played_round_robin("PDDD", ["CYSOING 1", "INCONNUE 1"]), str(tmp_path / "matches.json"))
+
+    messages = []
+    assert project(tmp_path, logger=messages.append) == {}
+    assert messages == ["Poule PDDD: équipes absentes du classement (INCONNUE 1), projection ignorée"]
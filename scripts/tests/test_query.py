@@ -0,0 +1,112 @@
+# scripts/tests/test_query.py
+import os
+
+import pytest
+
+import query
+from query import SnapshotQuery
+from utils import save_json
+
+
+def match(number, day, pool="BFQ", status="completed"):
+    return {"match_id": f"{pool}{number:03d}", "date": day, "time": "20:00",
+            "home_team": f"{pool} DOMICILE {number}", "away_team": f"{pool} EXTERIEUR {number}",
+            "status": status}
+
+
+MATCHES = [
+    match(1, "2025-10-04"), match(2, "2025-10-04"), match(3, "2025-10-18"),
+    match(4, "2025-11-15", status="upcoming"), match(5, None, status="upcoming"),
+    match(1, "2025-10-05", pool="BFR"), match(2, "2025-10-19", pool="BFR"),
+]
+MATCHDAYS = [
+    {"name": "Journée 01", "pool": "BFQ", "match_ids": ["BFQ001", "BFQ002"]},
+    {"name": "Journée 02", "pool": "BFQ", "match_ids": ["BFQ003"]},
+    {"name": "Journée 01", "pool": "BFR", "match_ids": ["BFR001"]},
+    {"name": "Journée 02", "pool": "BFR", "match_ids": ["BFR002"]},
+]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    save_json(MATCHES, str(tmp_path / "matches.json"))
+    save_json(MATCHDAYS, str(tmp_path / "matchdays.json"))
+    return tmp_path
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Compte les reconstructions d'index"""
+    calls = []
+    build = SnapshotQuery.build
+
+    def counting_build(self):
+        calls.append(1)
+        build(self)
+    monkeypatch.setattr(SnapshotQuery, "build", counting_build)
+    return calls
+
+
+def ids(matches):
+    return [m["match_id"] for m in matches]
+
+
+def test_between_includes_both_boundaries(data_dir):
+    q = SnapshotQuery(data_dir)
+    assert ids(q.between("2025-10-04", "2025-10-18")) == ["BFQ001", "BFQ002", "BFR001", "BFQ003"]
+    # Bornes strictement entre deux dates, puis hors de toute date
+    assert ids(q.between("2025-10-05", "2025-10-17")) == ["BFR001"]
+    assert ids(q.between("2025-10-06", "2025-10-17")) == []
+    assert ids(q.between("2025-11-16", "2026-06-30")) == []
+    assert ids(q.between("2025-01-01", "2025-10-04")) == ["BFQ001", "BFQ002"]
+    # Les matchs sans date ne sont dans aucun intervalle
+    assert "BFQ005" not in ids(q.between("0000-01-01", "9999-12-31"))
+    assert ids(q.between("2025-10-01", "2025-12-31", status="upcoming")) == ["BFQ004"]
+
+
+def test_matchday_results_by_pool(data_dir):
+    q = SnapshotQuery(data_dir)
+    assert ids(q.matchday_results("01", pool="BFQ")) == ["BFQ001", "BFQ002"]
+    assert ids(q.matchday_results("Journée 01", pool="BFR")) == ["BFR001"]
+    # Sans poule : la journée de toutes les poules, par date
+    assert ids(q.matchday_results("02")) == ["BFQ003", "BFR002"]
+    assert q.matchday_results("02", pool="BFZ") == []
+
+
+def test_index_is_reused_until_the_snapshot_changes(data_dir, builds):
+    SnapshotQuery(data_dir)
+    SnapshotQuery(data_dir)
+    assert len(builds) == 1
+
+    # Même taille, date de modification différente
+    path = data_dir / "matches.json"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    SnapshotQuery(data_dir)
+    assert len(builds) == 2
+
+    # Taille différente (un match en plus), y compris à date de modification égale
+    mtime = path.stat().st_mtime_ns
+    save_json(MATCHES + [match(6, "2025-11-29")], str(path))
+    os.utime(path, ns=(mtime, mtime))
+    q = SnapshotQuery(data_dir)
+    assert len(builds) == 3
+    assert "BFQ006" in ids(q.between("2025-11-29", "2025-11-29"))
+
+    # Les journées font aussi partie de la signature
+    save_json(MATCHDAYS[:1], str(data_dir / "matchdays.json"))
+    SnapshotQuery(data_dir)
+    assert len(builds) == 4
+
+
+def test_unreadable_index_is_rebuilt(data_dir, builds, monkeypatch):
+    q = SnapshotQuery(data_dir)
+    q.index_path.write_bytes(b"\x80\x05garbage")
+    assert ids(SnapshotQuery(data_dir).matchday_results("01", pool="BFQ")) == ["BFQ001", "BFQ002"]
+
+    # Index d'une version antérieure ou d'un autre format : reconstruit aussi
+    q.index_path.write_bytes(b"pas un pickle")
+    SnapshotQuery(data_dir)
+    monkeypatch.setattr(query, "INDEX_VERSION", query.INDEX_VERSION + 1)
+    SnapshotQuery(data_dir)
+    assert len(builds) == 4
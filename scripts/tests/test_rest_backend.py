@@ -0,0 +1,82 @@
+# scripts/tests/test_rest_backend.py
+import uuid
+
+import pytest
+
+from bench_sync import FAKE_KEY, FakePostgrest
+from final_sync import RestBackend, adapt_match, sync_snapshot
+from utils import save_json
+
+
+@pytest.fixture
+def server():
+    # Plafond volontairement bas : plusieurs pages de lecture dès 100 lignes
+    server = FakePostgrest(max_rows=40)
+    yield server
+    server.close()
+
+
+def standing(i):
+    return {"id": str(uuid.UUID(int=i)), "team_name": f"EQUIPE {i}", "rank": i, "points": 0,
+            "played": 0, "wins": 0, "losses": 0, "sets_won": 0, "sets_lost": 0,
+            "points_for": 0, "points_against": 0, "ratio": 0.0}
+
+
+def test_delete_missing_reads_every_page(server):
+    backend = RestBackend(server.url, FAKE_KEY)
+    assert backend.upsert("standings", [standing(i) for i in range(130)], on_conflict="id") == 130
+
+    keep = [standing(i)["id"] for i in range(0, 130, 10)]
+    assert backend.delete_missing("standings", "id", keep, page_size=25) == 117
+    assert sorted(server.tables["standings"]) == sorted(keep)
+
+
+def test_mirror_sync_removes_stale_standings_beyond_the_row_cap(server, tmp_path):
+    backend = RestBackend(server.url, FAKE_KEY)
+    backend.upsert("standings", [standing(i) for i in range(150)], on_conflict="id")
+
+    # Nouveau snapshot : seules les 12 premières équipes restent
+    save_json([standing(i) for i in range(12)], str(tmp_path / "standings.json"))
+    sync_snapshot(backend, tmp_path, chunk_size=5, tables=["standings"])
+    assert sorted(server.tables["standings"]) == sorted(standing(i)["id"] for i in range(12))
+
+
+def test_empty_snapshot_never_empties_a_mirror_table(server, tmp_path):
+    backend = RestBackend(server.url, FAKE_KEY)
+    backend.upsert("standings", [standing(i) for i in range(8)], on_conflict="id")
+    with pytest.raises(ValueError, match="refusée"):
+        backend.delete_missing("standings", "id", [])
+
+    save_json([], str(tmp_path / "standings.json"))
+    with pytest.raises(ValueError, match="refusée"):
+        sync_snapshot(backend, tmp_path, chunk_size=5, tables=["standings"])
+    assert len(server.tables["standings"]) == 8
+
+
+MATCH_COLUMNS = ["match_id", "date", "time", "home_team", "away_team", "venue", "score_detail",
+                 "home_sets", "away_sets", "winner", "sets", "status", "created_at"]
+
+
+def match(number):
+    return adapt_match({"match_id": f"BFQ{number:03d}", "date": "2025-10-04", "time": "20:00",
+                        "home_team": "CYSOING 1", "away_team": "LILLE 1",
+                        "home_team_id": str(uuid.UUID(int=1)), "away_team_id": str(uuid.UUID(int=2)),
+                        "score_detail": "", "home_sets": None, "away_sets": None, "winner": None,
+                        "sets": [], "created_at": "2025-10-04T12:00:00Z"})
+
+
+def test_team_id_columns_are_only_sent_once_migrated(capsys):
+    # Schéma d'avant la migration sql/match_team_ids.sql
+    server = FakePostgrest(columns={"matches": MATCH_COLUMNS})
+    try:
+        backend = RestBackend(server.url, FAKE_KEY)
+        assert backend.upsert("matches", [match(1), match(2)], on_conflict="match_id") == 2
+        assert "home_team_id" not in server.tables["matches"]["BFQ001"]
+        assert "sql/match_team_ids.sql" in capsys.readouterr().out
+
+        server.columns["matches"].update({"home_team_id", "away_team_id"})
+        backend = RestBackend(server.url, FAKE_KEY)
+        backend.upsert("matches", [match(1)], on_conflict="match_id")
+        assert server.tables["matches"]["BFQ001"]["home_team_id"] == str(uuid.UUID(int=1))
+    finally:
+        server.close()
@@ -0,0 +1,133 @@
+# scripts/tests/test_sync_checkpoint.py
+import types
+
+import pytest
+
+from utils import save_json
+from final_sync import sync_snapshot
+from sync_checkpoint import SyncCheckpoint
+
+
+class RecordingBackend:
+    """Backend en mémoire : enregistre chaque appel, peut échouer au N-ième upsert"""
+
+    transactional = False
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.upserts = []
+        self.deleted = {}
+
+    def upsert(self, table, rows, on_conflict=None):
+        if self.fail_at is not None and len(self.upserts) == self.fail_at:
+            raise ConnectionError("coupure réseau simulée")
+        self.upserts.append((table, on_conflict, rows if isinstance(rows, list) else list(rows)))
+        return len(self.upserts[-1][2])
+
+    def delete_missing(self, table, key, keep):
+        self.deleted[table] = list(keep)
+        return 0
+
+    def rows(self, table):
+        return [row for name, _, rows in self.upserts if name == table for row in rows]
+
+
+def match(number, home_sets=None):
+    return {
+        "match_id": f"BFQ{number:03d}", "date": "2025-10-04", "home_team": "A", "away_team": "B",
+        "score_detail": "", "home_sets": home_sets, "away_sets": None, "winner": None,
+        "sets": [], "created_at": "2025-10-01T00:00:00Z"
+    }
+
+
+def standing(number):
+    return {
+        "id": f"team-{number}", "team_name": f"EQUIPE {number}", "rank": number, "points": 0,
+        "played": 0, "wins": 0, "losses": 0, "sets_won": 0, "sets_lost": 0,
+        "points_for": 0, "points_against": 0, "ratio": 0
+    }
+
+
+def write_snapshot(data_dir, matches=5, home_sets=None):
+    save_json([{"name": "Journée 01", "date": "2025-10-04", "pool": "BFQ",
+                "match_ids": [f"BFQ{i:03d}" for i in range(1, matches + 1)]}],
+              data_dir / "matchdays.json")
+    save_json([match(i, home_sets) for i in range(1, matches + 1)], data_dir / "matches.json")
+    save_json([standing(i) for i in range(1, 4)], data_dir / "standings.json")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_snapshot(tmp_path)
+    return tmp_path
+
+
+def checkpoint_for(data_dir):
+    return SyncCheckpoint(data_dir / ".sync_checkpoint.json", logger=lambda message: None)
+
+
+def test_resume_after_interrupted_run_sends_only_missing_chunks(data_dir):
+    # matchdays (1 lot) puis matches par lots de 2 : coupure au 2e lot de matches
+    failing = RecordingBackend(fail_at=2)
+    with pytest.raises(ConnectionError):
+        sync_snapshot(failing, data_dir, chunk_size=2, checkpoint=checkpoint_for(data_dir))
+    assert [row["match_id"] for row in failing.rows("matches")] == ["BFQ001", "BFQ002"]
+
+    checkpoint = checkpoint_for(data_dir)
+    assert checkpoint.is_done("matchdays")
+    assert checkpoint.offset("matches") == 2
+    assert checkpoint.state["tables"]["matches"]["watermark"] == "BFQ002"
+
+    backend = RecordingBackend()
+    summary = sync_snapshot(backend, data_dir, chunk_size=2, checkpoint=checkpoint)
+    assert backend.rows("matchdays") == []
+    assert [row["match_id"] for row in backend.rows("matches")] == ["BFQ003", "BFQ004", "BFQ005"]
+    assert summary == {"matchdays": 1, "matches": 5, "standings": 3}
+    assert checkpoint_for(data_dir).state["completed"]
+
+
+def test_resume_keeps_skipped_keys_for_mirror_tables(data_dir):
+    # Coupure pendant standings (miroir) : la reprise doit garder toutes ses clés
+    failing = RecordingBackend(fail_at=5)
+    with pytest.raises(ConnectionError):
+        sync_snapshot(failing, data_dir, chunk_size=2, checkpoint=checkpoint_for(data_dir))
+
+    backend = RecordingBackend()
+    sync_snapshot(backend, data_dir, chunk_size=2, checkpoint=checkpoint_for(data_dir))
+    assert [row["id"] for row in backend.rows("standings")] == ["team-3"]
+    assert backend.deleted["standings"] == ["team-1", "team-2", "team-3"]
+
+
+def test_new_snapshot_supersedes_partial_run(data_dir):
+    failing = RecordingBackend(fail_at=2)
+    with pytest.raises(ConnectionError):
+        sync_snapshot(failing, data_dir, chunk_size=2, checkpoint=checkpoint_for(data_dir))
+
+    # Nouveau scraping avant la relance : le run partiel ne doit pas être repris
+    write_snapshot(data_dir, matches=4, home_sets=3)
+    checkpoint = checkpoint_for(data_dir)
+    backend = RecordingBackend()
+    sync_snapshot(backend, data_dir, chunk_size=2, checkpoint=checkpoint)
+    assert len(backend.rows("matchdays")) == 1
+    assert [row["match_id"] for row in backend.rows("matches")] == ["BFQ001", "BFQ002", "BFQ003", "BFQ004"]
+    assert all(row["home_sets"] == 3 for row in backend.rows("matches"))
+    assert checkpoint.state["completed"]
+
+
+def test_transactional_backend_merges_each_table_once(data_dir):
+    backend = RecordingBackend()
+    backend.transactional = True
+    calls = []
+    record = backend.upsert
+
+    def upsert(table, rows, on_conflict=None):
+        # Le flux est transmis tel quel, sans matérialisation en lots
+        calls.append((table, isinstance(rows, types.GeneratorType)))
+        return record(table, rows, on_conflict)
+
+    backend.upsert = upsert
+    summary = sync_snapshot(backend, data_dir, chunk_size=2, checkpoint=checkpoint_for(data_dir))
+    assert calls == [("matchdays", True), ("matches", True), ("standings", True)]
+    assert summary == {"matchdays": 1, "matches": 5, "standings": 3}
+    assert backend.deleted["standings"] == ["team-1", "team-2", "team-3"]
+    assert not (data_dir / ".sync_checkpoint.json").exists()
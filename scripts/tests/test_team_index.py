@@ -0,0 +1,39 @@
+# scripts/tests/test_team_index.py
+import sys
+
+import team_index
+from team_index import TeamIndex
+
+
+def test_variants_resolve_to_the_standings_uuid(tmp_path):
+    index = TeamIndex(tmp_path / "team_index.json")
+    team_id = index.register("HELLEMMES-LILLE 1", season="2025/2026")
+    assert index.resolve("Hellemmes - Lille  1") == team_id
+    assert index.resolve("HLM 1") != team_id  # variante inconnue : équipe à part
+
+
+def test_alias_reattaches_a_variant_already_seen(tmp_path):
+    index = TeamIndex(tmp_path / "team_index.json")
+    team_id = index.register("HELLEMMES-LILLE 1")
+    index.resolve("HLM 1")
+    assert index.add_alias("HLM 1", "HELLEMMES-LILLE 1") == team_id
+    assert index.resolve("hlm 1") == team_id
+    index.save()
+    assert TeamIndex(tmp_path / "team_index.json").lookup("HLM 1") == team_id
+
+
+def test_alias_command(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "team_index.json"
+    index = TeamIndex(path)
+    team_id = index.register("HELLEMMES-LILLE 1")
+    index.save()
+
+    monkeypatch.setattr(sys, "argv", ["team_index.py", "--index", str(path),
+                                      "alias", "HLM 1", "HELLEMMES-LILLE 1"])
+    team_index.main()
+    assert f"HLM 1 -> HELLEMMES-LILLE 1 ({team_id})" in capsys.readouterr().out
+    assert TeamIndex(path).lookup("HLM 1") == team_id
+
+    monkeypatch.setattr(sys, "argv", ["team_index.py", "--index", str(path), "lookup", "HLM 1"])
+    team_index.main()
+    assert team_id in capsys.readouterr().out
@@ -0,0 +1,72 @@
+# scripts/tests/test_utils.py
+import json
+import os
+
+import pytest
+
+from utils import iter_json_array, iter_records, snapshot_path
+
+RECORDS = [
+    {"match_id": "BFQ001", "home_team": "CAMBRAI 1", "sets": [{"home": 25, "away": 11}]},
+    {"name": "Journée 01", "match_ids": ["BFQ001", "BFQ002"], "date": None},
+    {"texte": "crochets ] [ et virgules , \"guillemets\" \\ échappés", "vide": {}},
+    123456789,
+    -0.5e-3,
+    "chaîne seule",
+    [],
+    [[1, 2], {"a": [3, {"b": 4}]}],
+    True,
+    None,
+]
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 16, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_json_array_small_chunks(tmp_path, chunk_size, indent):
+    path = write(tmp_path / "matches.json", json.dumps(RECORDS, ensure_ascii=False, indent=indent))
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4])
+def test_iter_json_array_numbers_split_across_chunks(tmp_path, chunk_size):
+    numbers = [1, 23, 456, 7890, 12345, 3.25, -17, 1e10]
+    path = write(tmp_path / "numbers.json", json.dumps(numbers))
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == numbers
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]  ", "\n[\n]\n"])
+def test_iter_json_array_empty(tmp_path, text):
+    assert list(iter_json_array(write(tmp_path / "empty.json", text), chunk_size=1)) == []
+
+
+@pytest.mark.parametrize("text", ['[{"a": 1}, {"b":', '[1, 2', ''])
+def test_iter_json_array_truncated(tmp_path, text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(write(tmp_path / "broken.json", text), chunk_size=2))
+
+
+def test_iter_json_array_requires_an_array(tmp_path):
+    with pytest.raises(ValueError, match="Tableau JSON attendu"):
+        list(iter_json_array(write(tmp_path / "object.json", '{"a": 1}'), chunk_size=3))
+
+
+def test_snapshot_path_prefers_the_newest_variant(tmp_path):
+    assert snapshot_path(tmp_path, "matches.json") == tmp_path / "matches.json"
+
+    json_path = write(tmp_path / "matches.json", json.dumps([{"v": "json"}]))
+    assert snapshot_path(tmp_path, "matches.json") == json_path
+
+    jsonl_path = write(tmp_path / "matches.jsonl", json.dumps({"v": "jsonl"}) + "\n")
+    os.utime(jsonl_path, ns=(2_000_000_000 * 10**9, 2_000_000_000 * 10**9))
+    assert snapshot_path(tmp_path, "matches.json") == jsonl_path
+    assert list(iter_records(snapshot_path(tmp_path, "matches.json"))) == [{"v": "jsonl"}]
+
+    # Un .jsonl resté d'un ancien export ne masque pas le .json réécrit ensuite
+    os.utime(jsonl_path, ns=(1_000_000_000 * 10**9, 1_000_000_000 * 10**9))
+    assert snapshot_path(tmp_path, "matches.json") == json_path
+    assert list(iter_records(snapshot_path(tmp_path, "matches.json"))) == [{"v": "json"}]
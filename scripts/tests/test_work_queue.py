@@ -0,0 +1,185 @@
+# scripts/tests/test_work_queue.py
+import time
+
+import pytest
+
+from records import Match, Matchday, Standing, as_dict
+from team_index import TeamIndex
+from work_queue import LeaseLost, MemoryQueue, QueueWorker, SQLiteQueue, sync_results
+
+LEASE = 0.3
+
+
+def target(poule):
+    return {"season": "2025/2026", "codent": "PTFL59", "poule": poule}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_queue(request, tmp_path):
+    def make(lease_seconds=LEASE, max_attempts=3):
+        if request.param == "memory":
+            return MemoryQueue(lease_seconds, max_attempts)
+        return SQLiteQueue(tmp_path / "queue.sqlite3", lease_seconds, max_attempts)
+    return make
+
+
+def expire(lease):
+    time.sleep(max(0.0, lease.expires - time.time()) + 0.05)
+
+
+def result(poule, home_sets=3):
+    return {
+        "standings": [as_dict(Standing(f"id-{poule}", f"EQUIPE {poule}", rank=1))],
+        "matchdays": [as_dict(Matchday("md", "Journée 01", match_ids=[f"{poule}001"], pool=poule))],
+        "matches": [as_dict(Match("m", f"{poule}001", "2025-10-04", "20:00", f"EQUIPE {poule}",
+                                  "AUTRE 1", home_sets=home_sets, away_sets=0, status="completed"))],
+    }
+
+
+def test_claims_oldest_pending_task_first(make_queue):
+    queue = make_queue()
+    queue.enqueue([target("BFQ")])
+    time.sleep(0.01)
+    queue.enqueue([target("BMA")])
+
+    first, second = queue.claim("a"), queue.claim("b")
+    assert (first.target["poule"], first.token) == ("BFQ", 1)
+    assert (second.target["poule"], second.token) == ("BMA", 1)
+    assert queue.claim("c") is None
+
+
+def test_expired_lease_is_reclaimed_with_a_new_token(make_queue):
+    queue = make_queue()
+    queue.enqueue([target("BFQ")])
+    stale = queue.claim("a")
+    assert queue.claim("b") is None
+
+    expire(stale)
+    fresh = queue.claim("b")
+    assert fresh.task == stale.task
+    assert fresh.token == stale.token + 1
+
+
+def test_stale_token_is_fenced_out(make_queue):
+    queue = make_queue()
+    queue.enqueue([target("BFQ")])
+    stale = queue.claim("a")
+    expire(stale)
+    fresh = queue.claim("b")
+
+    with pytest.raises(LeaseLost):
+        queue.heartbeat(stale)
+    with pytest.raises(LeaseLost):
+        queue.complete(stale, result("BFQ", home_sets=1))
+    with pytest.raises(LeaseLost):
+        queue.fail(stale, "erreur")
+
+    queue.complete(fresh, result("BFQ"))
+    [(task, token, _, payload)] = queue.unsynced_results()
+    assert (task, token) == (fresh.task, fresh.token)
+    assert payload["matches"][0]["home_sets"] == 3
+
+
+def test_complete_after_takeover_is_refused(make_queue):
+    queue = make_queue()
+    queue.enqueue([target("BFQ")])
+    stale = queue.claim("a")
+    expire(stale)
+    fresh = queue.claim("b")
+    queue.complete(fresh, result("BFQ"))
+
+    # Le premier worker se réveille après que la tâche a été terminée par un autre
+    with pytest.raises(LeaseLost):
+        queue.complete(stale, result("BFQ", home_sets=1))
+    assert queue.stats() == {"done": 1}
+    assert queue.unsynced_results()[0][3]["matches"][0]["home_sets"] == 3
+
+
+def test_heartbeat_keeps_the_lease(make_queue):
+    queue = make_queue()
+    queue.enqueue([target("BFQ")])
+    lease = queue.claim("a")
+    for _ in range(4):
+        time.sleep(LEASE / 2)
+        queue.heartbeat(lease)
+    assert queue.claim("b") is None
+    queue.complete(lease, result("BFQ"))
+
+
+def test_mark_synced_requires_the_current_result_token(make_queue):
+    queue = make_queue()
+    queue.enqueue([target("BFQ")])
+    lease = queue.claim("a")
+    queue.complete(lease, result("BFQ"))
+    assert [token for _, token, _, _ in queue.unsynced_results()] == [1]
+
+    # Poule re-scrapée avant la synchro du premier résultat
+    queue.enqueue([target("BFQ")])
+    newer = queue.claim("b")
+    queue.complete(newer, result("BFQ", home_sets=2))
+
+    queue.mark_synced(lease.task, lease.token)  # jeton remplacé : sans effet
+    assert [token for _, token, _, _ in queue.unsynced_results()] == [2]
+    queue.mark_synced(newer.task, newer.token)
+    assert queue.unsynced_results() == []
+
+
+def test_failures_are_retried_then_marked_failed(make_queue):
+    queue = make_queue(max_attempts=2)
+    queue.enqueue([target("BFQ")])
+    queue.fail(queue.claim("a"), "timeout")
+    assert queue.stats() == {"pending": 1}
+    queue.fail(queue.claim("a"), "timeout")
+    assert queue.stats() == {"failed": 1}
+    assert queue.claim("a") is None
+
+
+def test_expired_lease_without_attempts_left_is_abandoned(make_queue):
+    queue = make_queue(max_attempts=1)
+    queue.enqueue([target("BFQ")])
+    expire(queue.claim("a"))
+    assert queue.claim("b") is None
+    assert queue.stats() == {"failed": 1}
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.upserts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def upsert(self, table, rows, on_conflict=None):
+        self.upserts.append((table, on_conflict, list(rows)))
+        return len(self.upserts[-1][2])
+
+
+def test_each_result_is_synced_exactly_once(make_queue, tmp_path):
+    queue = make_queue()
+    queue.enqueue([target("BFQ"), target("BMA")])
+
+    calls = []
+
+    def scrape(task_target, scrapers):
+        calls.append(task_target["poule"])
+        if calls.count(task_target["poule"]) == 1 and task_target["poule"] == "BMA":
+            raise ConnectionError("coupure réseau")
+        return result(task_target["poule"])
+
+    worker = QueueWorker(queue, "w1", scrape=scrape, logger=lambda message: None)
+    assert worker.run() == 3  # BMA échoue une fois puis réussit
+    assert sorted(calls) == ["BFQ", "BMA", "BMA"]
+
+    backend = RecordingBackend()
+    index = TeamIndex(tmp_path / "team_index.json")
+    assert sync_results(queue, backend, index, logger=lambda message: None) == 2
+    assert sync_results(queue, backend, index, logger=lambda message: None) == 0
+
+    matches = [row for table, _, rows in backend.upserts if table == "matches" for row in rows]
+    assert sorted(row["match_id"] for row in matches) == ["BFQ001", "BMA001"]
+    assert all(row["home_team_id"] for row in matches)
+    matchday_keys = {on_conflict for table, on_conflict, _ in backend.upserts if table == "matchdays"}
+    assert matchday_keys == {"id"}
@@ -4,6 +4,8 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 
+from records import to_serializable
+
 def generate_uuid():
     """Génère un UUID v4"""
     return str(uuid.uuid4())
@@ -12,10 +14,16 @@ def get_timestamp():
     """Retourne le timestamp actuel au format ISO"""
     return datetime.now().isoformat() + 'Z'
 
+# Dossier des données, indépendant du répertoire courant (scripts/../data)
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
 def save_json(data, filepath):
-    """Sauvegarde des données en JSON"""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Sauvegarde des données en JSON (dicts ou enregistrements de records.py)
+
+    Écriture dans un fichier temporaire puis renommage : un lecteur (mode
+    watch de la synchro) ne voit jamais un fichier à moitié écrit.
+    """
+    write_atomic(filepath, json.dumps(data, ensure_ascii=False, indent=2, default=to_serializable))
 
 def load_json(filepath):
     """Charge des données depuis un fichier JSON"""
@@ -27,15 +35,18 @@ def load_json(filepath):
     except json.JSONDecodeError:
         return None
 
-def create_backup(filepath):
-    """Crée un backup timestampé d'un fichier"""
+def create_backup(filepath, timestamp=None):
+    """Crée un backup timestampé d'un fichier
+
+    `timestamp` permet de donner le même horodatage à tous les backups d'un run.
+    """
     if not Path(filepath).exists():
         return None
     
     backup_dir = Path(filepath).parent / "backups"
     backup_dir.mkdir(exist_ok=True)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = Path(filepath).name
     backup_path = backup_dir / f"{filename}_{timestamp}.json"
     
@@ -49,3 +60,112 @@ def generate_team_uuid(team_name):
     hash_object = hashlib.md5(team_name.encode('utf-8'))
     # Convertit le hash en UUID v5-like pour garantir l'unicité
     return str(uuid.UUID(hash_object.hexdigest()[:32]))
+
+def generate_matchday_uuid(pool, day_number):
+    """Génère un UUID déterministe pour la journée `day_number` d'une poule"""
+    import hashlib
+    hash_object = hashlib.md5(f"matchday|{pool or ''}|{day_number}".encode('utf-8'))
+    return str(uuid.UUID(hash_object.hexdigest()[:32]))
+
+def write_atomic(filepath, data):
+    """Écrit un fichier de façon atomique (fichier temporaire puis renommage)"""
+    import os
+    import tempfile
+    filepath = Path(filepath)
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    encoding = None if isinstance(data, bytes) else 'utf-8'
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filepath
+
+def iter_json_array(filepath, chunk_size=1 << 16):
+    """Itère sur les éléments d'un tableau JSON sans charger tout le fichier
+
+    Le fichier est lu par blocs de `chunk_size` caractères et chaque élément
+    est décodé dès qu'il est complet : la mémoire utilisée est bornée par la
+    taille d'un élément, pas par celle du fichier.
+    """
+    decoder = json.JSONDecoder()
+    with open(filepath, 'r', encoding='utf-8') as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        started = False
+
+        def fill():
+            nonlocal buffer, pos, eof
+            block = f.read(chunk_size)
+            if not block:
+                eof = True
+            buffer = buffer[pos:] + block
+            pos = 0
+
+        while True:
+            # Sauter les blancs et séparateurs
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                fill()
+
+            if pos >= len(buffer):
+                raise ValueError(f"Tableau JSON incomplet: {filepath}")
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"Tableau JSON attendu: {filepath}")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # Un élément non suivi d'un séparateur peut être tronqué : un
+            # nombre coupé entre deux blocs ("1e" de "1e10", "3." de "3.25")
+            # se décode sans erreur en un nombre plus court
+            if not eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                fill()
+                continue
+            pos = end
+            yield item
+
+def iter_json_lines(filepath):
+    """Itère sur les enregistrements d'un fichier JSON-lines"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def snapshot_path(data_dir, filename):
+    """Fichier d'un snapshot : la variante (.json ou .jsonl) la plus récente
+
+    Un .jsonl resté d'un ancien export ne doit pas masquer le .json que le
+    scraper vient d'écrire, et inversement.
+    """
+    path = Path(data_dir) / filename
+    jsonl = Path(data_dir) / filename.replace('.json', '.jsonl')
+    if not jsonl.exists():
+        return path
+    if not path.exists() or jsonl.stat().st_mtime_ns > path.stat().st_mtime_ns:
+        return jsonl
+    return path
+
+def iter_records(filepath):
+    """Itère sur un fichier de snapshot (.jsonl ou tableau JSON)"""
+    if str(filepath).endswith('.jsonl'):
+        return iter_json_lines(filepath)
+    return iter_json_array(filepath)
@@ -0,0 +1,474 @@
+# scripts/work_queue.py
+import argparse
+import json
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Import des utilitaires
+from utils import DATA_DIR
+from records import Matchday, Match, Standing, as_dict
+from team_index import TeamIndex
+
+DEFAULT_LEASE = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class LeaseLost(RuntimeError):
+    """Le bail d'une tâche a expiré ou a été repris par un autre worker"""
+
+
+def task_id(season, codent, poule):
+    return f"{season}|{codent}|{poule}"
+
+
+class Lease:
+    """Bail sur une tâche : `token` est le jeton de fencing de ce bail"""
+
+    def __init__(self, task, token, target, expires):
+        self.task = task
+        self.token = token
+        self.target = target  # {"season", "codent", "poule"}
+        self.expires = expires
+
+    def __repr__(self):
+        return f"Lease({self.task!r}, token={self.token})"
+
+
+class SQLiteQueue:
+    """File de tâches de scraping dans une base SQLite partagée
+
+    Une tâche (saison, comité, poule) passe par les états pending -> leased
+    -> done (ou failed après `max_attempts`). Chaque prise de bail incrémente
+    le jeton de la tâche : heartbeat, complete et fail ne sont acceptés que
+    pour le jeton courant (fencing), si bien qu'un worker dont le bail a
+    expiré ne peut plus écraser le résultat de celui qui a repris la tâche.
+    Un bail expiré redevient réclamable.
+
+    La base est ouverte en journal DELETE (le mode WAL ne fonctionne pas sur
+    un volume réseau) et chaque réclamation se fait dans une transaction
+    BEGIN IMMEDIATE.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        season TEXT NOT NULL,
+        codent TEXT NOT NULL,
+        poule TEXT NOT NULL,
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        token INTEGER NOT NULL DEFAULT 0,
+        owner TEXT,
+        lease_expires REAL,
+        result TEXT,
+        result_token INTEGER,
+        synced_token INTEGER,
+        error TEXT,
+        updated_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS tasks_state_idx ON tasks (state, updated_at);
+    """
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = str(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self.transaction() as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Connexion courte (une par appel, utilisable depuis n'importe quel thread)"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            if immediate:
+                conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def enqueue(self, targets):
+        """Ajoute des cibles (dicts season/codent/poule) ; une tâche terminée est rouverte"""
+        now = time.time()
+        with self.transaction(immediate=True) as conn:
+            for target in targets:
+                conn.execute(
+                    """
+                    INSERT INTO tasks (id, season, codent, poule, updated_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET state = 'pending', attempts = 0, error = NULL,
+                        updated_at = excluded.updated_at
+                    WHERE tasks.state IN ('done', 'failed')
+                    """,
+                    (task_id(**target), target["season"], target["codent"], target["poule"], now)
+                )
+
+    def claim(self, owner):
+        """Prend un bail sur la plus ancienne tâche disponible ; None si la file est vide"""
+        now = time.time()
+        with self.transaction(immediate=True) as conn:
+            # Baux expirés sans tentative restante : abandon
+            conn.execute(
+                "UPDATE tasks SET state = 'failed', error = 'bail expiré', updated_at = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id, season, codent, poule, token FROM tasks "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY updated_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            task, season, codent, poule, token = row
+            expires = now + self.lease_seconds
+            conn.execute(
+                "UPDATE tasks SET state = 'leased', attempts = attempts + 1, token = ?, "
+                "owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (token + 1, owner, expires, now, task)
+            )
+        return Lease(task, token + 1, {"season": season, "codent": codent, "poule": poule}, expires)
+
+    def fenced_update(self, lease, assignments, params):
+        with self.transaction(immediate=True) as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET {assignments}, updated_at = ? "
+                "WHERE id = ? AND token = ? AND state = 'leased'",
+                (*params, time.time(), lease.task, lease.token)
+            )
+            if cursor.rowcount != 1:
+                raise LeaseLost(f"Bail perdu sur {lease.task} (jeton {lease.token})")
+
+    def heartbeat(self, lease):
+        """Prolonge le bail ; lève LeaseLost s'il a été repris"""
+        lease.expires = time.time() + self.lease_seconds
+        self.fenced_update(lease, "lease_expires = ?", (lease.expires,))
+
+    def complete(self, lease, result):
+        """Rend le résultat d'une tâche (refusé si le bail n'est plus valide)"""
+        self.fenced_update(
+            lease, "state = 'done', result = ?, result_token = token, owner = NULL, error = NULL",
+            (json.dumps(result, ensure_ascii=False),)
+        )
+
+    def fail(self, lease, error):
+        """Relâche la tâche après une erreur : nouvel essai, ou échec définitif"""
+        with self.transaction(immediate=True) as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, error = ?, updated_at = ? WHERE id = ? AND token = ? AND state = 'leased'",
+                (self.max_attempts, str(error), time.time(), lease.task, lease.token)
+            )
+            if cursor.rowcount != 1:
+                raise LeaseLost(f"Bail perdu sur {lease.task} (jeton {lease.token})")
+
+    def unsynced_results(self):
+        """Résultats rendus mais pas encore synchronisés : (tâche, jeton, cible, résultat)"""
+        with self.transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, result_token, season, codent, poule, result FROM tasks "
+                "WHERE state = 'done' AND (synced_token IS NULL OR synced_token != result_token) "
+                "ORDER BY updated_at"
+            ).fetchall()
+        return [
+            (task, token, {"season": season, "codent": codent, "poule": poule}, json.loads(result))
+            for task, token, season, codent, poule, result in rows
+        ]
+
+    def mark_synced(self, task, token):
+        """Marque un résultat comme synchronisé (sans effet s'il a été remplacé entre-temps)"""
+        with self.transaction(immediate=True) as conn:
+            conn.execute(
+                "UPDATE tasks SET synced_token = ? WHERE id = ? AND result_token = ?",
+                (token, task, token)
+            )
+
+    def stats(self):
+        with self.transaction() as conn:
+            rows = conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        return dict(rows)
+
+
+class MemoryQueue:
+    """Équivalent en mémoire de SQLiteQueue (tests locaux, workers en threads)"""
+
+    def __init__(self, lease_seconds=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.tasks = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, targets):
+        now = time.time()
+        with self._lock:
+            for target in targets:
+                key = task_id(**target)
+                entry = self.tasks.get(key)
+                if entry is None:
+                    self.tasks[key] = {
+                        "target": dict(target), "state": "pending", "attempts": 0, "token": 0,
+                        "owner": None, "lease_expires": None, "result": None,
+                        "result_token": None, "synced_token": None, "error": None, "updated_at": now
+                    }
+                elif entry["state"] in ("done", "failed"):
+                    entry.update({"state": "pending", "attempts": 0, "error": None, "updated_at": now})
+
+    def claim(self, owner):
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for key, entry in self.tasks.items():
+                expired = entry["state"] == "leased" and entry["lease_expires"] < now
+                if expired and entry["attempts"] >= self.max_attempts:
+                    entry.update({"state": "failed", "error": "bail expiré", "updated_at": now})
+                elif entry["state"] == "pending" or expired:
+                    candidates.append((entry["updated_at"], key))
+            if not candidates:
+                return None
+            key = min(candidates)[1]
+            entry = self.tasks[key]
+            entry["token"] += 1
+            entry["attempts"] += 1
+            entry.update({"state": "leased", "owner": owner,
+                          "lease_expires": now + self.lease_seconds, "updated_at": now})
+            return Lease(key, entry["token"], dict(entry["target"]), entry["lease_expires"])
+
+    def current(self, lease):
+        entry = self.tasks.get(lease.task)
+        if entry is None or entry["token"] != lease.token or entry["state"] != "leased":
+            raise LeaseLost(f"Bail perdu sur {lease.task} (jeton {lease.token})")
+        return entry
+
+    def heartbeat(self, lease):
+        with self._lock:
+            entry = self.current(lease)
+            lease.expires = entry["lease_expires"] = time.time() + self.lease_seconds
+
+    def complete(self, lease, result):
+        with self._lock:
+            entry = self.current(lease)
+            entry.update({"state": "done", "result": json.loads(json.dumps(result)),
+                          "result_token": lease.token, "owner": None, "error": None,
+                          "updated_at": time.time()})
+
+    def fail(self, lease, error):
+        with self._lock:
+            entry = self.current(lease)
+            state = "failed" if entry["attempts"] >= self.max_attempts else "pending"
+            entry.update({"state": state, "owner": None, "error": str(error), "updated_at": time.time()})
+
+    def unsynced_results(self):
+        with self._lock:
+            return [
+                (key, e["result_token"], dict(e["target"]), e["result"])
+                for key, e in sorted(self.tasks.items(), key=lambda item: item[1]["updated_at"])
+                if e["state"] == "done" and e["synced_token"] != e["result_token"]
+            ]
+
+    def mark_synced(self, task, token):
+        with self._lock:
+            entry = self.tasks.get(task)
+            if entry is not None and entry["result_token"] == token:
+                entry["synced_token"] = token
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for entry in self.tasks.values():
+                counts[entry["state"]] = counts.get(entry["state"], 0) + 1
+            return counts
+
+
+def open_queue(url, lease_seconds=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Ouvre une file : "memory://" ou chemin / "sqlite:///chemin" d'une base SQLite"""
+    if url == "memory://":
+        return MemoryQueue(lease_seconds, max_attempts)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SQLiteQueue(url, lease_seconds, max_attempts)
+
+
+class QueueWorker:
+    """Worker : réclame une cible, la scrape sous bail (heartbeat) puis rend le résultat
+
+    Le worker ne synchronise rien lui-même : il rend les enregistrements
+    extraits, et `sync_results` (un seul coordinateur) les envoie au backend.
+    Un résultat rendu après la perte du bail est refusé par la file.
+    """
+
+    def __init__(self, queue, worker_id=None, scrape=None, logger=print):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{threading.get_ident()}"
+        self.scrape = scrape or scrape_target
+        self.log = logger
+        self.scrapers = {}
+
+    def heartbeat_loop(self, lease, stop, lost):
+        interval = max(self.queue.lease_seconds / 3.0, 0.05)
+        while not stop.wait(interval):
+            try:
+                self.queue.heartbeat(lease)
+            except LeaseLost:
+                lost.set()
+                return
+
+    def process(self, lease):
+        stop, lost = threading.Event(), threading.Event()
+        beat = threading.Thread(target=self.heartbeat_loop, args=(lease, stop, lost), daemon=True)
+        beat.start()
+        try:
+            result = self.scrape(lease.target, self.scrapers)
+        except Exception as e:
+            stop.set()
+            beat.join()
+            self.log(f"Échec de {lease.task}: {e}")
+            if not lost.is_set():
+                self.queue.fail(lease, e)
+            return False
+        stop.set()
+        beat.join()
+
+        try:
+            self.queue.complete(lease, result)
+        except LeaseLost as e:
+            self.log(f"Résultat abandonné: {e}")
+            return False
+        self.log(f"{lease.task}: {len(result['matches'])} matchs rendus")
+        return True
+
+    def run(self, max_tasks=None, wait_for_work=False, poll_interval=5.0):
+        """Traite des tâches jusqu'à ce que la file soit vide (ou `max_tasks` atteint)"""
+        done = 0
+        while max_tasks is None or done < max_tasks:
+            lease = self.queue.claim(self.worker_id)
+            if lease is None:
+                if not wait_for_work:
+                    break
+                time.sleep(poll_interval)
+                continue
+            self.process(lease)
+            done += 1
+        for scraper in self.scrapers.values():
+            scraper.session.close()
+        return done
+
+
+def scrape_target(target, scrapers):
+    """Scrape une poule et renvoie ses enregistrements sous forme de dicts"""
+    from scraper import VolleyballScraper
+
+    key = (target["season"], target["codent"])
+    if key not in scrapers:
+        scrapers[key] = VolleyballScraper(saison=target["season"], codent=target["codent"],
+                                          poule=target["poule"])
+    scraper = scrapers[key]
+    standings, matchdays, matches = scraper.scrape_pools([target["poule"]], max_workers=1)
+    if not matches and not standings:
+        raise ValueError(f"Aucune donnée pour la poule {target['poule']}")
+    return {
+        "standings": [as_dict(s) for s in standings],
+        "matchdays": [as_dict(m) for m in matchdays],
+        "matches": [as_dict(m) for m in matches]
+    }
+
+
+def sync_results(queue, backend, team_index, logger=print):
+    """Synchronise une fois chaque résultat rendu, puis le marque comme synchronisé
+
+    Les upserts sont idempotents : si le coordinateur s'arrête entre l'envoi
+    et le marquage, le résultat sera renvoyé à l'identique au run suivant.
+    """
+    from final_sync import SYNC_TABLES
+
+    synced = 0
+    for task, token, target, result in queue.unsynced_results():
+        standings = [Standing.from_dict(s) for s in result["standings"]]
+        matches = [Match.from_dict(m) for m in result["matches"]]
+        matchdays = [Matchday.from_dict(m) for m in result["matchdays"]]
+
+        # Identités d'équipes résolues ici, sur l'index unique du coordinateur
+        for standing in standings:
+            standing.id = team_index.register(standing.team_name, standing.id, season=target["season"])
+        for match in matches:
+            match.home_team_id = team_index.resolve(match.home_team, season=target["season"])
+            match.away_team_id = team_index.resolve(match.away_team, season=target["season"])
+
+        records = {"matchdays": matchdays, "matches": matches, "standings": standings}
+        with backend:
+            for table, _, adapt, on_conflict, _, _ in SYNC_TABLES:
+                backend.upsert(table, [adapt(r) for r in records[table]], on_conflict=on_conflict)
+        queue.mark_synced(task, token)
+        synced += 1
+        logger(f"{task}: synchronisé (jeton {token})")
+
+    team_index.save()
+    return synced
+
+
+def read_poules(args):
+    poules = list(args.poules or [])
+    if args.poules_file:
+        with open(args.poules_file, 'r', encoding='utf-8') as f:
+            poules += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return poules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File de travail partagée pour le scraping multi-noeuds")
+    parser.add_argument("--queue", default=str(DATA_DIR / "work_queue.sqlite3"),
+                        help="Base SQLite partagée (ou memory:// pour un essai local)")
+    parser.add_argument("--lease", type=int, default=DEFAULT_LEASE, help="Durée d'un bail (s)")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = sub.add_parser("enqueue", help="Ajouter des poules à scraper")
+    enqueue.add_argument("--saison", default="2025/2026")
+    enqueue.add_argument("--codent", default="PTFL59")
+    enqueue.add_argument("--poule", action="append", dest="poules")
+    enqueue.add_argument("--poules-file", default=None)
+
+    worker = sub.add_parser("worker", help="Traiter les tâches de la file")
+    worker.add_argument("--worker-id", default=None)
+    worker.add_argument("--max-tasks", type=int, default=None)
+    worker.add_argument("--wait", action="store_true", help="Attendre de nouvelles tâches quand la file est vide")
+
+    sync = sub.add_parser("sync", help="Synchroniser les résultats rendus (un seul coordinateur)")
+    sync.add_argument("--backend", choices=["rest", "postgres"], default="rest")
+    sync.add_argument("--dsn", default=None)
+    sync.add_argument("--data-dir", default=str(DATA_DIR))
+
+    sub.add_parser("status", help="Nombre de tâches par état")
+
+    args = parser.parse_args()
+    queue = open_queue(args.queue, args.lease, args.max_attempts)
+
+    if args.command == "enqueue":
+        targets = [{"season": args.saison, "codent": args.codent, "poule": p} for p in read_poules(args)]
+        queue.enqueue(targets)
+        print(f"{len(targets)} poules en file")
+    elif args.command == "worker":
+        processed = QueueWorker(queue, args.worker_id).run(args.max_tasks, wait_for_work=args.wait)
+        print(f"{processed} tâches traitées")
+    elif args.command == "sync":
+        from final_sync import create_backend, load_env
+        load_env()
+        backend = create_backend(args.backend, args.dsn)
+        index = TeamIndex(Path(args.data_dir) / "team_index.json")
+        print(f"{sync_results(queue, backend, index)} résultats synchronisés")
+
+    print(json.dumps(queue.stats()))
+
+
+if __name__ == "__main__":
+    main()